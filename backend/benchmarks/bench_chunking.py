@@ -0,0 +1,100 @@
+"""
+Chunking throughput: the legacy sentence-by-sentence chunker (one tokenizer
+call per sentence) against the single-pass token-offset chunker in
+DocumentProcessor, on page_1_bs4.html and on a synthetic CSV built by
+repeating the Bayut listings.
+
+Usage: python benchmarks/bench_chunking.py [--rows 1000000] [--skip-legacy-csv]
+"""
+import sys
+import os
+import time
+import tempfile
+import argparse
+import pandas as pd
+from bs4 import BeautifulSoup
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.rag.document_processor import DocumentProcessor
+from config.rag_config import DATA_DIR
+
+def legacy_process_text(processor, text):
+    """DocumentProcessor.process_text before the single-pass chunker"""
+    text = processor._clean_text(text)
+    sentences = text.split('. ')
+    sentences = [s.strip() + '.' for s in sentences if s.strip()]
+
+    chunks = []
+    current_chunk = []
+    current_size = 0
+    for sentence in sentences:
+        sentence_tokens = len(processor.tokenizer.encode(sentence))
+        if current_size + sentence_tokens > processor.chunk_size:
+            if current_chunk:
+                chunks.append(" ".join(current_chunk))
+            overlap_size = 0
+            current_chunk = []
+            for prev_sentence in current_chunk[-3:]:
+                if overlap_size + len(processor.tokenizer.encode(prev_sentence)) <= processor.chunk_overlap:
+                    current_chunk.append(prev_sentence)
+                    overlap_size += len(processor.tokenizer.encode(prev_sentence))
+            current_size = overlap_size
+        current_chunk.append(sentence)
+        current_size += sentence_tokens
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+    return chunks
+
+def time_chunker(chunk, texts):
+    start = time.perf_counter()
+    chunks = [c for text in texts for c in chunk(text)]
+    return time.perf_counter() - start, chunks
+
+def report(label, texts, processor, skip_legacy=False):
+    print(f"\n{label}: {len(texts)} text(s), {sum(map(len, texts)):,} chars")
+    runs = [("single-pass", processor.process_text)]
+    if not skip_legacy:
+        runs.insert(0, ("legacy", lambda text: legacy_process_text(processor, text)))
+    for name, chunk in runs:
+        elapsed, chunks = time_chunker(chunk, texts)
+        sizes = [len(processor.tokenizer.encode_ordinary(c)) for c in chunks[:1000]]
+        print(f"  {name:<12} {elapsed:8.2f}s  {len(texts) / elapsed:12.0f} texts/s  "
+              f"{len(chunks)} chunks, max {max(sizes, default=0)} tokens")
+
+def write_synthetic_csv(path, rows):
+    """Repeat the listings until the CSV has `rows` rows, varying prices so rows differ"""
+    base = pd.read_csv(os.path.join(DATA_DIR, 'bayut_listings_enriched.csv'))
+    repeats = -(-rows // len(base))
+    df = pd.concat([base] * repeats, ignore_index=True).iloc[:rows]
+    if 'price' in df.columns:
+        df['price'] = pd.to_numeric(df['price'], errors='coerce').fillna(0) + df.index % 1000
+    df.to_csv(path, index=False)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-legacy-csv", action="store_true", help="only time the new chunker on the CSV")
+    args = parser.parse_args()
+
+    processor = DocumentProcessor()
+
+    with open(os.path.join(DATA_DIR, 'page_1_bs4.html'), 'r') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    report("page_1_bs4.html", [soup.get_text()], processor)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'listings.csv')
+        write_synthetic_csv(path, args.rows)
+        df = pd.read_csv(path)
+        # Same row text as process_csv builds
+        texts = [" ".join(str(val) for val in row if pd.notna(val)) for row in df.itertuples(index=False)]
+    report(f"synthetic CSV ({args.rows} rows)", texts, processor, skip_legacy=args.skip_legacy_csv)
+
+if __name__ == "__main__":
+    main()
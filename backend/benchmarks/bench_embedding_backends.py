@@ -0,0 +1,97 @@
+"""
+Embedding backends compared: encode throughput, cold start (imports + model
+load + first encode) and peak RSS for torch, ONNX and int8-quantized ONNX.
+Each backend runs in a fresh interpreter so cold start and memory are not
+shared between them.
+
+Usage: python benchmarks/bench_embedding_backends.py [--texts 2000] [--batch-size 32]
+Export the ONNX model first: python -m services.rag.embedding_backends
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import resource
+import subprocess
+import tempfile
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+BACKENDS = {
+    "torch": {"backend": "torch"},
+    "onnx": {"backend": "onnx", "onnx_quantized": False},
+    "onnx-int8": {"backend": "onnx", "onnx_quantized": True},
+}
+
+def sample_texts(n):
+    import pandas as pd
+    df = pd.read_csv(os.path.join(backend_dir, 'data', 'bayut_listings_enriched.csv'))
+    rows = [" ".join(str(v) for v in row if pd.notna(v)) for row in df.itertuples(index=False)]
+    return [f"{rows[i % len(rows)]} #{i}" for i in range(n)]
+
+def run_child(name, n_texts, batch_size, vectors_path):
+    """Measure one backend in this process and print a JSON result line"""
+    start = time.perf_counter()
+    from services.rag.embedding_service import EmbeddingService
+    from config.rag_config import EMBEDDING_MODEL, ONNX_MODEL_DIR
+
+    service = EmbeddingService(model_name=EMBEDDING_MODEL, onnx_model_dir=ONNX_MODEL_DIR, **BACKENDS[name])
+    service.get_embedding("warm up")
+    cold_start = time.perf_counter() - start
+
+    texts = sample_texts(n_texts)
+    start = time.perf_counter()
+    vectors = service.get_embeddings(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    import numpy as np
+    np.save(vectors_path, vectors)
+    print(json.dumps({
+        "backend": name,
+        "dim": int(vectors.shape[1]),
+        "cold_start_s": round(cold_start, 3),
+        "texts_per_s": round(n_texts / elapsed, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--child", choices=BACKENDS)
+    parser.add_argument("--vectors")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.texts, args.batch_size, args.vectors)
+        return
+
+    import numpy as np
+    workdir = tempfile.mkdtemp()
+    results, vectors = [], {}
+    for name in BACKENDS:
+        vectors_path = os.path.join(workdir, f"{name}.npy")
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", name, "--vectors", vectors_path,
+             "--texts", str(args.texts), "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True, cwd=backend_dir
+        )
+        if proc.returncode != 0:
+            print(f"{name}: failed\n{proc.stderr[-2000:]}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        vectors[name] = np.load(vectors_path)
+
+    reference = vectors.get("torch")
+    for result in results:
+        if reference is not None:
+            # Vectors are L2-normalized, so the row-wise dot product is cosine similarity
+            result["min_cosine_vs_torch"] = round(float((vectors[result["backend"]] * reference).sum(axis=1).min()), 5)
+        print(json.dumps(result))
+
+if __name__ == "__main__":
+    main()
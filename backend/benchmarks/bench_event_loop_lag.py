@@ -0,0 +1,81 @@
+"""
+Event-loop lag while RAG retrieval runs: search stages inline on the loop
+(the previous behaviour) against the dedicated inference executor.
+
+Usage: python benchmarks/bench_event_loop_lag.py [--queries 200] [--concurrency 16]
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.rag.document_processor import DocumentProcessor
+from services.rag.embedding_service import EmbeddingService
+from services.rag.retrieval_service import RetrievalService
+from services.rag.inference_executor import InferenceExecutor, EventLoopLagMonitor
+
+COLLECTION = "bench_loop_lag"
+
+async def run_load(retrieval, queries, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query):
+        async with semaphore:
+            return await retrieval.hybrid_search(query, COLLECTION, limit=5)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(q) for q in queries))
+    elapsed = time.perf_counter() - start
+    # An empty result means the run did less work than the other, not that it was faster
+    empty = sum(1 for hits in results if not hits)
+    assert not empty, f"{empty} of {len(queries)} queries returned no results"
+    return elapsed
+
+async def measure(name, retrieval, queries, concurrency):
+    monitor = EventLoopLagMonitor(interval=0.01, window=100000)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    elapsed = await run_load(retrieval, queries, concurrency)
+    monitor.stop()
+    lag = monitor.snapshot()
+    print(
+        f"{name:<10} {len(queries) / elapsed:7.1f} queries/s  loop lag mean={lag['mean_ms']:.2f}ms "
+        f"p99={lag['p99_ms']:.2f}ms max={lag['max_ms']:.2f}ms"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    processor = DocumentProcessor()
+    documents = processor.process_csv(os.path.join(backend_dir, 'data', 'bayut_listings_enriched.csv'))
+    documents += processor.process_html(os.path.join(backend_dir, 'data', 'page_1_bs4.html'))
+
+    embedding_service = EmbeddingService()
+    retrieval = RetrievalService(embedding_service)
+    retrieval.index_documents(documents, COLLECTION)
+
+    # One service, so both runs search the same indexes; only where the stages run differs.
+    # Distinct query texts per run so every search pays for its embedding (no query cache hits)
+    def queries(run):
+        return [f"apartment for rent near the metro, {run} query {i}" for i in range(args.queries)]
+
+    await measure("inline", retrieval, queries("inline"), args.concurrency)
+    executor = InferenceExecutor(max_workers=args.workers)
+    retrieval.executor = executor
+    try:
+        await measure("executor", retrieval, queries("executor"), args.concurrency)
+    finally:
+        executor.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Relevance and latency of hybrid search fusion: the legacy zip-based
+combination against reciprocal-rank and normalized-score fusion.
+
+Usage: python benchmarks/bench_hybrid_fusion.py [--limit 5] [--repeat 3]
+"""
+import sys
+import os
+import time
+import argparse
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.rag.document_processor import DocumentProcessor
+from services.rag.embedding_service import EmbeddingService
+from services.rag.retrieval_service import RetrievalService, FUSION_METHODS
+
+COLLECTION = "bench_fusion"
+
+def legacy_hybrid_search(retrieval, bm25, query, limit, semantic_weight=0.7):
+    """The pre-fusion behaviour: semantic hits zipped with the first BM25 scores of the corpus"""
+    query_vector = retrieval.embedding_service.get_query_embedding(query)
+    semantic_results = retrieval.qdrant.search(
+        collection_name=COLLECTION,
+        query_vector=query_vector.tolist(),
+        limit=limit * 2
+    )
+    bm25_scores = bm25.get_scores(retrieval._tokenize(query))
+    bm25_scores = (bm25_scores - np.min(bm25_scores)) / (np.max(bm25_scores) - np.min(bm25_scores))
+    combined = [
+        (hit.id, semantic_weight * hit.score + (1 - semantic_weight) * bm25_score)
+        for hit, bm25_score in zip(semantic_results, bm25_scores)
+    ]
+    combined.sort(key=lambda x: x[1], reverse=True)
+    return [doc_id for doc_id, _ in combined[:limit]]
+
+def fused_search(retrieval, query, limit, fusion, semantic_weight=0.7):
+    candidates = max(limit * 4, 20)
+    query_vector = retrieval.embedding_service.get_query_embedding(query)
+    semantic_hits = retrieval.semantic_search(query_vector, COLLECTION, candidates)
+    keyword_hits = retrieval.keyword_search(query, COLLECTION, candidates)
+    fused = FUSION_METHODS[fusion](semantic_hits, keyword_hits, semantic_weight)
+    return [doc_id for doc_id, _ in sorted(fused.items(), key=lambda x: x[1], reverse=True)[:limit]]
+
+def build_corpus(data_dir):
+    processor = DocumentProcessor()
+    documents = []
+    for name in ['bayut_listings_enriched.csv', 'area_stats.csv', 'historical_data.csv']:
+        documents += processor.process_csv(os.path.join(data_dir, name))
+    for name in ['page_1_bs4.html', 'page_2_bs4.html']:
+        documents += processor.process_html(os.path.join(data_dir, name))
+    return documents
+
+def labelled_queries(documents):
+    """One query per (property type, neighborhood) pair; every listing row matching both is relevant"""
+    relevant = {}
+    for doc_id, doc in enumerate(documents):
+        meta = doc["metadata"]
+        if not meta["source"].endswith('bayut_listings_enriched.csv'):
+            continue
+        neighborhood = meta.get("neighborhood")
+        if not isinstance(neighborhood, str) or neighborhood == "N/A":
+            continue
+        query = f"{meta['property_type']} for rent in {neighborhood}"
+        relevant.setdefault(query, set()).add(doc_id)
+    return relevant
+
+def evaluate(name, search, queries, limit, repeat):
+    hits, reciprocal_ranks, latencies = 0, [], []
+    for query, relevant in queries.items():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ranked = search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(relevant & set(ranked)) / min(len(relevant), limit)
+        reciprocal_ranks.append(next((1 / (i + 1) for i, d in enumerate(ranked) if d in relevant), 0.0))
+    print(
+        f"{name:<12} recall@{limit}={hits / len(queries):.3f}  MRR={np.mean(reciprocal_ranks):.3f}  "
+        f"latency p50={np.percentile(latencies, 50):.2f}ms p95={np.percentile(latencies, 95):.2f}ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    documents = build_corpus(os.path.join(backend_dir, 'data'))
+    retrieval = RetrievalService(EmbeddingService())
+    retrieval.index_documents(documents, COLLECTION)
+    queries = labelled_queries(documents)
+    print(f"Indexed {len(documents)} documents, {len(queries)} labelled queries")
+
+    legacy_bm25 = BM25Okapi([retrieval._tokenize(doc["text"]) for doc in documents])
+    evaluate("legacy", lambda q: legacy_hybrid_search(retrieval, legacy_bm25, q, args.limit), queries, args.limit, args.repeat)
+    for fusion in FUSION_METHODS:
+        evaluate(fusion, lambda q: fused_search(retrieval, q, args.limit, fusion), queries, args.limit, args.repeat)
+
+if __name__ == "__main__":
+    main()
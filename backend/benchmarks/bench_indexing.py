@@ -0,0 +1,55 @@
+"""
+Indexing wall time of the process-pool pipeline for several pool sizes,
+over the RAG data sources (or --csv, e.g. a large synthetic listings file).
+The embedding cache is disabled so every run embeds from scratch.
+
+Usage: python benchmarks/bench_indexing.py [--processes 1 2 4 8] [--csv path/to/big.csv]
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.rag.embedding_service import EmbeddingService
+from services.rag.retrieval_service import RetrievalService
+from services.rag.inference_executor import InferenceExecutor
+from services.rag.indexing_pipeline import IndexingPipeline
+from config.rag_config import DATA_DIR, RAG_SOURCES, EMBEDDING_MODEL, INDEX_BATCH_SIZE
+
+async def index_once(embedding_service, paths, processes):
+    executor = InferenceExecutor()
+    retrieval = RetrievalService(embedding_service, executor=executor)
+    retrieval.reset_collection("bench")
+    pipeline = IndexingPipeline(retrieval, executor, processes=processes, batch_size=INDEX_BATCH_SIZE)
+    start = time.perf_counter()
+    count = await pipeline.run({"bench": paths})
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+    return count, elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--csv", help="index this CSV instead of the RAG sources")
+    args = parser.parse_args()
+
+    paths = [args.csv] if args.csv else [
+        os.path.join(DATA_DIR, name) for spec in RAG_SOURCES.values() for name in spec["files"]
+    ]
+    embedding_service = EmbeddingService(model_name=EMBEDDING_MODEL)
+
+    baseline = None
+    print(f"{'processes':>9} {'documents':>10} {'seconds':>9} {'docs/s':>9} {'speedup':>8}")
+    for processes in sorted(set(args.processes)):
+        count, elapsed = asyncio.run(index_once(embedding_service, paths, processes))
+        baseline = baseline or elapsed
+        print(f"{processes:>9} {count:>10} {elapsed:>9.2f} {count / elapsed:>9.0f} {baseline / elapsed:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Scraper parse throughput: BeautifulSoup over the whole page with
+html.parser (the old path) against lxml and targeted card extraction
+(services/scraping/html_parser.py), on the saved Bayut result pages
+(data/page_*_bs4.html). Times card selection alone and selection plus the
+per-card extraction parse_bayut_page does, and checks every mode finds the
+same listings as the old path.
+
+Usage: python benchmarks/bench_parse.py [--repeat 5] [--pages data/page_1_bs4.html ...]
+"""
+import sys
+import os
+import io
+import glob
+import time
+import argparse
+import contextlib
+import logging
+import gc
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.scraping.html_parser import select_cards, parser_backend
+from services.bayut_web_scraper import CARD_SELECTORS, extract_from_card_text
+from config.scraper_config import DATA_DIR
+
+MODES = [
+    ("html.parser", False),
+    ("html.parser", True),
+    ("lxml", False),
+    ("lxml", True),
+]
+
+def extract(cards):
+    """The per-card work of parse_bayut_page (extract_from_card_text prints, so stdout is discarded)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        listings = []
+        for card in cards:
+            url_elem = card.select_one("a")
+            listings.append((extract_from_card_text(card.text), url_elem.get("href") if url_elem else None))
+    return listings
+
+def run(pages, parser, targeted, repeat):
+    select_times, total_times, listings = [], [], None
+    for _ in range(repeat):
+        # Soup trees are full of reference cycles; don't bill one mode for another's garbage
+        gc.collect()
+        select_seconds = total_seconds = 0.0
+        found = []
+        for html in pages:
+            start = time.perf_counter()
+            _, cards = select_cards(html, CARD_SELECTORS, parser=parser, targeted=targeted)
+            selected = time.perf_counter()
+            found.extend(extract(cards))
+            select_seconds += selected - start
+            total_seconds += time.perf_counter() - start
+        select_times.append(select_seconds)
+        total_times.append(total_seconds)
+        listings = found
+    return min(select_times), min(total_times), listings
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes over the pages (best is reported)")
+    parser.add_argument("--pages", nargs="*", help="HTML files (default: data/page_*_bs4.html)")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    paths = args.pages or sorted(glob.glob(os.path.join(DATA_DIR, "page_*_bs4.html")))
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    megabytes = sum(len(html.encode("utf-8")) for html in pages) / 1e6
+    print(f"{len(pages)} pages, {megabytes:.1f} MB; configured parser: {parser_backend()}")
+    print(f"{'parser':<12} {'targeted':<9} {'select_ms':>10} {'total_ms':>10} {'pages/s':>9} {'MB/s':>7} {'speedup':>8}  same listings")
+
+    baseline = None
+    for name, targeted in MODES:
+        try:
+            select_seconds, total_seconds, listings = run(pages, name, targeted, args.repeat)
+        except Exception as e:  # e.g. lxml not installed
+            print(f"{name:<12} {str(targeted):<9} skipped: {str(e)}")
+            continue
+        if baseline is None:
+            baseline = (total_seconds, listings)
+        print(f"{name:<12} {str(targeted):<9} {select_seconds * 1000:10.1f} {total_seconds * 1000:10.1f} "
+              f"{len(pages) / total_seconds:9.1f} {megabytes / total_seconds:7.1f} "
+              f"{baseline[0] / total_seconds:7.2f}x  {listings == baseline[1]} ({len(listings)})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Throughput of query embedding under concurrency: one model call per query
+against the QueryEmbeddingBatcher at several batch sizes.
+
+Usage: python benchmarks/bench_query_batching.py [--concurrency 64] [--rounds 5]
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.rag.embedding_service import EmbeddingService
+from services.rag.query_batcher import QueryEmbeddingBatcher
+
+QUERIES = [
+    "What are the most expensive properties in Dubai?",
+    "2 bedroom apartment in Dubai Marina under 100k",
+    "average rent for villas in Jumeirah Village Circle",
+    "furnished studio near the metro in Business Bay",
+    "which areas had the biggest rent increase this quarter",
+    "townhouse with maid room in Arabian Ranches",
+    "best rental yield for apartments in Downtown Dubai",
+    "price per sqft in Al Barsha",
+]
+
+def make_queries(n, round_id):
+    # Distinct texts per round so no layer of caching can answer them
+    return [f"{QUERIES[i % len(QUERIES)]} ({round_id}-{i})" for i in range(n)]
+
+async def run_unbatched(service, queries):
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(None, service.get_query_embedding, q) for q in queries))
+
+async def run_batched(batcher, queries):
+    await asyncio.gather(*(batcher.embed(q) for q in queries))
+
+async def measure(name, run, concurrency, rounds):
+    await run(make_queries(concurrency, "warmup"))
+    start = time.perf_counter()
+    for round_id in range(rounds):
+        await run(make_queries(concurrency, f"{name}-{round_id}"))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<20} {concurrency * rounds / elapsed:8.1f} queries/s  ({elapsed / rounds * 1000:.1f} ms per wave)")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # No on-disk cache: every query must reach the model
+    service = EmbeddingService()
+
+    await measure("unbatched", lambda qs: run_unbatched(service, qs), args.concurrency, args.rounds)
+    for batch_size in (8, 16, 32, 64):
+        batcher = QueryEmbeddingBatcher(service, max_batch_size=batch_size, max_wait_ms=args.max_wait_ms)
+        await measure(f"batched (max {batch_size})", lambda qs: run_batched(batcher, qs), args.concurrency, args.rounds)
+        await batcher.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,241 @@
+"""
+Retrieval quality and speed of the RAG index, for comparing releases.
+
+Builds the per-source collections from backend/data with the indexing
+pipeline, runs a versioned set of labelled queries (benchmarks/queries/)
+through fan-out search and reports recall@k and MRR together with index
+build time and embedding / search / fusion / end-to-end latency
+percentiles. --json writes the results; --baseline prints the change
+against an earlier --json file (only if both used the same query set).
+
+Usage:
+  python benchmarks/bench_retrieval.py [--k 5] [--repeat 3] [--json results.json]
+  python benchmarks/bench_retrieval.py --baseline results-1.2.json
+"""
+import sys
+import os
+import time
+import json
+import asyncio
+import argparse
+import platform
+from datetime import datetime, timezone
+import numpy as np
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.rag.embedding_service import EmbeddingService
+from services.rag.retrieval_service import RetrievalService, FUSION_METHODS, build_filter
+from services.rag.inference_executor import InferenceExecutor
+from services.rag.indexing_pipeline import IndexingPipeline
+from config.rag_config import (
+    DATA_DIR, RAG_SOURCES, RAG_COLLECTION_PREFIX, RAG_FILTER_FIELDS,
+    EMBEDDING_MODEL, EMBEDDING_BACKEND, ONNX_MODEL_DIR, ONNX_QUANTIZED, INDEX_BATCH_SIZE
+)
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries", "rag_relevance_v1.json")
+
+def _matches(payload, collection, criterion):
+    for field, expected in criterion.items():
+        actual = collection if field == "collection" else payload.get(field)
+        if isinstance(expected, str) and isinstance(actual, str):
+            if actual.lower() != expected.lower():
+                return False
+        elif actual != expected:
+            return False
+    return True
+
+def is_relevant(payload, collection, labels):
+    return any(_matches(payload, collection, criterion) for criterion in labels)
+
+def build_index(retrieval, executor, processes):
+    """Index every RAG source into its collection; returns (seconds, documents per collection)"""
+    sources = {}
+    for source, spec in RAG_SOURCES.items():
+        name = RAG_COLLECTION_PREFIX + source
+        retrieval.configure_collection(name, **{k: v for k, v in spec.items() if k not in ("files", "quota")})
+        retrieval.reset_collection(name)
+        sources[name] = [os.path.join(DATA_DIR, file_name) for file_name in spec["files"]]
+
+    pipeline = IndexingPipeline(retrieval, executor, processes=processes, batch_size=INDEX_BATCH_SIZE)
+    start = time.perf_counter()
+    asyncio.run(pipeline.run(sources))
+    elapsed = time.perf_counter() - start
+    return elapsed, {name: retrieval._keyword_index(name).next_id for name in sources}
+
+def payloads(retrieval, collection_name):
+    """Text and metadata of every document in the collection"""
+    ids = range(retrieval._keyword_index(collection_name).next_id)
+    return list(retrieval._row_store(collection_name).get(ids).values())
+
+def count_relevant(corpus, labels):
+    """Relevant documents in the whole index, so recall is bounded by what exists"""
+    return sum(
+        is_relevant(payload, name[len(RAG_COLLECTION_PREFIX):], labels)
+        for name, collection_payloads in corpus.items()
+        for payload in collection_payloads
+    )
+
+def timed_stages(retrieval, query, filters, quotas, k, fusion):
+    """Per-stage wall times (ms) of one fan-out search, run stage by stage without the executor"""
+    candidates = max(k * 4, 20)
+    timings = {}
+
+    start = time.perf_counter()
+    query_vector = retrieval.embedding_service.get_query_embedding(query)
+    timings["embedding"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    query_filter = build_filter(filters)
+    hits = {}
+    for name in quotas:
+        allowed = retrieval.filter_mask(name, query_filter) if query_filter is not None else None
+        hits[name] = (
+            retrieval.semantic_search(query_vector, name, candidates, query_filter),
+            retrieval.keyword_search(query, name, candidates, allowed)
+        )
+    timings["search"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ranked = {
+        name: sorted(FUSION_METHODS[fusion](semantic, keyword).items(), key=lambda item: item[1], reverse=True)[:k]
+        for name, (semantic, keyword) in hits.items()
+    }
+    timings["fusion"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name, top in ranked.items():
+        retrieval._fetch_results(top, name)
+    timings["fetch"] = time.perf_counter() - start
+    return {stage: seconds * 1000 for stage, seconds in timings.items()}
+
+async def run_queries(retrieval, queries, quotas, k, fusion, repeat):
+    results = []
+    for item in queries:
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits = await retrieval.fanout_search(item["query"], quotas, limit=k, fusion=fusion, filters=item.get("filters"))
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append((hits, latencies))
+    return results
+
+def percentiles(values):
+    return {f"p{p}": round(float(np.percentile(values, p)), 3) for p in (50, 95, 99)}
+
+def evaluate(retrieval, query_set, k, fusion, repeat):
+    quotas = {RAG_COLLECTION_PREFIX + source: spec["quota"] for source, spec in RAG_SOURCES.items()}
+    corpus = {name: payloads(retrieval, name) for name in quotas}
+    queries = query_set["queries"]
+
+    stages = {"embedding": [], "search": [], "fusion": [], "fetch": []}
+    for item in queries:
+        for _ in range(repeat):
+            for stage, ms in timed_stages(retrieval, item["query"], item.get("filters"), quotas, k, fusion).items():
+                stages[stage].append(ms)
+
+    per_query, recalls, reciprocal_ranks, end_to_end = [], [], [], []
+    for item, (hits, latencies) in zip(queries, asyncio.run(run_queries(retrieval, queries, quotas, k, fusion, repeat))):
+        flags = [is_relevant(hit, hit["collection"][len(RAG_COLLECTION_PREFIX):], item["relevant"]) for hit in hits[:k]]
+        total = count_relevant(corpus, item["relevant"])
+        recall = sum(flags) / min(total, k) if total else 0.0
+        reciprocal_rank = next((1 / (rank + 1) for rank, flag in enumerate(flags) if flag), 0.0)
+        recalls.append(recall)
+        reciprocal_ranks.append(reciprocal_rank)
+        end_to_end.extend(latencies)
+        per_query.append({
+            "id": item["id"],
+            "relevant_in_index": total,
+            "recall": round(recall, 4),
+            "reciprocal_rank": round(reciprocal_rank, 4),
+            "p50_ms": round(float(np.median(latencies)), 3),
+        })
+
+    latency = {stage: percentiles(values) for stage, values in stages.items()}
+    latency["end_to_end"] = percentiles(end_to_end)
+    metrics = {f"recall@{k}": round(float(np.mean(recalls)), 4), "mrr": round(float(np.mean(reciprocal_ranks)), 4)}
+    return metrics, latency, per_query
+
+def compare(results, baseline):
+    if baseline["query_set"]["version"] != results["query_set"]["version"]:
+        print(f"baseline used query set v{baseline['query_set']['version']}, not comparable")
+        return
+    print(f"\nchange vs baseline ({baseline['timestamp']}):")
+    for name, value in results["metrics"].items():
+        if name in baseline["metrics"]:
+            print(f"  {name:<16} {baseline['metrics'][name]:.4f} -> {value:.4f} ({value - baseline['metrics'][name]:+.4f})")
+    old, new = baseline["build"]["seconds"], results["build"]["seconds"]
+    print(f"  {'build_seconds':<16} {old:.2f} -> {new:.2f} ({(new - old) / old:+.1%})")
+    for stage, values in results["latency_ms"].items():
+        if stage in baseline["latency_ms"]:
+            old, new = baseline["latency_ms"][stage]["p50"], values["p50"]
+            print(f"  {stage + ' p50':<16} {old:.2f} -> {new:.2f}ms ({(new - old) / old:+.1%})" if old else f"  {stage + ' p50':<16} {new:.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="labelled query set (JSON)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--fusion", choices=list(FUSION_METHODS), default="rrf")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per query")
+    parser.add_argument("--processes", type=int, default=None, help="indexing parser processes")
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, help="embedding backend (torch / onnx)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="earlier --json results to compare against")
+    args = parser.parse_args()
+
+    with open(args.queries) as f:
+        query_set = json.load(f)
+
+    embedding_service = EmbeddingService(
+        model_name=EMBEDDING_MODEL,
+        backend=args.backend,
+        onnx_model_dir=ONNX_MODEL_DIR,
+        onnx_quantized=ONNX_QUANTIZED
+    )
+    executor = InferenceExecutor()
+    retrieval = RetrievalService(embedding_service, executor=executor, filter_fields=RAG_FILTER_FIELDS)
+    try:
+        build_seconds, documents = build_index(retrieval, executor, args.processes)
+        print(f"Indexed {sum(documents.values())} documents in {build_seconds:.2f}s: {documents}")
+        metrics, latency, per_query = evaluate(retrieval, query_set, args.k, args.fusion, args.repeat)
+    finally:
+        executor.shutdown()
+
+    print(f"query set v{query_set['version']}: {len(per_query)} queries, k={args.k}, fusion={args.fusion}")
+    for item in per_query:
+        print(f"  {item['id']:<34} recall={item['recall']:.2f}  RR={item['reciprocal_rank']:.2f}  ({item['relevant_in_index']} relevant)")
+    print("  " + "  ".join(f"{name}={value:.3f}" for name, value in metrics.items()))
+    print(f"{'stage':<12} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8}")
+    for stage, values in latency.items():
+        print(f"{stage:<12} {values['p50']:>8.2f} {values['p95']:>8.2f} {values['p99']:>8.2f}")
+
+    results = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "query_set": {"path": os.path.relpath(args.queries, backend_dir), "version": query_set["version"]},
+        "config": {
+            "k": args.k,
+            "fusion": args.fusion,
+            "repeat": args.repeat,
+            "embedding_model": EMBEDDING_MODEL,
+            "embedding_backend": args.backend,
+            "sources": {source: {k: v for k, v in spec.items() if k != "files"} for source, spec in RAG_SOURCES.items()},
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+        },
+        "build": {"seconds": round(build_seconds, 3), "documents": documents},
+        "metrics": metrics,
+        "latency_ms": latency,
+        "queries": per_query,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Sweep Qdrant vector index settings (HNSW m / ef_construct / query ef, int8
+scalar quantization, on-disk vectors) and report recall@k against exact
+search, query latency, build time and estimated RAM.
+
+Needs a Qdrant server for meaningful numbers (local mode always searches
+exhaustively): docker run -p 6333:6333 qdrant/qdrant
+
+Usage:
+  python benchmarks/sweep_ann.py --url http://localhost:6333 --synthetic 1000000
+  python benchmarks/sweep_ann.py --url http://localhost:6333 --vectors embeddings.npy \\
+      --m 8 16 32 --ef-construct 64 128 --ef 32 64 128 256 --quantization none int8 --on-disk
+"""
+import sys
+import os
+import time
+import json
+import argparse
+import itertools
+import numpy as np
+from qdrant_client import QdrantClient
+
+# Add the backend directory to Python path
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.rag.retrieval_service import collection_config, search_params
+
+COLLECTION = "ann_sweep"
+
+def synthetic_vectors(n, dim, clusters=256, seed=0):
+    """Clustered unit vectors, closer to real embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def make_queries(vectors, count, seed=1):
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.choice(len(vectors), count, replace=False)]
+    queries = picks + 0.1 * rng.standard_normal(picks.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def exact_top_k(vectors, queries, k, block=65536):
+    """Exact cosine top-k ids per query (vectors are unit length)"""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, len(vectors), block):
+        scores = queries @ vectors[start:start + block].T
+        ids = np.arange(start, start + scores.shape[1])
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate([best_ids, np.broadcast_to(ids, scores.shape)], axis=1)
+        top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_ids = np.take_along_axis(merged_ids, top, axis=1)
+    return [set(row) for row in best_ids]
+
+def estimated_ram_mb(n, dim, params):
+    """Rough resident size: float32 vectors unless on disk, int8 copies, level-0 HNSW links"""
+    ram = 0 if params.get("on_disk") else n * dim * 4
+    if params.get("quantization") == "int8" and params.get("always_ram", True):
+        ram += n * dim
+    if not params.get("hnsw_on_disk"):
+        ram += n * (params.get("hnsw_m") or 16) * 2 * 4
+    return ram / 2**20
+
+def build(client, vectors, params, batch_size=1024):
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(COLLECTION, **collection_config(vectors.shape[1], params))
+    start = time.perf_counter()
+    client.upload_collection(COLLECTION, vectors=vectors, ids=range(len(vectors)), batch_size=batch_size, parallel=2)
+    # Wait until the optimizer has built the index
+    while client.get_collection(COLLECTION).status.value != "green":
+        time.sleep(0.5)
+    return time.perf_counter() - start
+
+def measure(client, queries, truth, k, params):
+    latencies, recalls = [], []
+    query_params = search_params(params)
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = client.search(COLLECTION, query_vector=query.tolist(), limit=k, search_params=query_params, with_payload=False)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(expected & {hit.id for hit in hits}) / k)
+    latencies = np.array(latencies) * 1000
+    return {
+        "recall": float(np.mean(recalls)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="Qdrant server URL (default: in-process local mode)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--vectors", help=".npy file of embeddings (rows are L2-normalized here)")
+    source.add_argument("--synthetic", type=int, default=200_000, help="number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-construct", type=int, nargs="+", default=[100])
+    parser.add_argument("--ef", type=int, nargs="+", default=[32, 64, 128, 256])
+    parser.add_argument("--quantization", nargs="+", default=["none", "int8"])
+    parser.add_argument("--oversampling", type=float, default=2.0)
+    parser.add_argument("--on-disk", action="store_true", help="also try memory-mapped float32 vectors")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if args.vectors:
+        vectors = np.load(args.vectors, mmap_mode="r").astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    else:
+        vectors = synthetic_vectors(args.synthetic, args.dim)
+    queries = make_queries(vectors, args.queries)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+
+    start = time.perf_counter()
+    truth = exact_top_k(vectors, queries, args.k)
+    print(f"exact ground truth in {time.perf_counter() - start:.1f}s")
+
+    if args.url:
+        client = QdrantClient(url=args.url, timeout=600)
+    else:
+        print("warning: local mode searches exhaustively; pass --url for HNSW/quantization numbers")
+        client = QdrantClient(":memory:")
+
+    results = []
+    on_disk_options = [False, True] if args.on_disk else [False]
+    header = f"{'m':>4} {'ef_c':>5} {'quant':>5} {'disk':>5} {'build_s':>8} {'ram_mb':>8} {'ef':>5} {'recall':>7} {'p50_ms':>7} {'p95_ms':>7}"
+    print(header)
+    for m, ef_construct, quantization, on_disk in itertools.product(args.m, args.ef_construct, args.quantization, on_disk_options):
+        params = {
+            "hnsw_m": m,
+            "hnsw_ef_construct": ef_construct,
+            "on_disk": on_disk,
+            "quantization": None if quantization == "none" else quantization,
+            "oversampling": args.oversampling,
+        }
+        build_seconds = build(client, vectors, params)
+        ram_mb = estimated_ram_mb(len(vectors), vectors.shape[1], params)
+        for ef in args.ef:
+            stats = measure(client, queries, truth, args.k, {**params, "search_ef": ef})
+            results.append({**params, "search_ef": ef, "build_seconds": build_seconds, "est_ram_mb": ram_mb, **stats})
+            print(f"{m:>4} {ef_construct:>5} {quantization:>5} {str(on_disk):>5} {build_seconds:>8.1f} {ram_mb:>8.0f} "
+                  f"{ef:>5} {stats['recall']:>7.3f} {stats['p50_ms']:>7.2f} {stats['p95_ms']:>7.2f}")
+
+    client.delete_collection(COLLECTION)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"vectors": len(vectors), "dim": int(vectors.shape[1]), "k": args.k, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
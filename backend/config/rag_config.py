@@ -0,0 +1,122 @@
+"""
+Configuration settings for the RAG pipeline
+"""
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BACKEND_DIR, 'data')
+
+# Knowledge base sources. Each source is its own collection (prefix + name),
+# indexed and reindexed independently, with its own HNSW settings; queries
+# fan out to all sources and take at most `quota` results from each before
+# filling the remaining slots best-first.
+#
+# Vector settings (see RetrievalService.configure_collection): hnsw_m,
+# hnsw_ef_construct, search_ef, on_disk / hnsw_on_disk (memory-mapped vectors
+# and graph) and quantization ("int8" scalar quantization, rescored with
+# `oversampling`). Graph, quantization and on-disk settings only take effect
+# on a Qdrant server (QDRANT_URL); tune them with benchmarks/sweep_ann.py.
+RAG_COLLECTION_PREFIX = "real_estate_"
+RAG_SOURCES = {
+    'listings': {
+        'files': ['bayut_listings_enriched.csv'],
+        'quota': 3,
+        'hnsw_m': 16, 'hnsw_ef_construct': 128, 'search_ef': 128,
+        'quantization': 'int8', 'oversampling': 2.0,
+    },
+    'area_stats': {
+        'files': ['area_stats.csv'],
+        'quota': 2,
+        'hnsw_m': 8, 'hnsw_ef_construct': 64, 'search_ef': 64,
+    },
+    'history': {
+        'files': ['historical_data.csv'],
+        'quota': 2,
+        'hnsw_m': 8, 'hnsw_ef_construct': 64, 'search_ef': 64,
+        # Grows without bound with rent history: keep float32 vectors on disk
+        'quantization': 'int8', 'oversampling': 2.0, 'on_disk': True,
+    },
+    'web_pages': {
+        'files': ['page_1_bs4.html', 'page_2_bs4.html'],
+        'quota': 2,
+        'hnsw_m': 16, 'hnsw_ef_construct': 100, 'search_ef': 96,
+    },
+}
+INDEX_BATCH_SIZE = 256  # documents embedded per batch; progress is reported per batch
+INDEX_PROCESSES = None  # parser processes for indexing; None: one per core
+INDEX_MAX_PENDING = None  # parse tasks in flight; None: 2 per process
+# Reindexing builds a new version of a collection and swaps its alias once
+# complete; this many superseded versions are kept (in-flight searches may
+# still be reading the last one) before being dropped
+INDEX_KEEP_VERSIONS = 1
+
+# Offline index artifacts (python -m services.rag.build_index): the server
+# memory-maps the artifact named by INDEX_ARTIFACT_DIR/CURRENT instead of
+# indexing on startup, if there is one built with the same embedding model
+# and chunking. Sources whose data files changed since the build are indexed
+# on startup instead.
+INDEX_ARTIFACT_DIR = os.getenv("RAG_INDEX_ARTIFACT_DIR", os.path.join(BACKEND_DIR, 'indexes'))
+INDEX_ARTIFACT_KEEP = 3  # artifacts kept by the build CLI, including the current one
+
+# CSV ingestion: rows read per pandas chunk, and the columns kept as document
+# metadata (the full row is still rendered into the document text)
+CSV_READ_CHUNK_ROWS = 50_000
+CSV_METADATA_COLUMNS = [
+    'neighborhood', 'location', 'property_type', 'bedrooms', 'bathrooms',
+    'area_sqft', 'current_rent', 'annual_rent', 'avg_price', 'price_per_sqft',
+    'furnishing', 'url', 'date', 'listing_date',
+]
+
+# Qdrant server URL; unset runs Qdrant in-process and in memory
+QDRANT_URL = os.getenv("QDRANT_URL")
+
+# Payload fields indexed in Qdrant for filtered search, with their index type
+RAG_FILTER_FIELDS = {
+    'neighborhood': 'keyword',
+    'property_type': 'keyword',
+    'furnishing': 'keyword',
+    'bedrooms': 'integer',
+    'bathrooms': 'integer',
+    'current_rent': 'float',
+    'area_sqft': 'float',
+}
+
+# Embedding model and its on-disk cache, keyed by (model name, text hash)
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_CACHE_DIR = os.path.join(BACKEND_DIR, 'cache', 'embeddings')
+EMBEDDING_CACHE_DTYPE = "float16"  # float16 halves the cache size; use float32 for exact vectors
+# Search queries are not written to that cache; recent ones are kept in memory instead
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+
+# Embedding backend: "torch" (sentence-transformers) or "onnx" (onnxruntime, CPU).
+# Export the ONNX model once with: python -m services.rag.embedding_backends
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.path.join(BACKEND_DIR, 'models', 'all-MiniLM-L6-v2-onnx')
+ONNX_QUANTIZED = True  # int8 dynamic quantization
+
+# Query embedding micro-batching across concurrent /rag/query calls
+QUERY_BATCH_MAX_SIZE = 32
+QUERY_BATCH_MAX_WAIT_MS = 5.0
+
+# Dedicated executor for embedding and index search, off the event loop
+INFERENCE_WORKERS = 2
+INFERENCE_INTRA_OP_THREADS = None  # None: cpu_count // INFERENCE_WORKERS
+
+# Query caches: retrieval results (query + filters + index version) and final
+# answers (query + context fingerprint + model); both drop everything when
+# the index changes
+RETRIEVAL_CACHE_SIZE = 1024
+RETRIEVAL_CACHE_TTL = 600  # seconds
+ANSWER_CACHE_SIZE = 256
+ANSWER_CACHE_TTL = 3600  # seconds
+
+# Prompt context packing: token budget for retrieved documents per generation
+# model ("default" for unlisted ones) and the word 3-gram Jaccard similarity
+# at which a document counts as a near-duplicate of one already packed
+CONTEXT_TOKEN_BUDGETS = {
+    'mistral:7b-instruct': 2048,
+    'mistral:instruct': 2048,
+    'llama2:latest': 1536,
+    'default': 1536,
+}
+CONTEXT_DEDUP_THRESHOLD = 0.9
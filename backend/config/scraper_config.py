@@ -0,0 +1,58 @@
+"""
+Configuration settings for the property listing scrapers
+"""
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BACKEND_DIR, 'data')
+
+# Page fetching (services/scraping/async_fetcher.py). At most
+# SCRAPER_CONCURRENCY requests are in flight at once over one pooled client,
+# and each host gets a token bucket refilled at SCRAPER_HOST_RATE requests
+# per second that allows bursts of SCRAPER_HOST_BURST, so a crawl stays
+# about as polite as the old 2-4 s sleep between pages without waiting on
+# one page before requesting the next.
+SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "4"))
+SCRAPER_HOST_RATE = float(os.getenv("SCRAPER_HOST_RATE", "0.5"))
+SCRAPER_HOST_BURST = int(os.getenv("SCRAPER_HOST_BURST", "2"))
+SCRAPER_TIMEOUT = 30.0
+
+# Timeouts, connection errors, 429 and 5xx responses are retried with
+# exponential backoff (base * 2^attempt, jittered), or after Retry-After
+# when the server sends one, capped at SCRAPER_MAX_BACKOFF seconds
+SCRAPER_MAX_RETRIES = 3
+SCRAPER_BACKOFF_BASE = 2.0
+SCRAPER_MAX_BACKOFF = 60.0
+
+# Crawl pipeline (services/scraping/crawl_pipeline.py): fetched pages are
+# queued for parsing in worker processes while the next pages download. At
+# most SCRAPER_MAX_PENDING_PAGES fetched pages wait for a parser; fetching
+# pauses when the queue is full.
+SCRAPER_PARSE_PROCESSES = None  # None: one per core (never more than pages)
+SCRAPER_MAX_PENDING_PAGES = None  # None: 2 per parse process
+
+# HTTP response cache (services/scraping/response_cache.py): ETag,
+# Last-Modified, a hash of the body and the parsed listings per page URL.
+# Pages cached less than SCRAPER_CACHE_TTL seconds ago are not requested at
+# all; older ones are revalidated with a conditional request, and a 304 or an
+# unchanged body reuses the cached listings without parsing. Set
+# SCRAPER_CACHE_DIR to an empty string to disable the cache.
+SCRAPER_CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR", os.path.join(BACKEND_DIR, 'cache', 'http')) or None
+SCRAPER_CACHE_TTL = int(os.getenv("SCRAPER_CACHE_TTL", str(15 * 60)))
+
+# Raw page archive (services/scraping/page_archive.py): every crawled page
+# is stored zstd-compressed under its content hash, so unchanged pages are
+# stored once, with a manifest per run listing its pages. The newest
+# SCRAPER_ARCHIVE_KEEP_RUNS runs per source are kept (0 keeps all); pages no
+# kept run refers to are deleted. Set SCRAPER_ARCHIVE_DIR to an empty string
+# to disable the archive.
+SCRAPER_ARCHIVE_DIR = os.getenv("SCRAPER_ARCHIVE_DIR", os.path.join(BACKEND_DIR, 'archive', 'pages')) or None
+SCRAPER_ARCHIVE_KEEP_RUNS = int(os.getenv("SCRAPER_ARCHIVE_KEEP_RUNS", "30"))
+SCRAPER_ARCHIVE_LEVEL = 10  # zstd compression level
+
+# HTML parsing (services/scraping/html_parser.py): the BeautifulSoup tree
+# builder ("lxml" is a C parser several times faster than the pure Python
+# "html.parser", which is used if lxml is not installed), and whether to
+# build only the subtrees the card selectors can match instead of the page
+SCRAPER_HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER", "lxml")
+SCRAPER_TARGETED_PARSE = os.getenv("SCRAPER_TARGETED_PARSE", "1") == "1"
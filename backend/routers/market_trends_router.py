@@ -1,4 +1,5 @@
 import re
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Any, List, Dict, Optional
@@ -482,8 +483,9 @@ async def crawl_property_listings(max_pages: int = 2):
     try:
         logger.info(f"Starting Bayut property data crawl for {max_pages} pages")
         
-        # Call the fetch_from_bayut function
-        df = fetch_from_bayut(max_pages=max_pages)
+        # fetch_from_bayut runs its own event loop for the page fetches, so it
+        # runs in a worker thread rather than blocking this one
+        df = await asyncio.to_thread(fetch_from_bayut, max_pages)
         
         if df.empty:
             logger.warning("No data was scraped from Bayut")
@@ -1,60 +1,179 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from services.rag_service import RAGService
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Initialize RAG service (cheap; models load and data is indexed in the background)
+rag_service = RAGService()
+
+@asynccontextmanager
+async def lifespan(app):
+    """Start RAG initialization in the background so the API serves immediately"""
+    rag_service.loop_lag_monitor.start()
+    rag_service.start_background_initialization()
+    yield
+    await rag_service.shutdown()
+
 router = APIRouter(
     prefix="/rag",
-    tags=["RAG"]
+    tags=["RAG"],
+    lifespan=lifespan
 )
 
-# Initialize RAG service
-rag_service = RAGService()
-is_initialized = False
+class QueryFilters(BaseModel):
+    neighborhood: Optional[str] = None
+    property_type: Optional[str] = None
+    furnishing: Optional[str] = None
+    bedrooms: Optional[int] = None
+    min_rent: Optional[float] = None
+    max_rent: Optional[float] = None
+    min_area_sqft: Optional[float] = None
+    max_area_sqft: Optional[float] = None
 
-@router.on_event("startup")
-async def startup_event():
-    """Initialize RAG service on startup"""
-    global is_initialized
-    try:
-        # Process and index data
-        success = await rag_service.process_and_index_data()
-        if not success:
-            logger.error("Failed to initialize RAG service")
-        else:
-            is_initialized = True
-            logger.info("RAG service initialized successfully")
-    except Exception as e:
-        logger.error(f"Error during RAG service initialization: {e}")
+    def to_search_filters(self) -> Dict[str, Any]:
+        """Payload filters in the format RetrievalService.hybrid_search takes"""
+        filters: Dict[str, Any] = {}
+        if self.neighborhood:
+            filters["neighborhood"] = self.neighborhood
+        if self.property_type:
+            filters["property_type"] = self.property_type.lower()
+        if self.furnishing:
+            filters["furnishing"] = self.furnishing.lower()
+        if self.bedrooms is not None:
+            filters["bedrooms"] = self.bedrooms
+        if self.min_rent is not None or self.max_rent is not None:
+            filters["current_rent"] = {"gte": self.min_rent, "lte": self.max_rent}
+        if self.min_area_sqft is not None or self.max_area_sqft is not None:
+            filters["area_sqft"] = {"gte": self.min_area_sqft, "lte": self.max_area_sqft}
+        return filters
 
 class QueryRequest(BaseModel):
     query: str
     max_results: int = 5
+    allow_partial: bool = False  # answer from the documents indexed so far while indexing runs
+    filters: Optional[QueryFilters] = None
+    extract_filters: bool = False  # derive filters from the query text as well
+    sources: Optional[List[str]] = None  # search only these sources (default: all)
 
-@router.post("/query")
-async def query_knowledge_base(request: QueryRequest):
-    """Query the knowledge base using RAG"""
-    global is_initialized
-    
-    if not is_initialized:
+async def run_until_disconnected(http_request: Request, coro, poll_interval: float = 0.1):
+    """Run coro, cancelling it if the client disconnects first"""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected; cancelling RAG query")
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+@router.get("/stats")
+async def rag_stats():
+    """Event-loop lag and query cache effectiveness while serving RAG traffic"""
+    return {
+        "status": "success",
+        "data": {
+            "event_loop_lag": rag_service.loop_lag_monitor.snapshot(),
+            "cache": rag_service.cache_stats()
+        }
+    }
+
+@router.get("/ready")
+async def rag_ready():
+    """Readiness probe: 200 once indexing has finished, 503 with progress before that"""
+    status = rag_service.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content={"status": "initializing", "data": status})
+    return {"status": "ready", "data": status}
+
+@router.post("/sources/{source}/reindex")
+async def reindex_source(source: str):
+    """Rebuild one source's collection (e.g. after its CSV was refreshed)"""
+    if not rag_service.is_ready:
+        raise HTTPException(status_code=503, detail="RAG service is still initializing")
+    try:
+        return {
+            "status": "success",
+            "data": await rag_service.reindex_source(source)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error reindexing {source}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def ensure_queryable(request: QueryRequest):
+    """503 unless the index is complete, or partial and the request allows that"""
+    partial_ok = request.allow_partial and rag_service.has_documents
+    if not (rag_service.is_ready or partial_ok):
         raise HTTPException(
             status_code=503,
             detail="RAG service is not initialized yet. Please try again in a few moments."
         )
+
+def query_arguments(request: QueryRequest) -> Dict[str, Any]:
+    return {
+        "query": request.query,
+        "limit": request.max_results,
+        "filters": request.filters.to_search_filters() if request.filters else None,
+        "extract_filters": request.extract_filters,
+        "sources": request.sources
+    }
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/query/stream")
+async def stream_knowledge_base_query(request: QueryRequest):
+    """Query the knowledge base, streaming the answer as server-sent events
+
+    Events: `sources` (retrieved context, once), `token` (answer fragments),
+    then `done` or `error`. Generation stops if the client disconnects.
+    """
+    ensure_queryable(request)
+    partial = not rag_service.is_ready
+
+    async def events():
+        async for event, data in rag_service.query_stream(**query_arguments(request)):
+            if event == "sources":
+                data = {**data, "partial": partial}
+            yield sse_event(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/query")
+async def query_knowledge_base(request: QueryRequest, http_request: Request):
+    """Query the knowledge base using RAG"""
+    ensure_queryable(request)
     
     try:
-        result = await rag_service.query(
-            query=request.query,
-            limit=request.max_results
+        result = await run_until_disconnected(
+            http_request,
+            rag_service.query(**query_arguments(request))
         )
         
         return {
             "status": "success",
+            "partial": not rag_service.is_ready,
             "data": result
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error querying knowledge base: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
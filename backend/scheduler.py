@@ -3,8 +3,14 @@ import time
 import subprocess
 import logging
 import os
+import requests
 from datetime import datetime
 
+# Running API to notify after a scrape, and the RAG sources the scraper
+# rewrites: its CSVs and the saved result pages (data/page_*_bs4.html)
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+SCRAPER_RAG_SOURCES = ["listings", "area_stats", "history", "web_pages"]
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -38,12 +44,25 @@ def run_scraper():
             
         if result.returncode == 0:
             logger.info("Scraper completed successfully")
+            reindex_rag_sources()
         else:
             logger.error(f"Scraper failed with return code {result.returncode}")
             
     except Exception as e:
         logger.error(f"Error running scraper: {str(e)}")
 
+def reindex_rag_sources():
+    """Ask the API to rebuild the RAG collections backed by the scraped CSVs"""
+    for source in SCRAPER_RAG_SOURCES:
+        try:
+            response = requests.post(f"{API_URL}/rag/sources/{source}/reindex", timeout=600)
+            if response.status_code == 200:
+                logger.info(f"Reindexed RAG source {source}: {response.json()['data']}")
+            else:
+                logger.error(f"Reindexing RAG source {source} failed: {response.status_code} {response.text}")
+        except Exception as e:
+            logger.error(f"Error reindexing RAG source {source}: {str(e)}")
+
 def main():
     """Main function to set up and run the scheduler"""
     try:
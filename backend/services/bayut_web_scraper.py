@@ -1,9 +1,8 @@
-import time
+import sys
 import re
 from datetime import datetime, timedelta
-import random
 import os
-import requests
+import asyncio
 from bs4 import BeautifulSoup
 import pandas as pd
 import numpy as np
@@ -11,9 +10,20 @@ import logging
 import json
 from urllib.parse import urljoin
 from fake_useragent import UserAgent
-from requests.exceptions import RequestException, ConnectionError, Timeout
 from typing import Dict, List, Optional, Union, Any
 
+# Add the backend directory to Python path (when run as a script)
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.scraping.async_fetcher import AsyncFetcher
+from services.scraping.crawl_pipeline import CrawlPipeline
+from services.scraping.response_cache import ResponseCache
+from services.scraping.page_archive import PageArchive
+from services.scraping.html_parser import select_cards
+from config.scraper_config import SCRAPER_CACHE_DIR, SCRAPER_CACHE_TTL, SCRAPER_ARCHIVE_DIR
+
 # Set up logging with more detailed format
 logging.basicConfig(
     level=logging.INFO,
@@ -233,19 +243,97 @@ def extract_from_card_text(card_text):
         "agent_notes": agent_notes
     }
 
-def fetch_with_requests(max_pages=3):
+BAYUT_BASE_URL = "https://www.bayut.com/to-rent/property/dubai/"
+CARD_SELECTORS = ["article", "div.card", "div._357a9937", "div[data-testid*='property-card']"]
+
+def bayut_page_url(page):
+    """URL of a results page (1-based)"""
+    return BAYUT_BASE_URL if page == 1 else f"{BAYUT_BASE_URL}page/{page}/"
+
+def parse_bayut_page(html):
     """
-    Scrape property listings from Bayut using requests and BeautifulSoup.
+    Extract property listings from one Bayut results page.
     
     Args:
-        max_pages: Maximum number of pages to scrape
+        html: Page HTML
     
     Returns:
         List of property data dictionaries
     """
     listings = []
-    base_url = "https://www.bayut.com/to-rent/property/dubai/"
     
+    # Try different selectors to find property cards (only the card subtrees are parsed)
+    selector, property_cards = select_cards(html, CARD_SELECTORS)
+    
+    if not property_cards:
+        logger.warning("Could not find property cards using BeautifulSoup.")
+        return listings
+    logger.info(f"Found {len(property_cards)} property cards using selector: {selector}")
+        
+    # Process each property card
+    for card in property_cards:
+        try:
+            card_text = card.text
+            
+            # Use the extraction function
+            extracted_data = extract_from_card_text(card_text)
+            
+            # URL extraction
+            url_elem = card.select_one("a")
+            property_url = urljoin("https://www.bayut.com", url_elem['href']) if url_elem and 'href' in url_elem.attrs else "N/A"
+            
+            # Calculate derived fields
+            current_rent = extracted_data["current_rent"]
+            location = extracted_data["location"]
+            
+            previous_rent = current_rent * 0.95 if current_rent else None
+            annual_rent = current_rent * 12 if current_rent else None
+            neighborhood = extract_neighborhood(location)
+            building = extract_building_name(extracted_data["title"], location)
+            
+            # Create the listing dictionary
+            listing = {
+                "title": extracted_data["title"],
+                "property_type": extracted_data["property_type"],
+                "bedrooms": extracted_data["bedrooms"],
+                "bathrooms": extracted_data["bathrooms"],
+                "area_sqft": extracted_data["area_sqft"],
+                "location": location,
+                "neighborhood": neighborhood,
+                "building": building,
+                "current_rent": current_rent,
+                "previous_rent": previous_rent,
+                "annual_rent": annual_rent,
+                "url": property_url,
+                "furnishing": extracted_data["furnishing"],
+                "listing_date": extracted_data["listing_date"],
+                "agent_notes": extracted_data["agent_notes"],
+                "scraped_date": datetime.now().strftime("%Y-%m-%d")
+            }
+            
+            listings.append(listing)
+            logger.info(f"Scraped: {extracted_data['title'][:40]}... - {current_rent} AED - {location[:30]}...")
+            
+        except Exception as e:
+            logger.error(f"Error extracting data from a property card: {str(e)}")
+            continue
+    
+    return listings
+
+async def crawl_bayut(max_pages=3):
+    """
+    Fetch Bayut result pages concurrently and parse them in worker processes.
+    
+    Pages go through one pooled client with a bounded number of requests in
+    flight and a per-host rate limit (see config/scraper_config.py), and each
+    page is parsed in a process pool while the next ones download.
+    
+    Args:
+        max_pages: Maximum number of pages to scrape
+    
+    Returns:
+        List of property data dictionaries, in page order
+    """
     # Generate a random user agent
     ua = UserAgent()
     headers = {
@@ -257,101 +345,61 @@ def fetch_with_requests(max_pages=3):
         'Cache-Control': 'max-age=0'
     }
     
-    logger.info(f"[{datetime.now()}] Starting to scrape Bayut with requests/BeautifulSoup...")
+    logger.info(f"[{datetime.now()}] Starting to scrape Bayut with httpx/BeautifulSoup...")
     
-    for page in range(1, max_pages + 1):
-        try:
-            # Format URL correctly
-            url = base_url if page == 1 else f"{base_url}page/{page}/"
-            logger.info(f"[{datetime.now()}] Scraping page {page}: {url}")
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Create data directory if it doesn't exist
-            data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
-            os.makedirs(data_dir, exist_ok=True)
-            
-            # Save HTML for debugging
-            debug_file = os.path.join(data_dir, f'page_{page}_bs4.html')
-            with open(debug_file, "w", encoding="utf-8") as f:
-                f.write(response.text)
-            
-            # Try different selectors to find property cards
-            property_cards = []
-            for selector in ["article", "div.card", "div._357a9937", "div[data-testid*='property-card']"]:
-                cards = soup.select(selector)
-                if cards:
-                    property_cards = cards
-                    logger.info(f"Found {len(cards)} property cards using selector: {selector}")
-                    break
-            
-            if not property_cards:
-                logger.warning("Could not find property cards using BeautifulSoup.")
-                continue
-                
-            # Process each property card
-            for card in property_cards:
-                try:
-                    card_text = card.text
-                    
-                    # Use the extraction function
-                    extracted_data = extract_from_card_text(card_text)
-                    
-                    # URL extraction
-                    url_elem = card.select_one("a")
-                    property_url = urljoin("https://www.bayut.com", url_elem['href']) if url_elem and 'href' in url_elem.attrs else "N/A"
-                    
-                    # Calculate derived fields
-                    current_rent = extracted_data["current_rent"]
-                    location = extracted_data["location"]
-                    
-                    previous_rent = current_rent * 0.95 if current_rent else None
-                    annual_rent = current_rent * 12 if current_rent else None
-                    neighborhood = extract_neighborhood(location)
-                    building = extract_building_name(extracted_data["title"], location)
-                    
-                    # Create the listing dictionary
-                    listing = {
-                        "title": extracted_data["title"],
-                        "property_type": extracted_data["property_type"],
-                        "bedrooms": extracted_data["bedrooms"],
-                        "bathrooms": extracted_data["bathrooms"],
-                        "area_sqft": extracted_data["area_sqft"],
-                        "location": location,
-                        "neighborhood": neighborhood,
-                        "building": building,
-                        "current_rent": current_rent,
-                        "previous_rent": previous_rent,
-                        "annual_rent": annual_rent,
-                        "url": property_url,
-                        "furnishing": extracted_data["furnishing"],
-                        "listing_date": extracted_data["listing_date"],
-                        "agent_notes": extracted_data["agent_notes"],
-                        "scraped_date": datetime.now().strftime("%Y-%m-%d")
-                    }
-                    
-                    listings.append(listing)
-                    logger.info(f"Scraped: {extracted_data['title'][:40]}... - {current_rent} AED - {location[:30]}...")
-                    
-                except Exception as e:
-                    logger.error(f"Error extracting data from a property card: {str(e)}")
-                    continue
-            
-            # Add a small delay between pages
-            time.sleep(random.uniform(2, 4))
-            
-        except RequestException as e:
-            logger.error(f"Network error scraping page {page}: {str(e)}")
-            continue
-        except Exception as e:
-            logger.error(f"Error scraping page {page}: {str(e)}")
-            continue
+    # Create data directory if it doesn't exist
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    
+    def write_page(path, html):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+    
+    page_writes = []
+    
+    def save_page(index, url, response):
+        # Save HTML for debugging and the web_pages RAG source, off the event loop
+        logger.info(f"[{datetime.now()}] Scraped page {index + 1}: {url}")
+        debug_file = os.path.join(data_dir, f'page_{index + 1}_bs4.html')
+        page_writes.append(asyncio.create_task(asyncio.to_thread(write_page, debug_file, response.text)))
     
+    cache = ResponseCache(SCRAPER_CACHE_DIR, SCRAPER_CACHE_TTL, namespace="bayut") if SCRAPER_CACHE_DIR else None
+    archive = PageArchive().start_run("bayut", parse_bayut_page, parser="services.bayut_web_scraper:parse_bayut_page") if SCRAPER_ARCHIVE_DIR else None
+    urls = [bayut_page_url(page) for page in range(1, max_pages + 1)]
+    pages = {}
+    try:
+        async with AsyncFetcher(headers=headers) as fetcher:
+            pipeline = CrawlPipeline(fetcher, parse_bayut_page, on_page=save_page, cache=cache, archive=archive)
+            async for index, page_listings in pipeline.run(urls):
+                pages[index] = page_listings
+    finally:
+        await asyncio.gather(*page_writes)
+        if archive is not None:
+            # Waits for the archive writer thread; keep the event loop free meanwhile
+            await asyncio.to_thread(archive.close)
+    
+    listings = [listing for index in sorted(pages) for listing in pages[index]]
+    # Listings reused from the response cache carry the date they were first parsed
+    today = datetime.now().strftime("%Y-%m-%d")
+    for listing in listings:
+        listing["scraped_date"] = today
     return listings
 
+def fetch_with_requests(max_pages=3):
+    """
+    Scrape property listings from Bayut (blocking wrapper around crawl_bayut).
+    
+    Call from synchronous code only; inside an event loop use
+    `await crawl_bayut(...)` or run this in a thread.
+    
+    Args:
+        max_pages: Maximum number of pages to scrape
+    
+    Returns:
+        List of property data dictionaries
+    """
+    return asyncio.run(crawl_bayut(max_pages))
+
 def load_historical_data():
     """Load historical property data from file or create empty structure if not available"""
     try:
@@ -1,8 +1,9 @@
-import time
+import sys
 import re
 from datetime import datetime
 import random
 import os
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
@@ -13,6 +14,18 @@ from fake_useragent import UserAgent
 from requests.exceptions import RequestException, ConnectionError, Timeout
 from typing import Dict, List, Optional, Union, Any
 
+# Add the backend directory to Python path (when run as a script)
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.scraping.async_fetcher import AsyncFetcher
+from services.scraping.crawl_pipeline import CrawlPipeline
+from services.scraping.response_cache import ResponseCache
+from services.scraping.page_archive import PageArchive
+from services.scraping.html_parser import select_cards
+from config.scraper_config import SCRAPER_CACHE_DIR, SCRAPER_CACHE_TTL, SCRAPER_ARCHIVE_DIR
+
 # Set up logging with more detailed format
 logging.basicConfig(
     level=logging.INFO,  # Change to DEBUG level
@@ -575,6 +588,84 @@ def extract_from_property_card(card):
         logger.debug(f"Card HTML: {card}")
         return None
 
+PF_BASE_URL = "https://www.propertyfinder.ae/en/rent/properties-for-rent.html"
+CARD_SELECTORS = [
+    "[data-testid*='property-card']",
+    "div.card", "article", "div[class*='property']", "div[class*='card']", 
+    "div[class*='listing']", "div[class*='result']", 
+    # Add more potential selectors here
+]
+
+def propertyfinder_page_url(page):
+    """URL of a results page (1-based)"""
+    return PF_BASE_URL if page == 1 else f"{PF_BASE_URL}?page={page}"
+
+def parse_propertyfinder_page(html):
+    """
+    Extract property listings from one PropertyFinder results page.
+    
+    Args:
+        html: Page HTML
+    
+    Returns:
+        List of property data dictionaries
+    """
+    listings = []
+    
+    # Find property cards: the primary selector first, then selectors that might
+    # contain property information (only the card subtrees are parsed)
+    selector, property_cards = select_cards(html, CARD_SELECTORS)
+    if property_cards and selector != CARD_SELECTORS[0]:
+        logger.warning("Could not find property cards using primary selector.")
+        logger.info(f"Found {len(property_cards)} elements using selector: {selector}")
+            
+    if property_cards:
+        logger.info(f"Found {len(property_cards)} property cards")
+        # Process each property card
+        for card in property_cards:
+            extracted_data = extract_from_property_card(card)
+            if extracted_data:
+                listings.append(extracted_data)
+    else:
+        logger.warning("No property cards found on this page")
+    
+    return listings
+
+async def crawl_propertyfinder(max_pages=3, max_retries=3, proxy=None):
+    """
+    Fetch PropertyFinder result pages concurrently and parse them in worker processes.
+    
+    Args:
+        max_pages: Maximum number of pages to scrape
+        max_retries: Maximum attempts per page
+        proxy: Optional proxy URL for all requests
+    
+    Returns:
+        List of property data dictionaries, in page order
+    """
+    cache = ResponseCache(SCRAPER_CACHE_DIR, SCRAPER_CACHE_TTL, namespace="propertyfinder") if SCRAPER_CACHE_DIR else None
+    archive = PageArchive().start_run("propertyfinder", parse_propertyfinder_page, parser="services.pf_web_scraper:parse_propertyfinder_page") if SCRAPER_ARCHIVE_DIR else None
+    urls = [propertyfinder_page_url(page) for page in range(1, max_pages + 1)]
+    pages = {}
+    # Rotating headers: a fresh set for every attempt
+    try:
+        async with AsyncFetcher(headers=get_random_headers, max_retries=max(max_retries - 1, 0), proxy=proxy) as fetcher:
+            pipeline = CrawlPipeline(fetcher, parse_propertyfinder_page, cache=cache, archive=archive)
+            async for index, page_listings in pipeline.run(urls):
+                logger.info(f"[{datetime.now()}] Scraped page {index + 1}: {urls[index]} ({len(page_listings)} listings)")
+                pages[index] = page_listings
+    finally:
+        if archive is not None:
+            # Waits for the archive writer thread; keep the event loop free meanwhile
+            await asyncio.to_thread(archive.close)
+    
+    listings = [listing for index in sorted(pages) for listing in pages[index]]
+    # Listings reused from the response cache carry the date they were first parsed
+    today = datetime.now().strftime("%Y-%m-%d")
+    for listing in listings:
+        listing["scraped_date"] = today
+    return listings
+
 def fetch_from_propertyfinder(max_pages=3, max_retries=3, use_proxy=False, proxy_list=None):
     """
     Scrape property listings from PropertyFinder with improved methods.
@@ -588,90 +679,21 @@ def fetch_from_propertyfinder(max_pages=3, max_retries=3, use_proxy=False, proxy
     Returns:
         DataFrame containing property data
     """
-    listings = []
-    base_url = "https://www.propertyfinder.ae/en/rent/properties-for-rent.html"
-    
     # Proxy setup
-    proxies = None
+    proxy = None
     if use_proxy and proxy_list:
         # Rotate through proxies
         proxy = random.choice(proxy_list)
-        proxies = {
-            'http': proxy,
-            'https': proxy
-        }
         logger.info(f"Using proxy: {proxy}")
     
-        logger.info(f"[{datetime.now()}] Starting to scrape PropertyFinder using HTML scraping only...")
+    logger.info(f"[{datetime.now()}] Starting to scrape PropertyFinder using HTML scraping only...")
     
     # Create data directory if it doesn't exist
     data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
     os.makedirs(data_dir, exist_ok=True)
     
     try:
-        for page in range(1, max_pages + 1):
-            retries = 0
-            success = False
-            
-            while retries < max_retries and not success:
-                try:
-                    # Format URL correctly for pagination
-                    url = base_url if page == 1 else f"{base_url}?page={page}"
-                    logger.info(f"[{datetime.now()}] Scraping page {page}: {url} (attempt {retries+1}/{max_retries})")
-                    
-                    # Use rotating headers
-                    headers = get_random_headers()
-                    
-                    # Send request with optional proxies
-                    response = requests.get(url, headers=headers, proxies=proxies, timeout=30)
-                    response.raise_for_status()
-                    
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    
-                    # Find property cards
-                    property_cards = soup.select("[data-testid*='property-card']")
-                    if not property_cards:
-                        logger.warning("Could not find property cards using primary selector. Trying alternatives...")
-                        # Try various selectors that might contain property information
-                        selectors_to_try = [
-                            "div.card", "article", "div[class*='property']", "div[class*='card']", 
-                            "div[class*='listing']", "div[class*='result']", 
-                            # Add more potential selectors here
-                        ]
-                        
-                        for selector in selectors_to_try:
-                            property_cards = soup.select(selector)
-                            if property_cards:
-                                logger.info(f"Found {len(property_cards)} elements using selector: {selector}")
-                                break
-                            
-                    if property_cards:
-                        logger.info(f"Found {len(property_cards)} property cards")
-                        # Process each property card
-                        for card in property_cards:
-                            extracted_data = extract_from_property_card(card)
-                            if extracted_data:
-                                listings.append(extracted_data)
-                    else:
-                        logger.warning("No property cards found on this page")
-                    
-                    # If we get here without exceptions, mark as success
-                    success = True
-                    # Add a small delay between pages
-                    time.sleep(random.uniform(2, 4))
-                    
-                except (ConnectionError, Timeout) as e:
-                    # Retry logic remains the same...
-                    retries += 1
-                    logger.warning(f"Network error on page {page}, retry {retries}/{max_retries}: {str(e)}")
-                    time.sleep(random.uniform(5, 10))
-                except RequestException as e:
-                    retries += 1
-                    logger.error(f"Request error on page {page}, retry {retries}/{max_retries}: {str(e)}")
-                    time.sleep(random.uniform(5, 10))
-                except Exception as e:
-                    logger.error(f"Error scraping page {page}: {str(e)}")
-                    break
+        listings = asyncio.run(crawl_propertyfinder(max_pages, max_retries, proxy))
         
         # Create DataFrame from listings
         if not listings:
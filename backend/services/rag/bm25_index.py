@@ -0,0 +1,223 @@
+from typing import List, Dict, Tuple, Iterable, Optional
+from collections import Counter
+from pathlib import Path
+import numpy as np
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BM25Index:
+    """Inverted-index Okapi BM25 over CSR posting lists
+
+    Postings live in a compacted CSR segment (term -> sorted doc slots and term
+    frequencies) plus a small pending segment for documents added since the
+    last compaction. Deletes are tombstones; document frequencies and length
+    norms are refreshed when the index is compacted, which happens
+    automatically once pending postings or tombstones pass a fraction of the
+    index. A query only touches the postings of its own terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, compact_ratio: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+
+        self._vocab: Dict[str, int] = {}
+        self._df = np.zeros(0, dtype=np.int64)
+
+        # Compacted segment
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.int32)
+        self._tfs = np.zeros(0, dtype=np.float32)
+
+        # Pending segment: term id -> [(slot, tf), ...]
+        self._pending: Dict[int, List[Tuple[int, int]]] = {}
+        self._pending_count = 0
+
+        # Per-slot document data; slots are dense internal ids
+        self._doc_ids = np.zeros(0, dtype=np.int64)
+        self._doc_len = np.zeros(0, dtype=np.float32)
+        self._live = np.zeros(0, dtype=bool)
+        self._slots: Dict[int, int] = {}
+        # High-water mark of external ids; survives compaction, so deleted ids are never handed out again
+        self._next_id = 0
+
+        self._norms = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def next_id(self) -> int:
+        """Smallest external id greater than every id ever added"""
+        return self._next_id
+
+    def add(self, doc_ids: Iterable[int], token_lists: Iterable[List[str]]):
+        """Add (or replace) documents given their external ids and tokens"""
+        doc_ids = [int(doc_id) for doc_id in doc_ids]
+        self.delete([doc_id for doc_id in doc_ids if doc_id in self._slots])
+
+        first_slot = len(self._doc_ids)
+        lengths = []
+        new_terms = []
+        for offset, (doc_id, tokens) in enumerate(zip(doc_ids, token_lists)):
+            slot = first_slot + offset
+            for term, tf in Counter(tokens).items():
+                term_id = self._vocab.setdefault(term, len(self._vocab))
+                self._pending.setdefault(term_id, []).append((slot, tf))
+                new_terms.append(term_id)
+            self._slots[doc_id] = slot
+            lengths.append(len(tokens))
+        self._pending_count += len(new_terms)
+
+        self._df = np.concatenate([self._df, np.zeros(len(self._vocab) - len(self._df), dtype=np.int64)])
+        np.add.at(self._df, np.asarray(new_terms, dtype=np.int64), 1)
+
+        self._doc_ids = np.concatenate([self._doc_ids, np.asarray(doc_ids, dtype=np.int64)])
+        self._doc_len = np.concatenate([self._doc_len, np.asarray(lengths, dtype=np.float32)])
+        self._live = np.concatenate([self._live, np.ones(len(doc_ids), dtype=bool)])
+        if doc_ids:
+            self._next_id = max(self._next_id, max(doc_ids) + 1)
+        self._norms = None
+
+        if self._pending_count > self.compact_ratio * max(len(self._postings), 1):
+            self.compact()
+
+    def delete(self, doc_ids: Iterable[int]):
+        """Tombstone documents by external id; unknown ids are ignored"""
+        for doc_id in doc_ids:
+            slot = self._slots.pop(int(doc_id), None)
+            if slot is not None:
+                self._live[slot] = False
+
+        dead = len(self._live) - len(self._slots)
+        if dead and dead > self.compact_ratio * len(self._live):
+            self.compact()
+
+    def compact(self):
+        """Merge pending postings into the CSR segment and drop tombstoned documents"""
+        n_terms = len(self._vocab)
+        terms = [np.repeat(np.arange(len(self._indptr) - 1, dtype=np.int64), np.diff(self._indptr))]
+        slots = [self._postings.astype(np.int64)]
+        tfs = [self._tfs]
+        for term_id, entries in self._pending.items():
+            entries = np.asarray(entries, dtype=np.int64)
+            terms.append(np.full(len(entries), term_id, dtype=np.int64))
+            slots.append(entries[:, 0])
+            tfs.append(entries[:, 1].astype(np.float32))
+        terms, slots, tfs = np.concatenate(terms), np.concatenate(slots), np.concatenate(tfs)
+
+        # Renumber live slots densely
+        keep = self._live[slots]
+        terms, slots, tfs = terms[keep], slots[keep], tfs[keep]
+        remap = np.cumsum(self._live) - 1
+        slots = remap[slots]
+
+        order = np.lexsort((slots, terms))
+        terms, slots, tfs = terms[order], slots[order], tfs[order]
+
+        self._df = np.bincount(terms, minlength=n_terms).astype(np.int64)
+        self._indptr = np.concatenate([[0], np.cumsum(self._df)]).astype(np.int64)
+        self._postings = slots.astype(np.int32)
+        self._tfs = tfs
+        self._pending = {}
+        self._pending_count = 0
+
+        self._doc_ids = self._doc_ids[self._live]
+        self._doc_len = self._doc_len[self._live]
+        self._live = np.ones(len(self._doc_ids), dtype=bool)
+        self._slots = {int(doc_id): slot for slot, doc_id in enumerate(self._doc_ids)}
+        self._norms = None
+
+    def _length_norms(self) -> np.ndarray:
+        """Per-slot k1 * (1 - b + b * dl / avgdl), cached until the index changes"""
+        if self._norms is None:
+            avgdl = float(self._doc_len.mean()) if len(self._doc_len) else 1.0
+            self._norms = self.k1 * (1 - self.b + self.b * self._doc_len / max(avgdl, 1e-9))
+        return self._norms
+
+    def _term_postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        if term_id + 1 < len(self._indptr):
+            start, end = self._indptr[term_id], self._indptr[term_id + 1]
+            slots, tfs = self._postings[start:end], self._tfs[start:end]
+        else:
+            # Term first seen after the last compaction
+            slots, tfs = self._postings[:0], self._tfs[:0]
+        pending = self._pending.get(term_id)
+        if pending:
+            pending = np.asarray(pending, dtype=np.int64)
+            slots = np.concatenate([slots, pending[:, 0].astype(np.int32)])
+            tfs = np.concatenate([tfs, pending[:, 1].astype(np.float32)])
+        return slots, tfs
+
+    def top_k(self, tokens: List[str], k: int, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (external id, score) for a tokenized query
+
+        `allowed`, if given, is a boolean mask indexed by external id; documents
+        outside it are dropped before scoring.
+        """
+        if not self._slots or k <= 0 or (allowed is not None and not len(allowed)):
+            return []
+
+        n_docs = len(self._doc_ids)
+        norms = self._length_norms()
+        slot_parts, score_parts = [], []
+        for term, query_tf in Counter(tokens).items():
+            term_id = self._vocab.get(term)
+            if term_id is None or self._df[term_id] == 0:
+                continue
+            slots, tfs = self._term_postings(term_id)
+            keep = self._live[slots]
+            if allowed is not None:
+                ext_ids = self._doc_ids[slots]
+                keep &= (ext_ids < len(allowed)) & allowed[np.minimum(ext_ids, len(allowed) - 1)]
+            slots, tfs = slots[keep], tfs[keep]
+            if not len(slots):
+                continue
+            df = self._df[term_id]
+            idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            slot_parts.append(slots)
+            score_parts.append(query_tf * idf * tfs * (self.k1 + 1) / (tfs + norms[slots]))
+
+        if not slot_parts:
+            return []
+
+        slots, inverse = np.unique(np.concatenate(slot_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self._doc_ids[slots[i]]), float(scores[i])) for i in top]
+
+    def save(self, directory: str):
+        """Persist the compacted index as .npy arrays plus a JSON vocabulary"""
+        if self._pending or len(self._slots) < len(self._doc_ids):
+            self.compact()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ("indptr", "postings", "tfs", "df", "doc_ids", "doc_len"):
+            np.save(directory / f"{name}.npy", getattr(self, f"_{name}"))
+        terms = sorted(self._vocab, key=self._vocab.get)
+        with open(directory / "vocab.json", "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "next_id": self._next_id, "terms": terms}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = False) -> "BM25Index":
+        """Load an index written by save(); `mmap` maps the posting arrays read-only"""
+        directory = Path(directory)
+        with open(directory / "vocab.json", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index._vocab = {term: i for i, term in enumerate(meta["terms"])}
+        mmap_mode = "r" if mmap else None
+        for name in ("indptr", "postings", "tfs", "doc_ids", "doc_len"):
+            setattr(index, f"_{name}", np.load(directory / f"{name}.npy", mmap_mode=mmap_mode))
+        # Frequencies are updated in place by add(), so they are always loaded writable
+        index._df = np.load(directory / "df.npy")
+        index._live = np.ones(len(index._doc_ids), dtype=bool)
+        index._slots = {int(doc_id): slot for slot, doc_id in enumerate(index._doc_ids)}
+        # Indexes saved before the high-water mark was persisted only know their live ids
+        index._next_id = meta.get("next_id", int(index._doc_ids.max()) + 1 if len(index._doc_ids) else 0)
+        return index
@@ -0,0 +1,104 @@
+from typing import List, Dict, Any, Optional
+from pathlib import Path
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from .document_processor import DocumentProcessor
+from .embedding_service import EmbeddingService
+from .retrieval_service import RetrievalService
+from .inference_executor import InferenceExecutor
+from .indexing_pipeline import IndexingPipeline
+from .index_artifact import write_artifact, prune_artifacts, file_digest
+from config.rag_config import (
+    DATA_DIR, RAG_COLLECTION_PREFIX, RAG_SOURCES, RAG_FILTER_FIELDS,
+    INDEX_BATCH_SIZE, INDEX_PROCESSES, INDEX_MAX_PENDING, CSV_READ_CHUNK_ROWS,
+    INDEX_ARTIFACT_DIR, INDEX_ARTIFACT_KEEP,
+    EMBEDDING_MODEL, EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_DTYPE,
+    EMBEDDING_BACKEND, ONNX_MODEL_DIR, ONNX_QUANTIZED,
+    INFERENCE_WORKERS, INFERENCE_INTRA_OP_THREADS
+)
+
+logger = logging.getLogger(__name__)
+
+async def build_index(
+    output_dir: str = INDEX_ARTIFACT_DIR,
+    processes: Optional[int] = INDEX_PROCESSES,
+    keep: int = INDEX_ARTIFACT_KEEP
+) -> Path:
+    """Parse, embed and index every RAG source offline and write an index artifact
+
+    The same pipeline the server runs on startup, into an in-memory index
+    that is then exported (see index_artifact.write_artifact).
+    """
+    executor = InferenceExecutor(max_workers=INFERENCE_WORKERS, intra_op_threads=INFERENCE_INTRA_OP_THREADS)
+    try:
+        processor = DocumentProcessor()
+        embedding_service = await executor.run(
+            EmbeddingService,
+            model_name=EMBEDDING_MODEL,
+            cache_dir=EMBEDDING_CACHE_DIR,
+            cache_dtype=EMBEDDING_CACHE_DTYPE,
+            backend=EMBEDDING_BACKEND,
+            onnx_model_dir=ONNX_MODEL_DIR,
+            onnx_quantized=ONNX_QUANTIZED,
+            intra_op_threads=executor.intra_op_threads
+        )
+        retrieval = RetrievalService(embedding_service, executor=executor, filter_fields=RAG_FILTER_FIELDS)
+
+        collections: Dict[str, List[str]] = {}
+        files: Dict[str, str] = {}
+        for source, spec in RAG_SOURCES.items():
+            name = f"{RAG_COLLECTION_PREFIX}{source}"
+            retrieval.configure_collection(name, **{key: value for key, value in spec.items() if key not in ("files", "quota")})
+            retrieval.reset_collection(name)
+            collections[name] = [os.path.join(DATA_DIR, file_name) for file_name in spec["files"]]
+            for path in collections[name]:
+                files[os.path.basename(path)] = await executor.run(file_digest, path)
+
+        pipeline = IndexingPipeline(
+            retrieval,
+            executor,
+            processes=processes,
+            batch_size=INDEX_BATCH_SIZE,
+            max_pending=INDEX_MAX_PENDING,
+            chunk_size=processor.chunk_size,
+            chunk_overlap=processor.chunk_overlap,
+            csv_chunk_rows=CSV_READ_CHUNK_ROWS
+        )
+        started = time.perf_counter()
+        indexed = await pipeline.run(collections)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Indexed {indexed} documents in {elapsed:.1f}s")
+
+        settings = {
+            "embedding": {"model": embedding_service.backend.name, "dim": embedding_service.dim},
+            "chunking": {"chunk_size": processor.chunk_size, "chunk_overlap": processor.chunk_overlap},
+            "sources": {source: spec for source, spec in RAG_SOURCES.items()},
+        }
+        # Identical inputs and settings give the same hash, whatever the build time
+        content_hash = hashlib.blake2b(
+            json.dumps({**settings, "files": files}, sort_keys=True, default=str).encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        manifest = {**settings, "files": files, "content_hash": content_hash, "build_seconds": round(elapsed, 2)}
+
+        artifact = await executor.run(write_artifact, retrieval, list(collections), output_dir, manifest)
+        if keep:
+            await executor.run(prune_artifacts, output_dir, keep)
+        return artifact
+    finally:
+        executor.shutdown()
+
+if __name__ == "__main__":
+    # Run from backend/: python -m services.rag.build_index [--output indexes] [--processes 8]
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Build the RAG index offline into a versioned artifact")
+    parser.add_argument("--output", default=INDEX_ARTIFACT_DIR)
+    parser.add_argument("--processes", type=int, default=INDEX_PROCESSES, help="parser processes (default: one per core)")
+    parser.add_argument("--keep", type=int, default=INDEX_ARTIFACT_KEEP, help="artifacts to keep, 0 keeps all")
+    args = parser.parse_args()
+    print(asyncio.run(build_index(args.output, args.processes, args.keep)))
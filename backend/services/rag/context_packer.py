@@ -0,0 +1,93 @@
+from typing import Any, Dict, List, Tuple
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r'\w+')
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class ContextPacker:
+    """Fits retrieved documents into a fixed prompt token budget
+
+    Documents are taken best score first. A document whose word 3-gram
+    Jaccard similarity with one already packed reaches dedup_threshold is
+    dropped. The last document that does not fit whole is cut at a sentence
+    boundary; the header each document gets in the prompt counts against
+    the budget too.
+    """
+
+    def __init__(self, tokenizer, budget_tokens: int, dedup_threshold: float = 0.9, header_tokens: int = 5):
+        self.tokenizer = tokenizer
+        self.budget_tokens = budget_tokens
+        self.dedup_threshold = dedup_threshold
+        self.header_tokens = header_tokens
+
+    def _count(self, text: str) -> int:
+        return len(self.tokenizer.encode_ordinary(text))
+
+    def _truncate(self, text: str, budget: int) -> Tuple[str, int]:
+        """Longest prefix of whole sentences within budget tokens"""
+        kept, used = [], 0
+        for sentence in _SENTENCE_END.split(text):
+            tokens = self._count(sentence + " ")
+            if used + tokens > budget:
+                break
+            kept.append(sentence)
+            used += tokens
+        return " ".join(kept), used
+
+    def pack(self, context: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Packed documents (text possibly truncated) and packing statistics"""
+        ranked = sorted(context, key=lambda doc: doc.get("score", 0.0), reverse=True)
+        packed, packed_shingles = [], []
+        input_tokens = packed_tokens = 0
+        duplicates = truncated = dropped = 0
+
+        for doc in ranked:
+            text = doc.get("text", "")
+            tokens = self._count(text)
+            input_tokens += tokens + self.header_tokens
+
+            shingles = _shingles(text)
+            if any(_jaccard(shingles, seen) >= self.dedup_threshold for seen in packed_shingles):
+                duplicates += 1
+                continue
+
+            remaining = self.budget_tokens - packed_tokens - self.header_tokens
+            if tokens > remaining:
+                text, tokens = self._truncate(text, remaining) if remaining > 0 else ("", 0)
+                if not text:
+                    dropped += 1
+                    continue
+                truncated += 1
+                doc = {**doc, "text": text, "truncated": True}
+
+            packed.append(doc)
+            packed_shingles.append(shingles)
+            packed_tokens += tokens + self.header_tokens
+
+        stats = {
+            "budget_tokens": self.budget_tokens,
+            "input_tokens": input_tokens,
+            "packed_tokens": packed_tokens,
+            "tokens_saved": input_tokens - packed_tokens,
+            "documents_in": len(context),
+            "documents_packed": len(packed),
+            "duplicates_removed": duplicates,
+            "truncated": truncated,
+            "dropped": dropped,
+        }
+        logger.debug(f"Packed context: {stats}")
+        return packed, stats
@@ -1,4 +1,5 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Iterator, Optional
+from string import Formatter
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -7,6 +8,7 @@ import logging
 from bs4 import BeautifulSoup
 import re
 import tiktoken
+from config.rag_config import CSV_METADATA_COLUMNS, CSV_READ_CHUNK_ROWS
 
 logger = logging.getLogger(__name__)
 
@@ -18,47 +20,50 @@ class DocumentProcessor:
         
     def process_text(self, text: str) -> List[str]:
         """Split text into overlapping chunks"""
-        # Clean text
         text = self._clean_text(text)
-        
-        # Simple sentence splitting if NLTK is not available
-        sentences = text.split('. ')
-        sentences = [s.strip() + '.' for s in sentences if s.strip()]
-        
-        # Create chunks
-        chunks = []
-        current_chunk = []
-        current_size = 0
-        
-        for sentence in sentences:
-            sentence_tokens = len(self.tokenizer.encode(sentence))
-            
-            if current_size + sentence_tokens > self.chunk_size:
-                # Save current chunk
-                if current_chunk:
-                    chunks.append(" ".join(current_chunk))
-                
-                # Start new chunk with overlap
-                overlap_size = 0
-                current_chunk = []
-                
-                # Add sentences from previous chunk for overlap
-                for prev_sentence in current_chunk[-3:]:  # Use last 3 sentences for overlap
-                    if overlap_size + len(self.tokenizer.encode(prev_sentence)) <= self.chunk_overlap:
-                        current_chunk.append(prev_sentence)
-                        overlap_size += len(self.tokenizer.encode(prev_sentence))
-                
-                current_size = overlap_size
-            
-            current_chunk.append(sentence)
-            current_size += sentence_tokens
-        
-        # Add final chunk
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-        
-        return chunks
-    
+        return [text[start:end].strip() for start, end in self.chunk_spans(text)]
+
+    def chunk_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Character spans of overlapping chunks of (already cleaned) text
+
+        The text is tokenized once. Chunks hold at most chunk_size tokens and
+        consecutive chunks share chunk_overlap tokens; a chunk ends after the
+        last sentence-ending token in its second half when there is one.
+        """
+        tokens = self.tokenizer.encode_ordinary(text)
+        if not tokens:
+            return []
+        if len(tokens) <= self.chunk_size:
+            return [(0, len(text))]
+
+        # Character offset where each token starts and ends (tokens are byte sequences)
+        token_bytes = self.tokenizer.decode_tokens_bytes(tokens)
+        lengths = np.fromiter(map(len, token_bytes), dtype=np.int64, count=len(tokens))
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+        if not text.isascii():
+            # Map byte offsets to character offsets by counting UTF-8 lead bytes
+            raw = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+            chars_before = np.concatenate(([0], np.cumsum((raw & 0xC0) != 0x80)))
+            starts, ends = chars_before[starts], chars_before[ends]
+        # Token positions right after a sentence-ending period
+        sentence_ends = np.flatnonzero([b.endswith(b'.') for b in token_bytes]) + 1
+
+        spans = []
+        start, n = 0, len(tokens)
+        while start < n:
+            end = min(start + self.chunk_size, n)
+            if end < n:
+                # Prefer the last sentence boundary in the second half of the window
+                i = np.searchsorted(sentence_ends, end, side='right') - 1
+                if i >= 0 and sentence_ends[i] > start + self.chunk_size // 2:
+                    end = int(sentence_ends[i])
+            spans.append((int(starts[start]), int(ends[end - 1])))
+            if end == n:
+                break
+            start = max(end - self.chunk_overlap, start + 1)
+        return spans
+
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text"""
         # Remove extra whitespace
@@ -74,30 +79,98 @@ class DocumentProcessor:
     
     def process_csv(self, file_path: str) -> List[Dict[str, Any]]:
         """Process CSV file into documents"""
-        df = pd.read_csv(file_path)
-        documents = []
-        
-        for _, row in df.iterrows():
-            # Combine relevant columns into text
-            text = " ".join(str(val) for val in row.values if pd.notna(val))
-            
-            # Split into chunks if needed
-            chunks = self.process_text(text)
-            
-            # Create document for each chunk
+        return list(self.iter_csv(file_path))
+
+    def iter_csv(
+        self,
+        file_path: str,
+        text_template: Optional[str] = None,
+        metadata_columns: Optional[List[str]] = None,
+        chunk_rows: int = CSV_READ_CHUNK_ROWS
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream a CSV as documents, reading chunk_rows rows at a time
+
+        Row text is rendered column-wise from text_template ("{col}"
+        placeholders; by default every column's value separated by spaces).
+        Rows that fit in one chunk are not chunked, and only metadata_columns
+        present in the file are kept as metadata.
+        """
+        for frame in pd.read_csv(file_path, chunksize=chunk_rows):
+            yield from self.frame_documents(frame, file_path, text_template, metadata_columns)
+
+    def frame_documents(
+        self,
+        frame: pd.DataFrame,
+        file_path: str,
+        text_template: Optional[str] = None,
+        metadata_columns: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Documents for one chunk of CSV rows (see iter_csv)"""
+        if metadata_columns is None:
+            metadata_columns = CSV_METADATA_COLUMNS
+
+        frame = self._integral_floats_as_ints(frame)
+        texts = self._render_rows(frame, text_template)
+        texts = texts.str.replace(r'\s+', ' ', regex=True)
+        texts = texts.str.replace(r'[^\w\s.,!?-]', '', regex=True).str.strip()
+        token_counts = map(len, self.tokenizer.encode_ordinary_batch(texts.tolist()))
+
+        columns = [c for c in metadata_columns if c in frame.columns]
+        kept = frame[columns].astype(object)
+        metadata = kept.where(kept.notna(), None).to_dict('records')
+
+        for row_index, text, n_tokens, row_metadata in zip(frame.index, texts, token_counts, metadata):
+            if n_tokens == 0:
+                continue
+            if n_tokens <= self.chunk_size:
+                chunks = [text]
+            else:
+                chunks = [text[a:b].strip() for a, b in self.chunk_spans(text)]
             for i, chunk in enumerate(chunks):
-                documents.append({
+                yield {
                     "text": chunk,
                     "metadata": {
                         "source": file_path,
-                        "row_index": _,
+                        "row_index": int(row_index),
                         "chunk_index": i,
-                        **row.to_dict()  # Include original data as metadata
+                        **row_metadata
                     }
-                })
-        
-        return documents
-    
+                }
+
+    def _integral_floats_as_ints(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Whole numbers in float columns as ints, so a value reads the same in every chunk
+
+        pandas types a chunk's integer column as float only if that chunk has
+        a missing cell, which would render 3 as "3.0" in some chunks and "3"
+        in others.
+        """
+        columns = {}
+        for column in frame.select_dtypes(include="float").columns:
+            values = frame[column]
+            integral = values.notna() & (values % 1 == 0) & (values.abs() < 2 ** 53)
+            if integral.any():
+                converted = values.astype(object)
+                converted[integral] = values[integral].astype(np.int64).astype(object)
+                columns[column] = converted
+        return frame.assign(**columns) if columns else frame
+
+    def _render_rows(self, frame: pd.DataFrame, text_template: Optional[str] = None) -> pd.Series:
+        """Render every row of frame through a "{column}" template, one column at a time"""
+        values = frame.astype(str).where(frame.notna(), '')
+        if text_template is None:
+            # Empty cells leave doubled spaces, which cleaning collapses
+            parts = [(' ' if i else '', column) for i, column in enumerate(frame.columns)]
+        else:
+            parts = [(literal, column) for literal, column, _, _ in Formatter().parse(text_template)]
+
+        text = pd.Series('', index=frame.index, dtype=object)
+        for literal, column in parts:
+            if literal:
+                text = text + literal
+            if column:
+                text = text + values[column]
+        return text
+
     def process_html(self, file_path: str) -> List[Dict[str, Any]]:
         """Process HTML file into documents"""
         with open(file_path, 'r') as f:
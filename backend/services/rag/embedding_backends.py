@@ -0,0 +1,169 @@
+from typing import List, Optional
+from pathlib import Path
+import numpy as np
+import argparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SentenceTransformerBackend:
+    """Encodes through sentence-transformers/torch (GPU if available)"""
+
+    def __init__(self, model_name: str, intra_op_threads: Optional[int] = None):
+        # Imported here so the ONNX path never loads torch
+        from sentence_transformers import SentenceTransformer
+        import torch
+
+        if intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+        self.model = SentenceTransformer(model_name)
+
+        # Enable GPU if available
+        if torch.cuda.is_available():
+            self.model = self.model.to('cuda')
+
+        self.name = model_name
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+class OnnxBackend:
+    """Runs an exported (optionally int8-quantized) sentence-transformer through onnxruntime on CPU
+
+    Reproduces the sentence-transformers pipeline of all-MiniLM-L6-v2: mean
+    pooling over the attention mask followed by L2 normalization, so vectors
+    have the same shape and are interchangeable with the torch backend up to
+    quantization error.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, intra_op_threads: Optional[int] = None, max_length: int = 256):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        model_file = model_dir / ("model_quantized.onnx" if quantized else "model.onnx")
+        if not model_file.exists():
+            raise FileNotFoundError(
+                f"{model_file} not found; export it with "
+                f"`python -m services.rag.embedding_backends --output {model_dir}`"
+            )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or 0  # 0 lets onnxruntime decide
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_file), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        with open(model_dir / "source_model.txt") as f:
+            source_model = f.read().strip()
+        self.name = f"{source_model}@onnx-int8" if quantized else f"{source_model}@onnx"
+        self.dim = self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        batches = []
+        for i in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[i:i + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            token_embeddings = self.session.run(None, feed)[0]
+
+            # Mean pooling over real tokens, then L2 normalization
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+
+        if not batches:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.concatenate(batches)
+
+def create_backend(
+    backend: str,
+    model_name: str,
+    onnx_model_dir: Optional[str] = None,
+    onnx_quantized: bool = True,
+    intra_op_threads: Optional[int] = None
+):
+    """Build the embedding backend named by `backend` ("torch" or "onnx")"""
+    if backend == "torch":
+        return SentenceTransformerBackend(model_name, intra_op_threads=intra_op_threads)
+    if backend == "onnx":
+        return OnnxBackend(onnx_model_dir, quantized=onnx_quantized, intra_op_threads=intra_op_threads)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = True, opset: int = 17):
+    """Export a sentence-transformers model's transformer to ONNX, plus an int8 copy
+
+    Writes model.onnx, model_quantized.onnx (dynamic int8 weights),
+    tokenizer.json and source_model.txt into output_dir.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+    tokenizer.save_pretrained(str(output_dir))
+
+    sample = tokenizer(["an example sentence"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    class TokenEmbeddings(torch.nn.Module):
+        """Binds the exported inputs by name; forward() signatures vary across transformers releases"""
+
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer),
+            tuple(sample[name] for name in input_names),
+            str(output_dir / "model.onnx"),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False
+        )
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(
+            str(output_dir / "model.onnx"),
+            str(output_dir / "model_quantized.onnx"),
+            weight_type=QuantType.QInt8
+        )
+
+    with open(output_dir / "source_model.txt", "w") as f:
+        f.write(model_name)
+    logger.info(f"Exported {model_name} to {output_dir}")
+
+if __name__ == "__main__":
+    # Run from backend/: python -m services.rag.embedding_backends --output models/all-MiniLM-L6-v2-onnx
+    from config.rag_config import EMBEDDING_MODEL, ONNX_MODEL_DIR
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--output", default=ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    export_onnx(args.model, args.output, quantize=not args.no_quantize)
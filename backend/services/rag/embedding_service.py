@@ -1,65 +1,97 @@
-from typing import List, Dict, Any
+from typing import List, Optional
+from collections import OrderedDict
 import numpy as np
-from sentence_transformers import SentenceTransformer
-import torch
-from pathlib import Path
-import json
 import logging
-from functools import lru_cache
+import threading
+from .embedding_backends import create_backend
+from .embedding_store import EmbeddingStore
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', cache_dir: str = None):
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        cache_dir: str = None,
+        cache_dtype: str = "float16",
+        backend: str = "torch",
+        onnx_model_dir: Optional[str] = None,
+        onnx_quantized: bool = True,
+        intra_op_threads: Optional[int] = None,
+        query_cache_size: int = 1024
+    ):
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
-        self.cache_dir = Path(cache_dir) if cache_dir else None
-        
-        # Enable GPU if available
-        if torch.cuda.is_available():
-            self.model = self.model.to('cuda')
-    
-    @lru_cache(maxsize=10000)
+        self.backend = create_backend(
+            backend,
+            model_name,
+            onnx_model_dir=onnx_model_dir,
+            onnx_quantized=onnx_quantized,
+            intra_op_threads=intra_op_threads
+        )
+        self.dim = self.backend.dim
+
+        # Embeddings persist across processes, keyed by (model name, text hash).
+        # The backend name distinguishes e.g. int8 ONNX vectors from torch ones.
+        self.store = None
+        if cache_dir:
+            self.store = EmbeddingStore(cache_dir, self.backend.name, self.dim, dtype=cache_dtype)
+
+        # Query embeddings stay out of the store: user queries would grow it
+        # without bound and put disk writes on the request path
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_lock = threading.Lock()
+
     def get_embedding(self, text: str) -> np.ndarray:
         """Get embedding for a single text with caching"""
-        return self.model.encode(text)
-    
+        return self.get_embeddings([text])[0]
+
     def get_embeddings(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
-        """Get embeddings for multiple texts with batching"""
-        embeddings = []
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_embeddings = self.model.encode(batch)
-            embeddings.extend(batch_embeddings)
-        
-        return np.array(embeddings)
-    
-    def save_embeddings(self, texts: List[str], file_name: str):
-        """Save embeddings to disk"""
-        if not self.cache_dir:
-            return
-        
-        embeddings = self.get_embeddings(texts)
-        
-        cache_file = self.cache_dir / f"{file_name}.npz"
-        np.savez_compressed(
-            cache_file,
-            embeddings=embeddings,
-            texts=texts
-        )
-    
-    def load_embeddings(self, file_name: str) -> Dict[str, np.ndarray]:
-        """Load embeddings from disk"""
-        if not self.cache_dir:
-            return None
-        
-        cache_file = self.cache_dir / f"{file_name}.npz"
-        if not cache_file.exists():
-            return None
-        
-        data = np.load(cache_file)
-        return {
-            'embeddings': data['embeddings'],
-            'texts': data['texts']
-        }
\ No newline at end of file
+        """Get embeddings for multiple texts; only cache misses reach the model"""
+        if self.store is None:
+            return self._encode(texts, batch_size)
+
+        embeddings, missing = self.store.lookup(texts)
+        if missing:
+            # Encode each distinct missing text once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = self._encode(unique_texts, batch_size)
+            by_text = dict(zip(unique_texts, encoded))
+            embeddings[missing] = [by_text[texts[i]] for i in missing]
+            self.store.put(unique_texts, encoded)
+            logger.debug(f"Embedding cache: {len(texts) - len(missing)} hits, {len(unique_texts)} encoded")
+
+        return embeddings
+
+    def get_query_embedding(self, query: str) -> np.ndarray:
+        """Get embedding for a single search query"""
+        return self.get_query_embeddings([query])[0]
+
+    def get_query_embeddings(self, queries: List[str], batch_size: int = 32) -> np.ndarray:
+        """Get embeddings for search queries, cached in a bounded in-memory LRU instead of the store"""
+        embeddings = np.zeros((len(queries), self.dim), dtype=np.float32)
+        missing = []
+        with self._query_lock:
+            for i, query in enumerate(queries):
+                cached = self._query_cache.get(query)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._query_cache.move_to_end(query)
+                    embeddings[i] = cached
+        if missing:
+            unique_queries = list(dict.fromkeys(queries[i] for i in missing))
+            encoded = self._encode(unique_queries, batch_size)
+            by_query = dict(zip(unique_queries, encoded))
+            embeddings[missing] = [by_query[queries[i]] for i in missing]
+            with self._query_lock:
+                for query, embedding in by_query.items():
+                    self._query_cache[query] = embedding
+                    self._query_cache.move_to_end(query)
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return embeddings
+
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Run the model over texts in batches"""
+        return self.backend.encode(texts, batch_size=batch_size)
@@ -0,0 +1,157 @@
+from typing import List, Tuple
+from pathlib import Path
+import numpy as np
+import contextlib
+import hashlib
+import json
+import logging
+import re
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+KEY_BYTES = 16
+
+class EmbeddingStore:
+    """Content-addressed on-disk embedding cache for one model
+
+    Vectors are rows of a memory-mapped matrix (vectors.bin) that grows by
+    doubling; keys.bin holds the 16-byte hash of (model name, text) for each
+    row in the same order and is loaded into an in-memory hash index on open.
+    Rows are written before their keys, so a key never points at an unwritten
+    row. Appends take an exclusive lock on the store's lock file and first
+    pick up keys other processes appended, so several processes (API workers,
+    the build_index CLI) can share a store; without fcntl only threads of one
+    process are coordinated.
+    """
+
+    def __init__(self, directory: str, model_name: str, dim: int, dtype: str = "float16", initial_capacity: int = 1024):
+        self.model_name = model_name
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.directory = Path(directory) / re.sub(r'[^\w.-]', '_', model_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._vectors_path = self.directory / "vectors.bin"
+        self._keys_path = self.directory / "keys.bin"
+        self._lock_path = self.directory / "lock"
+        meta_path = self.directory / "meta.json"
+        meta = {"model_name": model_name, "dim": dim, "dtype": self.dtype.name}
+
+        self._lock = threading.Lock()
+        self._index = {}
+        self._count = 0
+        self._matrix = None
+        # Under the file lock so no other process is appending or growing the files meanwhile
+        with self._file_lock():
+            if meta_path.exists():
+                with open(meta_path) as f:
+                    if json.load(f) != meta:
+                        logger.warning(f"Embedding store at {self.directory} has different settings; resetting it")
+                        self._vectors_path.unlink(missing_ok=True)
+                        self._keys_path.unlink(missing_ok=True)
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+            self._open_matrix(initial_capacity)
+            self._read_new_keys()
+        logger.debug(f"Opened embedding store {self.directory} with {len(self._index)} vectors")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _open_matrix(self, capacity: int):
+        """Map vectors.bin with room for at least `capacity` rows (more if another process grew it)"""
+        row_bytes = self.dim * self.dtype.itemsize
+        with open(self._vectors_path, "ab") as f:
+            capacity = max(capacity, f.tell() // row_bytes)
+            if f.tell() < capacity * row_bytes:
+                f.truncate(capacity * row_bytes)
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+
+    def _read_new_keys(self):
+        """Index keys appended to keys.bin since it was last read, by this or another process"""
+        if not self._keys_path.exists():
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._count * KEY_BYTES)
+            raw = f.read()
+        count = len(raw) // KEY_BYTES
+        for i in range(count):
+            # First occurrence wins if two processes appended the same text
+            self._index.setdefault(raw[i * KEY_BYTES:(i + 1) * KEY_BYTES], self._count + i)
+        self._count += count
+        if self._count > len(self._matrix):
+            self._open_matrix(self._count)
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the store across processes, for appends"""
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(f"{self.model_name}\0{text}".encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+    def lookup(self, texts: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """Cached embeddings for `texts` as float32, plus the positions that missed"""
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        keys = [self._key(text) for text in texts]
+        rows, hits, missing = [], [], []
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._index.get(key)
+                if row is None:
+                    missing.append(i)
+                else:
+                    rows.append(row)
+                    hits.append(i)
+            if hits:
+                embeddings[hits] = self._matrix[rows]
+        return embeddings, missing
+
+    def put(self, texts: List[str], embeddings: np.ndarray):
+        """Store embeddings for texts not already in the store"""
+        keys = [self._key(text) for text in texts]
+        with self._lock, self._file_lock():
+            # Rows are numbered by the keys on disk, including other processes' appends
+            self._read_new_keys()
+            new_keys, new_rows = [], []
+            seen = set()
+            for key, embedding in zip(keys, embeddings):
+                if key in self._index or key in seen:
+                    continue
+                seen.add(key)
+                new_keys.append(key)
+                new_rows.append(embedding)
+            if not new_keys:
+                return
+
+            start = self._count
+            end = start + len(new_keys)
+            if end > len(self._matrix):
+                capacity = len(self._matrix)
+                while capacity < end:
+                    capacity *= 2
+                self._open_matrix(capacity)
+
+            self._matrix[start:end] = np.asarray(new_rows, dtype=self.dtype)
+            self._matrix.flush()
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(new_keys))
+            for offset, key in enumerate(new_keys):
+                self._index[key] = start + offset
+            self._count = end
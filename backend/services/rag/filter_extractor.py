@@ -0,0 +1,92 @@
+from typing import Any, Dict, Iterable, Optional
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+PROPERTY_TYPES = {
+    "apartment": "apartment", "apartments": "apartment", "flat": "apartment", "flats": "apartment",
+    "villa": "villa", "villas": "villa",
+    "house": "house", "houses": "house", "townhouse": "house", "townhouses": "house",
+}
+
+_NUMBER = r'(?:aed\s*)?(\d[\d,]*(?:\.\d+)?)\s*(k|m|million)?\b'
+_BEDROOMS = re.compile(r'\b(\d+)\s*-?\s*(?:bed(?:room)?s?|br|bhk)\b')
+_STUDIO = re.compile(r'\bstudios?\b')
+_BETWEEN = re.compile(r'\bbetween\s+' + _NUMBER + r'\s+(?:and|-|to)\s+' + _NUMBER)
+_MAX_PRICE = re.compile(r'\b(?:under|below|less than|max(?:imum)?|up to|cheaper than)\s+' + _NUMBER)
+_MIN_PRICE = re.compile(r'\b(?:over|above|more than|min(?:imum)?|at least)\s+' + _NUMBER)
+_FURNISHING = re.compile(r'\b(unfurnished|furnished)\b')
+_WORD = re.compile(r'\b(\w+)\b')
+
+def _amount(number: str, unit: Optional[str]) -> float:
+    value = float(number.replace(',', ''))
+    if unit == 'k':
+        value *= 1_000
+    elif unit in ('m', 'million'):
+        value *= 1_000_000
+    return value
+
+class FilterExtractor:
+    """Rule-based extraction of structured filters from a free-text question
+
+    Recognizes bedroom counts ("2-bed", "studio"), property types, furnishing,
+    rent bounds ("under 100k", "between 80k and 120k") and neighborhoods from a
+    known list (longest match wins). Returns filters in the format taken by
+    RetrievalService.hybrid_search.
+    """
+
+    def __init__(self, neighborhoods: Iterable[str] = (), price_field: str = "current_rent"):
+        self.price_field = price_field
+        self.set_neighborhoods(neighborhoods)
+
+    def set_neighborhoods(self, neighborhoods: Iterable[str]):
+        # Longest names first so "JVC District 10" beats "JVC"
+        names = sorted({n for n in neighborhoods if n}, key=len, reverse=True)
+        self._neighborhoods = [
+            (re.compile(r'\b' + re.escape(name.lower()) + r'\b'), name)
+            for name in names
+        ]
+
+    def extract(self, query: str) -> Dict[str, Any]:
+        text = query.lower()
+        filters: Dict[str, Any] = {}
+
+        for pattern, name in self._neighborhoods:
+            if pattern.search(text):
+                filters["neighborhood"] = name
+                break
+
+        match = _BEDROOMS.search(text)
+        if match:
+            filters["bedrooms"] = int(match.group(1))
+        elif _STUDIO.search(text):
+            filters["bedrooms"] = 0
+
+        for word in _WORD.findall(text):
+            if word in PROPERTY_TYPES:
+                filters["property_type"] = PROPERTY_TYPES[word]
+                break
+
+        match = _FURNISHING.search(text)
+        if match:
+            filters["furnishing"] = match.group(1)
+
+        price = {}
+        match = _BETWEEN.search(text)
+        if match:
+            low, high = _amount(*match.group(1, 2)), _amount(*match.group(3, 4))
+            price = {"gte": min(low, high), "lte": max(low, high)}
+        else:
+            match = _MAX_PRICE.search(text)
+            if match:
+                price["lte"] = _amount(*match.group(1, 2))
+            match = _MIN_PRICE.search(text)
+            if match:
+                price["gte"] = _amount(*match.group(1, 2))
+        if price:
+            filters[self.price_field] = price
+
+        if filters:
+            logger.debug(f"Extracted filters from query: {filters}")
+        return filters
@@ -1,31 +1,46 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, AsyncIterator
 import logging
-from config.model_config import OLLAMA_API_URL, MODEL_NAME
+from config.model_config import OLLAMA_API_URL, MODEL_NAME, REQUEST_TIMEOUT, DEFAULT_TEMPERATURE
+from config.rag_config import CONTEXT_TOKEN_BUDGETS, CONTEXT_DEDUP_THRESHOLD
+from .context_packer import ContextPacker
 import httpx
 import json
 
 logger = logging.getLogger(__name__)
 
+ERROR_RESPONSE = "I apologize, but I encountered an error generating a response."
+
 class GenerationService:
     def __init__(self, model_name: str = MODEL_NAME):
         self.model_name = model_name
-        
-    async def generate_response(
-        self,
-        query: str,
-        context: List[Dict[str, Any]],
-        max_tokens: int = 500
-    ) -> str:
-        """Generate response using context"""
-        try:
-            # Prepare context string
-            context_str = "\n\n".join(
-                f"Source {i+1}:\n{doc['text']}"
-                for i, doc in enumerate(context)
+        self._packer = None
+
+    @property
+    def packer(self) -> ContextPacker:
+        # Created on first use so constructing the service doesn't load the tokenizer
+        if self._packer is None:
+            import tiktoken
+            budget = CONTEXT_TOKEN_BUDGETS.get(self.model_name, CONTEXT_TOKEN_BUDGETS["default"])
+            self._packer = ContextPacker(
+                tiktoken.get_encoding("cl100k_base"),
+                budget_tokens=budget,
+                dedup_threshold=CONTEXT_DEDUP_THRESHOLD
             )
-            
-            # Prepare prompt
-            prompt = f"""Based on the following context, answer the question. 
+        return self._packer
+
+    def pack_context(self, context: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Deduplicate and fit retrieved documents into this model's context budget"""
+        return self.packer.pack(context)
+        
+    def _build_prompt(self, query: str, context: List[Dict[str, Any]]) -> str:
+        # Prepare context string
+        context_str = "\n\n".join(
+            f"Source {i+1}:\n{doc['text']}"
+            for i, doc in enumerate(context)
+        )
+
+        # Prepare prompt
+        return f"""Based on the following context, answer the question. 
             If you cannot find the answer in the context, say so.
             
             Context:
@@ -34,17 +49,34 @@ class GenerationService:
             Question: {query}
             
             Answer:"""
-            
+
+    def _request(self, prompt: str, max_tokens: int, stream: bool) -> Dict[str, Any]:
+        # Ollama takes sampling settings under "options"; num_predict caps the answer length
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "num_predict": max_tokens,
+                "temperature": DEFAULT_TEMPERATURE
+            }
+        }
+
+    async def generate_response(
+        self,
+        query: str,
+        context: List[Dict[str, Any]],
+        max_tokens: int = 500
+    ) -> str:
+        """Generate response using context"""
+        try:
+            prompt = self._build_prompt(query, context)
+
             # Call Ollama
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
                 response = await client.post(
                     f"{OLLAMA_API_URL}/generate",
-                    json={
-                        "model": self.model_name,
-                        "prompt": prompt,
-                        "max_tokens": max_tokens,
-                        "temperature": 0.7
-                    }
+                    json=self._request(prompt, max_tokens, stream=False)
                 )
                 
                 if response.status_code != 200:
@@ -55,4 +87,40 @@ class GenerationService:
                 
         except Exception as e:
             logger.error(f"Failed to generate response: {e}")
-            return "I apologize, but I encountered an error generating a response." 
\ No newline at end of file
+            return ERROR_RESPONSE
+
+    async def stream_response(
+        self,
+        query: str,
+        context: List[Dict[str, Any]],
+        max_tokens: int = 500
+    ) -> AsyncIterator[str]:
+        """Yield answer text fragments as Ollama generates them
+
+        Raises on connection or API errors, including a stream that ends
+        before Ollama's final "done" chunk; closing the iterator early closes
+        the upstream request, which stops generation.
+        """
+        prompt = self._build_prompt(query, context)
+        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
+            async with client.stream(
+                "POST",
+                f"{OLLAMA_API_URL}/generate",
+                json=self._request(prompt, max_tokens, stream=True)
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"Ollama error: {body.decode(errors='replace')}")
+
+                # Ollama streams one JSON object per line
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise Exception(f"Ollama error: {chunk['error']}")
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        return
+                raise Exception("Ollama stream ended before the answer was complete")
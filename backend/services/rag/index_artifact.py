@@ -0,0 +1,231 @@
+from typing import List, Dict, Any, Tuple, Optional, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import hashlib
+import json
+import logging
+import os
+import shutil
+from qdrant_client.http import models
+from .bm25_index import BM25Index
+from .row_store import RowStore, filter_column
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 2
+CURRENT_FILE = "CURRENT"
+
+def file_digest(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _condition_rows(values: np.ndarray, condition: models.FieldCondition) -> np.ndarray:
+    if condition.range is not None:
+        keep = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(len(values), dtype=bool)
+        bounds = condition.range
+        for bound, test in ((bounds.gt, np.greater), (bounds.gte, np.greater_equal), (bounds.lt, np.less), (bounds.lte, np.less_equal)):
+            if bound is not None:
+                keep &= test(values, bound)
+        return keep
+    if isinstance(condition.match, models.MatchAny):
+        return np.isin(values, condition.match.any)
+    if isinstance(condition.match, models.MatchValue):
+        return values == condition.match.value
+    raise ValueError(f"Unsupported filter condition on {condition.key}")
+
+def filter_rows(query_filter: models.Filter, column: Callable[[str], np.ndarray], n_rows: int) -> np.ndarray:
+    """Boolean mask over rows matching query_filter (must conditions only), given each field's filter column"""
+    if query_filter.should or query_filter.must_not:
+        raise ValueError("Local filtering only supports `must` filters")
+    rows = np.ones(n_rows, dtype=bool)
+    for condition in query_filter.must or []:
+        rows &= _condition_rows(column(condition.key), condition)
+    return rows
+
+def write_artifact(
+    retrieval_service,
+    collection_names: List[str],
+    output_dir: str,
+    manifest: Dict[str, Any]
+) -> Path:
+    """Export indexed collections as a versioned artifact under output_dir
+
+    Each collection gets unit-length float32 vectors and their point ids
+    (.npy, memory-mappable), its BM25 postings, its row store (document text
+    and metadata) and columns for the filterable payload fields. The
+    artifact is written to a temporary directory and renamed into place, then
+    output_dir/CURRENT is switched to it, so readers never see a partial build.
+    """
+    output_dir = Path(output_dir)
+    version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{manifest['content_hash'][:12]}"
+    staging = output_dir / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+
+    collections = {}
+    for name in collection_names:
+        directory = staging / name
+        directory.mkdir(parents=True)
+        points = []
+        offset = None
+        while True:
+            batch, offset = retrieval_service.qdrant.scroll(
+                collection_name=name, limit=10_000, offset=offset, with_payload=True, with_vectors=True
+            )
+            points.extend(batch)
+            if offset is None:
+                break
+        points.sort(key=lambda point: point.id)
+
+        vectors = np.array([point.vector for point in points], dtype=np.float32).reshape(len(points), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.save(directory / "vectors.npy", vectors / np.where(norms == 0, 1, norms))
+        np.save(directory / "ids.npy", np.array([point.id for point in points], dtype=np.int64))
+
+        (directory / "columns").mkdir()
+        for field, schema in retrieval_service.filter_fields.items():
+            np.save(directory / "columns" / f"{field}.npy", filter_column([point.payload.get(field) for point in points], schema))
+
+        retrieval_service.keyword_indexes[name].save(directory / "bm25")
+        retrieval_service.row_stores[name].save(directory / "rows")
+        collections[name] = {
+            "documents": len(points),
+            "dim": int(vectors.shape[1]),
+            "params": retrieval_service.collection_params.get(name, {}),
+        }
+
+    manifest = {
+        **manifest,
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "filter_fields": retrieval_service.filter_fields,
+        "collections": collections,
+    }
+    with open(staging / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    final = output_dir / version
+    os.replace(staging, final)
+    current_tmp = output_dir / f".{CURRENT_FILE}.tmp"
+    current_tmp.write_text(version)
+    os.replace(current_tmp, output_dir / CURRENT_FILE)
+    logger.info(f"Wrote index artifact {final}")
+    return final
+
+def resolve_artifact(path: str) -> Optional[Path]:
+    """Artifact directory for `path`: the artifact itself, or the one its CURRENT file names"""
+    path = Path(path)
+    if (path / "manifest.json").exists():
+        return path
+    if (path / CURRENT_FILE).exists():
+        return path / (path / CURRENT_FILE).read_text().strip()
+    return None
+
+def read_manifest(artifact_dir: Path) -> Dict[str, Any]:
+    with open(Path(artifact_dir) / "manifest.json") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported index artifact format: {manifest.get('format')}")
+    return manifest
+
+def stale_files(manifest: Dict[str, Any], paths: List[str]) -> List[str]:
+    """Those of `paths` the artifact did not index or whose content changed since it was built
+
+    Missing files are not reported: there is nothing to index them from.
+    """
+    indexed = manifest.get("files", {})
+    return [
+        path for path in paths
+        if os.path.exists(path) and indexed.get(os.path.basename(path)) != file_digest(path)
+    ]
+
+def prune_artifacts(output_dir: str, keep: int = 3):
+    """Delete all but the newest `keep` artifacts, never the CURRENT one; 0 keeps all"""
+    if keep <= 0:
+        return
+    output_dir = Path(output_dir)
+    current = (output_dir / CURRENT_FILE).read_text().strip() if (output_dir / CURRENT_FILE).exists() else None
+    versions = sorted(p.name for p in output_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for version in versions[:-keep]:
+        if version != current:
+            shutil.rmtree(output_dir / version)
+            logger.info(f"Removed old index artifact {version}")
+
+class ArtifactCollection:
+    """Read-only collection served from a memory-mapped index artifact
+
+    Vectors, ids, filter columns, BM25 postings and the row store are mapped
+    read-only, so every worker process serving the same artifact shares one
+    copy through the page cache. Semantic search is exact (a dot product over
+    all unit vectors), as in local Qdrant.
+    """
+
+    def __init__(self, directory: str, filter_fields: Optional[Dict[str, str]] = None):
+        self.directory = Path(directory)
+        self.filter_fields = filter_fields or {}
+        self.vectors = np.load(self.directory / "vectors.npy", mmap_mode="r")
+        self.ids = np.load(self.directory / "ids.npy", mmap_mode="r")
+        self.keyword_index = BM25Index.load(self.directory / "bm25", mmap=True)
+        self.rows = RowStore.load(self.directory / "rows", mmap=True)
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def column(self, field: str) -> np.ndarray:
+        """Values of a field per point; fields exported without a column are read from the row store once"""
+        if field not in self._columns:
+            path = self.directory / "columns" / f"{field}.npy"
+            if path.exists():
+                self._columns[field] = np.load(path, mmap_mode="r", allow_pickle=False)
+            else:
+                # Row store and vectors are both in point id order
+                self._columns[field] = filter_column(self.rows.column(field), self.filter_fields.get(field))
+        return self._columns[field]
+
+    def filter_mask(self, query_filter: models.Filter) -> np.ndarray:
+        """Boolean mask over point ids matching query_filter (must conditions only)"""
+        rows = filter_rows(query_filter, self.column, len(self.ids))
+        mask = np.zeros(int(self.ids[-1]) + 1 if len(self.ids) else 0, dtype=bool)
+        mask[self.ids[rows]] = True
+        return mask
+
+    def search(self, query_vector: np.ndarray, limit: int, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (point id, cosine score) by exact search, restricted to `allowed` point ids if given"""
+        if not len(self.ids) or limit <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = self.vectors @ (query / (np.linalg.norm(query) or 1.0))
+        if allowed is not None:
+            rows = (self.ids < len(allowed)) & allowed[np.minimum(self.ids, len(allowed) - 1)]
+            scores = np.where(rows, scores, -np.inf)
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[row]), float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def distinct_values(self, field: str) -> List[Any]:
+        values = self.column(field)
+        if values.dtype.kind == "f":
+            values = values[~np.isnan(values)]
+        elif values.dtype.kind == "U":
+            values = values[values != ""]
+        values = sorted(set(values.tolist()) - {None})
+        if self.filter_fields.get(field) == "integer":
+            # Numeric filter columns are float64 so they can hold NaN
+            values = [int(value) for value in values]
+        return values
+
+def load_artifact(artifact_dir: str, filter_fields: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Any], Dict[str, ArtifactCollection]]:
+    """Manifest and memory-mapped collections of an artifact"""
+    artifact_dir = Path(artifact_dir)
+    manifest = read_manifest(artifact_dir)
+    collections = {
+        name: ArtifactCollection(artifact_dir / name, filter_fields or manifest.get("filter_fields"))
+        for name in manifest["collections"]
+    }
+    return manifest, collections
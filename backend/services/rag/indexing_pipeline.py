@@ -0,0 +1,142 @@
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import asyncio
+import logging
+import os
+import pandas as pd
+from .document_processor import DocumentProcessor
+
+logger = logging.getLogger(__name__)
+
+# Per-worker-process DocumentProcessor (tiktoken encoding loaded once per process)
+_processor: Optional[DocumentProcessor] = None
+
+def _init_worker(chunk_size: int, chunk_overlap: int):
+    global _processor
+    _processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+def _frame_documents(frame: pd.DataFrame, file_path: str) -> List[Dict[str, Any]]:
+    return list(_processor.frame_documents(frame, file_path))
+
+def _html_documents(file_path: str) -> List[Dict[str, Any]]:
+    return _processor.process_html(file_path)
+
+class IndexingPipeline:
+    """Parses sources in a process pool and streams the documents into embedding batches
+
+    CSVs are read in chunks in the parent and each chunk is rendered, tokenized
+    and chunked by a worker process; HTML pages are parsed whole by a worker.
+    Results are consumed in submission order, so document ids do not depend on
+    scheduling, and are embedded into their collection on the inference
+    executor while the workers keep parsing. At most max_pending parse tasks
+    are in flight.
+    """
+
+    def __init__(
+        self,
+        retrieval_service,
+        executor,
+        processes: Optional[int] = None,
+        batch_size: int = 256,
+        max_pending: Optional[int] = None,
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        csv_chunk_rows: int = 50_000
+    ):
+        self.retrieval_service = retrieval_service
+        self.executor = executor
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_pending = max_pending or 2 * self.processes
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.csv_chunk_rows = csv_chunk_rows
+
+    async def run(self, sources: Dict[str, List[str]], progress: Optional[Dict[str, Any]] = None) -> int:
+        """Index the files of each {collection name: paths} entry; returns the number of documents indexed
+
+        If given, progress["documents_processed"], ["documents_embedded"] and
+        ["files_processed"] are incremented as work completes.
+        """
+        if progress is None:
+            progress = {"documents_processed": 0, "documents_embedded": 0, "files_processed": 0}
+
+        # spawn: the parent holds inference threads, which fork does not copy safely
+        pool = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.chunk_size, self.chunk_overlap)
+        )
+        tasks = asyncio.Queue(maxsize=self.max_pending)
+        producer = asyncio.create_task(self._submit_all(pool, sources, tasks))
+        try:
+            indexed = await self._consume(tasks, progress)
+            await producer
+            return indexed
+        finally:
+            producer.cancel()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _submit_all(self, pool: ProcessPoolExecutor, sources: Dict[str, List[str]], tasks: asyncio.Queue):
+        """Submit parse tasks in source order; the bounded queue applies backpressure"""
+        try:
+            for collection_name, paths in sources.items():
+                for path in paths:
+                    if path.endswith('.csv'):
+                        frames = await self.executor.run(pd.read_csv, path, chunksize=self.csv_chunk_rows)
+                        while True:
+                            frame = await self.executor.run(next, frames, None)
+                            if frame is None:
+                                break
+                            future = asyncio.wrap_future(pool.submit(_frame_documents, frame, path))
+                            await tasks.put((collection_name, future))
+                    else:
+                        future = asyncio.wrap_future(pool.submit(_html_documents, path))
+                        await tasks.put((collection_name, future))
+                    await tasks.put((collection_name, path))  # marks the end of a file
+        except asyncio.CancelledError:
+            # run() is tearing down and no longer reads the queue, which may be full
+            raise
+        except Exception:
+            await tasks.put(None)
+            raise
+        await tasks.put(None)
+
+    async def _consume(self, tasks: asyncio.Queue, progress: Dict[str, Any]) -> int:
+        indexed = 0
+        buffer: List[Dict[str, Any]] = []
+        buffer_collection = None
+
+        async def embed(batch, collection_name):
+            nonlocal indexed
+            await self.executor.run(self.retrieval_service.add_documents, batch, collection_name, False)
+            indexed += len(batch)
+            progress["documents_embedded"] += len(batch)
+
+        while True:
+            item = await tasks.get()
+            if item is None:
+                break
+            collection_name, task = item
+            if buffer and collection_name != buffer_collection:
+                await embed(buffer, buffer_collection)
+                buffer = []
+            buffer_collection = collection_name
+
+            if isinstance(task, str):
+                progress["files_processed"] += 1
+                logger.debug(f"Parsed {task}")
+                continue
+
+            documents = await task
+            progress["documents_processed"] += len(documents)
+            buffer.extend(documents)
+            while len(buffer) >= self.batch_size:
+                batch, buffer = buffer[:self.batch_size], buffer[self.batch_size:]
+                await embed(batch, collection_name)
+
+        if buffer:
+            await embed(buffer, buffer_collection)
+        return indexed
@@ -0,0 +1,74 @@
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import asyncio
+import functools
+import logging
+import os
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class InferenceExecutor:
+    """Dedicated thread pool for CPU-bound retrieval work (encoding, vector and BM25 search)
+
+    Keeps that work off the event loop. `intra_op_threads` is the thread budget
+    each worker's model call should use (cores / workers by default) so the
+    workers together don't oversubscribe the CPU; embedding backends apply it.
+    """
+
+    def __init__(self, max_workers: int = 2, intra_op_threads: Optional[int] = None):
+        self.max_workers = max_workers
+        self.intra_op_threads = intra_op_threads or max(1, (os.cpu_count() or 1) // max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-inference")
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn on the pool; cancelling the awaiting task drops it if it hasn't started"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class EventLoopLagMonitor:
+    """Measures how late the event loop wakes a periodic timer
+
+    Lag is the time beyond `interval` between two ticks, i.e. how long some
+    coroutine or callback held the loop.
+    """
+
+    def __init__(self, interval: float = 0.05, window: int = 1200):
+        self.interval = interval
+        self._lags = deque(maxlen=window)
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def reset(self):
+        self._lags.clear()
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._lags.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def snapshot(self) -> Dict[str, float]:
+        """Lag statistics in milliseconds over the recent window"""
+        if not self._lags:
+            return {"samples": 0, "mean_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        lags = np.array(self._lags) * 1000
+        return {
+            "samples": len(lags),
+            "mean_ms": round(float(lags.mean()), 3),
+            "p99_ms": round(float(np.percentile(lags, 99)), 3),
+            "max_ms": round(float(lags.max()), 3),
+        }
@@ -0,0 +1,88 @@
+from typing import List, Tuple
+import asyncio
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+class QueryEmbeddingBatcher:
+    """Coalesces concurrent query embeddings into single model calls
+
+    The first queued query opens a batch; the batch is sent to the model once
+    `max_batch_size` queries have arrived or `max_wait_ms` has passed. While a
+    batch is encoding, new queries keep queueing and form the next batch.
+    """
+
+    def __init__(self, embedding_service, max_batch_size: int = 32, max_wait_ms: float = 5.0, executor=None):
+        self.embedding_service = embedding_service
+        # Optional InferenceExecutor for the model calls; defaults to the loop's executor
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embedding for one query, encoded together with concurrent callers"""
+        loop = asyncio.get_running_loop()
+        self._ensure_worker(loop)
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    def _ensure_worker(self, loop):
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Callers that gave up while waiting don't need encoding
+        return [(text, future) for text, future in batch if not future.done()]
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+            try:
+                embeddings = await self._encode([text for text, _ in batch])
+            except Exception as e:
+                logger.error(f"Failed to embed query batch of {len(batch)}: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+            logger.debug(f"Embedded query batch of {len(batch)}")
+
+    async def _encode(self, texts: List[str]) -> np.ndarray:
+        if self.executor is not None:
+            return await self.executor.run(self.embedding_service.get_query_embeddings, texts)
+        return await self._loop.run_in_executor(None, self.embedding_service.get_query_embeddings, texts)
+
+    async def close(self):
+        """Stop the batching task"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
@@ -0,0 +1,72 @@
+from typing import Any, Dict, Hashable, List, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import re
+import time
+
+def normalize_query(query: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a query"""
+    return re.sub(r'\s+', ' ', query.lower()).strip().rstrip('?.!').strip()
+
+def filters_key(filters: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(filters or {}, sort_keys=True, default=str)
+
+def context_fingerprint(context: List[Dict[str, Any]]) -> str:
+    """Hash of the retrieved documents' texts, in order"""
+    digest = hashlib.blake2b(digest_size=16)
+    for doc in context:
+        digest.update(doc.get("text", "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class TTLCache:
+    """LRU cache whose entries also expire `ttl` seconds after being stored
+
+    Entries are tagged with the version given to sync(); when the version
+    changes the whole cache is dropped, so nothing computed against an older
+    index is ever served. Meant for use from the event loop (not thread-safe).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def sync(self, version: Any):
+        """Invalidate everything if the index version changed"""
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
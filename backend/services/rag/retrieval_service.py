@@ -1,60 +1,496 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional
+from pathlib import Path
 import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
+import asyncio
+import contextlib
 import logging
-from rank_bm25 import BM25Okapi
 import re
+import shutil
+import threading
+import time
+from .bm25_index import BM25Index
+from .row_store import RowStore
+from .index_artifact import ArtifactCollection, filter_rows
+from .rw_lock import ReadWriteLock
 
 logger = logging.getLogger(__name__)
 
+# Constant from the original RRF paper; dampens the advantage of the very top ranks
+RRF_K = 60
+
+# Physical collections of a blue/green collection are named <alias>__v<version>
+VERSION_SEPARATOR = "__v"
+
+def reciprocal_rank_fusion(
+    semantic: List[Tuple[int, float]],
+    keyword: List[Tuple[int, float]],
+    semantic_weight: float = 0.7,
+    k: int = RRF_K
+) -> Dict[int, float]:
+    """Fuse two ranked (doc_id, score) lists by weighted reciprocal rank"""
+    fused: Dict[int, float] = {}
+    for rank, (doc_id, _) in enumerate(semantic):
+        fused[doc_id] = fused.get(doc_id, 0.0) + semantic_weight / (k + rank + 1)
+    for rank, (doc_id, _) in enumerate(keyword):
+        fused[doc_id] = fused.get(doc_id, 0.0) + (1 - semantic_weight) / (k + rank + 1)
+    return fused
+
+def _min_max(hits: List[Tuple[int, float]]) -> Dict[int, float]:
+    """Min-max normalize the scores of one candidate list into [0, 1]"""
+    if not hits:
+        return {}
+    scores = np.array([score for _, score in hits], dtype=np.float64)
+    low, high = scores.min(), scores.max()
+    if high == low:
+        return {doc_id: 1.0 for doc_id, _ in hits}
+    return {doc_id: float((score - low) / (high - low)) for doc_id, score in hits}
+
+def normalized_score_fusion(
+    semantic: List[Tuple[int, float]],
+    keyword: List[Tuple[int, float]],
+    semantic_weight: float = 0.7
+) -> Dict[int, float]:
+    """Fuse two ranked (doc_id, score) lists by a weighted sum of min-max normalized scores"""
+    semantic_norm = _min_max(semantic)
+    keyword_norm = _min_max(keyword)
+    return {
+        doc_id: semantic_weight * semantic_norm.get(doc_id, 0.0)
+        + (1 - semantic_weight) * keyword_norm.get(doc_id, 0.0)
+        for doc_id in semantic_norm.keys() | keyword_norm.keys()
+    }
+
+FUSION_METHODS = {
+    "rrf": reciprocal_rank_fusion,
+    "normalized": normalized_score_fusion,
+}
+
+PAYLOAD_SCHEMAS = {
+    "keyword": models.PayloadSchemaType.KEYWORD,
+    "integer": models.PayloadSchemaType.INTEGER,
+    "float": models.PayloadSchemaType.FLOAT,
+}
+
+def build_filter(filters: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+    """Qdrant filter from {field: value} exact matches and {field: {"gte"/"lte": x}} ranges"""
+    if not filters:
+        return None
+    conditions = []
+    for field, value in filters.items():
+        if isinstance(value, dict):
+            bounds = {op: value[op] for op in ("gt", "gte", "lt", "lte") if value.get(op) is not None}
+            conditions.append(models.FieldCondition(key=field, range=models.Range(**bounds)))
+        elif isinstance(value, (list, tuple, set)):
+            conditions.append(models.FieldCondition(key=field, match=models.MatchAny(any=list(value))))
+        else:
+            conditions.append(models.FieldCondition(key=field, match=models.MatchValue(value=value)))
+    return models.Filter(must=conditions)
+
+def collection_config(dim: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """create_collection() arguments for vector index settings (see configure_collection)"""
+    hnsw_config = None
+    if params.get("hnsw_m") or params.get("hnsw_ef_construct") or params.get("hnsw_on_disk"):
+        hnsw_config = models.HnswConfigDiff(
+            m=params.get("hnsw_m"),
+            ef_construct=params.get("hnsw_ef_construct"),
+            on_disk=params.get("hnsw_on_disk") or None
+        )
+    quantization_config = None
+    if params.get("quantization") == "int8":
+        quantization_config = models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=params.get("quantile", 0.99),
+                always_ram=params.get("always_ram", True)
+            )
+        )
+    elif params.get("quantization"):
+        raise ValueError(f"Unsupported quantization: {params['quantization']}")
+    return {
+        "vectors_config": models.VectorParams(
+            size=dim,
+            distance=models.Distance.COSINE,
+            on_disk=params.get("on_disk") or None
+        ),
+        "hnsw_config": hnsw_config,
+        "quantization_config": quantization_config,
+    }
+
+def search_params(params: Dict[str, Any]) -> Optional[models.SearchParams]:
+    """Query-time HNSW ef and quantized-search settings (see configure_collection)"""
+    quantization = None
+    if params.get("quantization"):
+        # Score on int8 vectors, then rescore the oversampled top hits with the originals
+        quantization = models.QuantizationSearchParams(
+            rescore=params.get("rescore", True),
+            oversampling=params.get("oversampling", 2.0)
+        )
+    if not params.get("search_ef") and quantization is None:
+        return None
+    return models.SearchParams(hnsw_ef=params.get("search_ef"), quantization=quantization)
+
 class RetrievalService:
-    def __init__(self, embedding_service):
+    def __init__(
+        self,
+        embedding_service,
+        index_dir: str = None,
+        query_encoder=None,
+        executor=None,
+        filter_fields: Optional[Dict[str, str]] = None,
+        url: Optional[str] = None,
+        keep_versions: int = 1
+    ):
         self.embedding_service = embedding_service
-        self.qdrant = QdrantClient(":memory:")  # In-memory Qdrant
-        
-        # Initialize BM25 for hybrid search
-        self.bm25 = None
-        self.documents = []
-    
+        # Payload fields that get a Qdrant payload index ({field: "keyword" | "integer" | "float"})
+        self.filter_fields = filter_fields or {}
+        # Per-collection vector index settings, see configure_collection
+        self.collection_params: Dict[str, Dict[str, Any]] = {}
+        # Bumped on every change to a collection; keys caches of search results
+        self._versions: Dict[str, int] = {}
+        # Blue/green collections: alias -> live physical collection, and each
+        # physical version's alias. Superseded versions beyond keep_versions
+        # are dropped when a new one goes live.
+        self.aliases: Dict[str, str] = {}
+        self._version_of: Dict[str, str] = {}
+        self.keep_versions = keep_versions
+        # Optional QueryEmbeddingBatcher shared by concurrent searches
+        self.query_encoder = query_encoder
+        # Optional InferenceExecutor; search stages run there instead of on the event loop
+        self.executor = executor
+        # Searches share the read side of _lock; writers take the write side
+        # only while they mutate keyword indexes, row stores or the embedded
+        # Qdrant client, which is not thread-safe. A Qdrant server is called
+        # without a client-side lock. Writers are serialized by _write_lock.
+        self._lock = ReadWriteLock()
+        self._write_lock = threading.RLock()
+        self._local_qdrant = not url
+        self.index_dir = Path(index_dir) if index_dir else None
+
+        # A Qdrant server (url) builds real HNSW graphs and honors quantization
+        # and on-disk storage; local mode searches exhaustively. Keyword
+        # indexes and row stores are persisted under index_dir either way.
+        if url:
+            self.qdrant = QdrantClient(url=url)
+        elif self.index_dir:
+            self.qdrant = QdrantClient(path=str(self.index_dir / "qdrant"))
+        else:
+            self.qdrant = QdrantClient(":memory:")  # In-memory Qdrant
+
+        # BM25 keyword index per collection, for hybrid search
+        self.keyword_indexes: Dict[str, BM25Index] = {}
+        # Document text and metadata per collection; Qdrant payloads only
+        # carry the filter fields
+        self.row_stores: Dict[str, RowStore] = {}
+        # Read-only collections served from a memory-mapped index artifact
+        # instead of Qdrant, until they are reset and rebuilt
+        self.artifacts: Dict[str, ArtifactCollection] = {}
+
+    def configure_collection(
+        self,
+        collection_name: str,
+        hnsw_m: Optional[int] = None,
+        hnsw_ef_construct: Optional[int] = None,
+        search_ef: Optional[int] = None,
+        on_disk: bool = False,
+        hnsw_on_disk: bool = False,
+        quantization: Optional[str] = None,
+        quantile: float = 0.99,
+        always_ram: bool = True,
+        oversampling: float = 2.0,
+        rescore: bool = True
+    ):
+        """Vector index settings used when the collection is (re)created and searched
+
+        on_disk keeps original vectors in memory-mapped files; quantization
+        ("int8") adds scalar-quantized copies (in RAM if always_ram) that
+        searches score first, rescoring `oversampling` times the requested
+        hits against the originals.
+        """
+        self.collection_params[collection_name] = {
+            "hnsw_m": hnsw_m,
+            "hnsw_ef_construct": hnsw_ef_construct,
+            "search_ef": search_ef,
+            "on_disk": on_disk,
+            "hnsw_on_disk": hnsw_on_disk,
+            "quantization": quantization,
+            "quantile": quantile,
+            "always_ram": always_ram,
+            "oversampling": oversampling,
+            "rescore": rescore,
+        }
+
+    def resolve(self, collection_name: str) -> str:
+        """Physical collection behind a blue/green alias (other names are returned as is)"""
+        return self.aliases.get(collection_name, collection_name)
+
+    def create_version(self, alias: str) -> str:
+        """New, empty physical collection to rebuild `alias` into while the live one keeps serving
+
+        Write to the returned name, then make it live with swap_version().
+        """
+        with self._write_lock:
+            versions = [int(name.rpartition(VERSION_SEPARATOR)[2]) for name in self._physical_versions(alias)]
+            version = max([int(time.time() * 1000)] + [v + 1 for v in versions])
+            physical = f"{alias}{VERSION_SEPARATOR}{version}"
+            with self._lock.write():
+                self._version_of[physical] = alias
+                self.keyword_indexes[physical] = BM25Index()
+                self.row_stores[physical] = RowStore()
+            return physical
+
+    def swap_version(self, alias: str, physical: str):
+        """Atomically point `alias` at `physical`, then drop versions older than keep_versions
+
+        In-flight searches resolved the alias before the swap and finish on the
+        version they started with.
+        """
+        with self._write_lock:
+            replaced_in_place = False
+            with self._qdrant_access(write=True):
+                operations = []
+                existing = {a.alias_name for a in self.qdrant.get_aliases().aliases}
+                if alias in existing:
+                    operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+                elif self.qdrant.collection_exists(alias):
+                    # A collection indexed in place before versioning; the alias replaces it
+                    self.qdrant.delete_collection(alias)
+                    replaced_in_place = True
+                if self.qdrant.collection_exists(physical):
+                    operations.append(models.CreateAliasOperation(
+                        create_alias=models.CreateAlias(collection_name=physical, alias_name=alias)
+                    ))
+                if operations:
+                    self.qdrant.update_collection_aliases(change_aliases_operations=operations)
+            if replaced_in_place:
+                self._forget_collection(alias)
+            self.aliases[alias] = physical
+            self._bump_version(alias)
+            logger.info(f"Collection {alias} now serves {physical}")
+            self._collect_versions(alias)
+
+    def _physical_versions(self, alias: str) -> List[str]:
+        """Known physical versions of an alias, here or in Qdrant, oldest first"""
+        prefix = f"{alias}{VERSION_SEPARATOR}"
+        names = {name for name, owner in self._version_of.items() if owner == alias}
+        with self._qdrant_access():
+            collections = self.qdrant.get_collections().collections
+        names.update(c.name for c in collections if c.name.startswith(prefix))
+        return sorted(
+            (name for name in names if name[len(prefix):].isdigit()),
+            key=lambda name: int(name[len(prefix):])
+        )
+
+    def _collect_versions(self, alias: str):
+        """Drop versions older than the live one, keeping the newest keep_versions of them"""
+        live = self.aliases[alias]
+        versions = self._physical_versions(alias)
+        older = versions[:versions.index(live)] if live in versions else []
+        for physical in older[:max(len(older) - self.keep_versions, 0)]:
+            self.drop_version(physical)
+
+    def drop_version(self, physical: str):
+        """Delete a physical collection that is not live, with its keyword index and row store"""
+        with self._write_lock:
+            if physical in self.aliases.values():
+                raise ValueError(f"Collection {physical} is live")
+            with self._qdrant_access(write=True):
+                if self.qdrant.collection_exists(physical):
+                    self.qdrant.delete_collection(physical)
+            self._forget_collection(physical)
+            with self._lock.write():
+                self._version_of.pop(physical, None)
+                self._versions.pop(physical, None)
+            logger.info(f"Dropped collection version {physical}")
+
+    def _forget_collection(self, name: str):
+        """Drop the keyword index, row store and artifact of a deleted Qdrant collection, in memory and on disk"""
+        with self._lock.write():
+            for store in (self.keyword_indexes, self.row_stores, self.artifacts):
+                store.pop(name, None)
+        if self.index_dir:
+            shutil.rmtree(self._keyword_index_path(name), ignore_errors=True)
+            shutil.rmtree(self.index_dir / "rows" / name, ignore_errors=True)
+
+    def attach_artifact(self, collection_name: str, artifact: ArtifactCollection):
+        """Serve a collection from a prebuilt index artifact (see index_artifact), as a new live version"""
+        with self._write_lock:
+            physical = self.create_version(collection_name)
+            with self._lock.write():
+                self.artifacts[physical] = artifact
+                self.keyword_indexes[physical] = artifact.keyword_index
+                self.row_stores[physical] = artifact.rows
+            self.swap_version(collection_name, physical)
+
+    def reset_collection(self, collection_name: str):
+        """Drop a collection's vector and keyword indexes (in place, for collections without versions)"""
+        collection_name = self.resolve(collection_name)
+        with self._write_lock:
+            with self._qdrant_access(write=True):
+                if self.qdrant.collection_exists(collection_name):
+                    self.qdrant.delete_collection(collection_name)
+            with self._lock.write():
+                self.artifacts.pop(collection_name, None)
+                self.keyword_indexes[collection_name] = BM25Index()
+                self.row_stores[collection_name] = RowStore()
+                self._bump_version(collection_name)
+
     def index_documents(self, documents: List[Dict[str, Any]], collection_name: str):
-        """Index documents in Qdrant and prepare BM25"""
+        """(Re)build a collection's vector and keyword indexes from scratch"""
         try:
-            # Prepare texts and embeddings
-            texts = [doc["text"] for doc in documents]
-            embeddings = self.embedding_service.get_embeddings(texts)
-            
-            # Create or recreate collection
-            self.qdrant.recreate_collection(
-                collection_name=collection_name,
-                vectors_config=models.VectorParams(
-                    size=embeddings.shape[1],
-                    distance=models.Distance.COSINE
-                )
-            )
-            
-            # Index documents
-            self.qdrant.upsert(
-                collection_name=collection_name,
-                points=[
-                    models.PointStruct(
-                        id=i,
-                        vector=embedding.tolist(),
-                        payload={"text": doc["text"], **doc["metadata"]}
-                    )
-                    for i, (doc, embedding) in enumerate(zip(documents, embeddings))
-                ]
-            )
-            
-            # Prepare BM25
-            tokenized_texts = [self._tokenize(text) for text in texts]
-            self.bm25 = BM25Okapi(tokenized_texts)
-            self.documents = documents
-            
+            self.reset_collection(collection_name)
+            self.add_documents(documents, collection_name)
+            self.flush(collection_name)
+
         except Exception as e:
             logger.error(f"Failed to index documents: {e}")
             raise
-    
+
+    def add_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        collection_name: str,
+        flush: bool = True
+    ) -> List[int]:
+        """Incrementally add documents to a collection; returns their point ids
+
+        Batch callers can pass flush=False and call flush() once at the end.
+        """
+        if not documents:
+            return []
+        collection_name = self.resolve(collection_name)
+        if collection_name in self.artifacts:
+            raise ValueError(f"Collection {collection_name} is served from an index artifact; reset it first")
+
+        texts = [doc["text"] for doc in documents]
+        embeddings = self.embedding_service.get_embeddings(texts)
+        tokens = [self._tokenize(text) for text in texts]
+
+        with self._write_lock:
+            with self._lock.write():
+                keyword_index = self._keyword_index(collection_name)
+                row_store = self._row_store(collection_name)
+            with self._qdrant_access(write=True):
+                if not self.qdrant.collection_exists(collection_name):
+                    self.qdrant.create_collection(
+                        collection_name=collection_name,
+                        **collection_config(embeddings.shape[1], self._collection_params(collection_name))
+                    )
+                    for field, schema in self.filter_fields.items():
+                        self.qdrant.create_payload_index(
+                            collection_name=collection_name,
+                            field_name=field,
+                            field_schema=PAYLOAD_SCHEMAS[schema]
+                        )
+
+                # Point ids are shared by the vector and keyword index so their hits
+                # can be joined during fusion; only writers move next_id
+                start = keyword_index.next_id
+                ids = list(range(start, start + len(documents)))
+                self.qdrant.upsert(
+                    collection_name=collection_name,
+                    points=[
+                        models.PointStruct(
+                            id=point_id,
+                            vector=embedding.tolist(),
+                            payload=self._filter_payload(doc["metadata"])
+                        )
+                        for point_id, doc, embedding in zip(ids, documents, embeddings)
+                    ]
+                )
+            with self._lock.write():
+                keyword_index.add(ids, tokens)
+                row_store.add(ids, documents)
+                self._bump_version(collection_name)
+            if flush:
+                self.flush(collection_name)
+        return ids
+
+    def delete_documents(self, ids: List[int], collection_name: str, flush: bool = True):
+        """Remove documents from a collection's vector and keyword indexes"""
+        collection_name = self.resolve(collection_name)
+        if collection_name in self.artifacts:
+            raise ValueError(f"Collection {collection_name} is served from an index artifact; reset it first")
+        with self._write_lock:
+            with self._qdrant_access(write=True):
+                self.qdrant.delete(
+                    collection_name=collection_name,
+                    points_selector=models.PointIdsList(points=list(ids))
+                )
+            with self._lock.write():
+                self._keyword_index(collection_name).delete(ids)
+                self._row_store(collection_name).delete(ids)
+                self._bump_version(collection_name)
+            if flush:
+                self.flush(collection_name)
+
+    def _bump_version(self, collection_name: str):
+        self._versions[collection_name] = self._versions.get(collection_name, 0) + 1
+        # Writes to a live version change what its alias serves
+        alias = self._version_of.get(collection_name)
+        if alias is not None and self.aliases.get(alias) == collection_name:
+            self._versions[alias] = self._versions.get(alias, 0) + 1
+
+    def index_version(self, collection_names: List[str]) -> str:
+        """Identifies the current contents of the given collections; changes on every write"""
+        return ",".join(f"{name}:{self._versions.get(name, 0)}" for name in sorted(collection_names))
+
+    def flush(self, collection_name: str):
+        """Persist the collection's keyword index and row store next to its vectors (no-op in memory)"""
+        collection_name = self.resolve(collection_name)
+        with self._write_lock:
+            if not self.index_dir or collection_name in self.artifacts:
+                return
+            keyword_index = self.keyword_indexes.get(collection_name)
+            row_store = self.row_stores.get(collection_name)
+            if keyword_index is not None:
+                # Compacting rewrites the postings; writing them out only reads
+                with self._lock.write():
+                    keyword_index.compact()
+            with self._lock.read():
+                if keyword_index is not None:
+                    keyword_index.save(self._keyword_index_path(collection_name))
+                if row_store is not None:
+                    row_store.save(self.index_dir / "rows" / collection_name)
+
+    def _keyword_index_path(self, collection_name: str) -> Path:
+        return self.index_dir / "bm25" / collection_name
+
+    def _qdrant_access(self, write: bool = False):
+        """Lock to hold around a Qdrant call: _lock for embedded Qdrant, none for a server"""
+        if not self._local_qdrant:
+            return contextlib.nullcontext()
+        return self._lock.write() if write else self._lock.read()
+
+    def _row_store(self, collection_name: str) -> RowStore:
+        """The collection's row store, loaded from index_dir on first use"""
+        if collection_name not in self.row_stores:
+            path = self.index_dir / "rows" / collection_name if self.index_dir else None
+            if path and path.exists():
+                self.row_stores[collection_name] = RowStore.load(path)
+            else:
+                self.row_stores[collection_name] = RowStore()
+        return self.row_stores[collection_name]
+
+    def _collection_params(self, collection_name: str) -> Dict[str, Any]:
+        """Vector index settings of a collection; versions use their alias's"""
+        alias = self._version_of.get(collection_name, collection_name)
+        return self.collection_params.get(alias, {})
+
+    def _filter_payload(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """The part of a document's metadata stored in Qdrant: its filter fields"""
+        return {field: metadata[field] for field in self.filter_fields if metadata.get(field) is not None}
+
+    def _keyword_index(self, collection_name: str) -> BM25Index:
+        """The collection's BM25 index, loaded from index_dir on first use"""
+        if collection_name not in self.keyword_indexes:
+            path = self._keyword_index_path(collection_name) if self.index_dir else None
+            if path and path.exists():
+                self.keyword_indexes[collection_name] = BM25Index.load(path)
+            else:
+                self.keyword_indexes[collection_name] = BM25Index()
+        return self.keyword_indexes[collection_name]
+
     def _tokenize(self, text: str) -> List[str]:
         """Simple tokenization without NLTK"""
         # Convert to lowercase and split on whitespace
@@ -63,50 +499,250 @@ class RetrievalService:
         words = [re.sub(r'[^\w\s]', '', word) for word in words]
         # Remove empty strings
         return [word for word in words if word]
-    
+
+    async def _run(self, fn, *args):
+        """Run a blocking search stage on the inference executor, if there is one"""
+        if self.executor is not None:
+            return await self.executor.run(fn, *args)
+        return fn(*args)
+
+    async def embed_query(self, query: str) -> np.ndarray:
+        """Query embedding, micro-batched with concurrent queries when a batcher is set"""
+        if self.query_encoder is not None:
+            return await self.query_encoder.embed(query)
+        return await self._run(self.embedding_service.get_query_embedding, query)
+
+    def semantic_search(
+        self,
+        query_vector: np.ndarray,
+        collection_name: str,
+        limit: int,
+        query_filter: Optional[models.Filter] = None
+    ) -> List[Tuple[int, float]]:
+        """Top-k (doc_id, cosine score) candidates from the vector index"""
+        collection_name = self.resolve(collection_name)
+        artifact = self.artifacts.get(collection_name)
+        if artifact is not None:
+            allowed = artifact.filter_mask(query_filter) if query_filter is not None else None
+            return artifact.search(query_vector, limit, allowed)
+        with self._qdrant_access():
+            hits = self.qdrant.search(
+                collection_name=collection_name,
+                query_vector=query_vector.tolist(),
+                query_filter=query_filter,
+                search_params=self._search_params(collection_name),
+                limit=limit,
+                with_payload=False
+            )
+        return [(hit.id, hit.score) for hit in hits]
+
+    def _search_params(self, collection_name: str) -> Optional[models.SearchParams]:
+        return search_params(self._collection_params(collection_name))
+
+    def keyword_search(
+        self,
+        query: str,
+        collection_name: str,
+        limit: int,
+        allowed: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """Top-k (doc_id, BM25 score) candidates from the keyword index"""
+        tokens = self._tokenize(query)
+        collection_name = self.resolve(collection_name)
+        with self._lock.read():
+            return self._keyword_index(collection_name).top_k(tokens, limit, allowed=allowed)
+
+    def filter_mask(self, collection_name: str, query_filter: models.Filter) -> np.ndarray:
+        """Boolean mask over point ids matching query_filter (must conditions only)
+
+        Evaluated locally on the row store's code columns rather than by
+        scrolling the matching ids out of Qdrant.
+        """
+        collection_name = self.resolve(collection_name)
+        if collection_name in self.artifacts:
+            return self.artifacts[collection_name].filter_mask(query_filter)
+        with self._lock.read():
+            row_store = self._row_store(collection_name)
+            ids = row_store.row_ids()
+            rows = filter_rows(
+                query_filter,
+                lambda field: row_store.filter_array(field, self.filter_fields.get(field)),
+                len(ids)
+            )
+            ids = ids[rows & row_store.live_rows()]
+            size = max(self._keyword_index(collection_name).next_id, int(ids.max()) + 1 if len(ids) else 0)
+        mask = np.zeros(size, dtype=bool)
+        mask[ids] = True
+        return mask
+
+    def distinct_values(self, collection_name: str, field: str) -> List[Any]:
+        """Distinct values of a payload field across the collection"""
+        collection_name = self.resolve(collection_name)
+        if collection_name in self.artifacts:
+            return self.artifacts[collection_name].distinct_values(field)
+        values = set()
+        offset = None
+        with self._qdrant_access():
+            while True:
+                points, offset = self.qdrant.scroll(
+                    collection_name=collection_name,
+                    limit=10_000,
+                    offset=offset,
+                    with_payload=[field],
+                    with_vectors=False
+                )
+                values.update(point.payload[field] for point in points if point.payload.get(field) is not None)
+                if offset is None:
+                    return sorted(values)
+
+    def _fetch_results(self, ranked: List[Tuple[int, float]], collection_name: str) -> List[Dict[str, Any]]:
+        """Text and metadata of the final hits from the row store, in rank order, with their scores"""
+        collection_name = self.resolve(collection_name)
+        with self._lock.read():
+            payloads = self._row_store(collection_name).get(doc_id for doc_id, _ in ranked)
+        return [
+            {**payloads[doc_id], "score": score}
+            for doc_id, score in ranked
+            if doc_id in payloads
+        ]
+
     async def hybrid_search(
         self,
         query: str,
         collection_name: str,
         limit: int = 5,
-        semantic_weight: float = 0.7
+        semantic_weight: float = 0.7,
+        fusion: str = "rrf",
+        candidates: int = None,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
-        """Perform hybrid search combining semantic and keyword search"""
+        """Perform hybrid search combining semantic and keyword search
+
+        The top `candidates` hits of each index are fused over their union with
+        reciprocal-rank ("rrf") or min-max normalized score ("normalized") fusion.
+        `filters` (see build_filter) restrict both indexes before scoring.
+        Each blocking stage runs on the executor, so cancelling the calling task
+        (e.g. on client disconnect) stops the search at the next stage boundary.
+        """
         try:
-            # Get semantic search results
-            query_vector = self.embedding_service.get_embedding(query)
-            semantic_results = self.qdrant.search(
-                collection_name=collection_name,
-                query_vector=query_vector.tolist(),
-                limit=limit * 2  # Get more results for reranking
+            query_vector = await self.embed_query(query)
+            return await self._search_collection(
+                query, query_vector, collection_name, limit, semantic_weight, fusion, candidates, filters
             )
-            
-            # Get BM25 results if initialized
-            if self.bm25 is not None:
-                tokenized_query = self._tokenize(query)
-                bm25_scores = self.bm25.get_scores(tokenized_query)
-                
-                # Normalize BM25 scores
-                bm25_scores = (bm25_scores - np.min(bm25_scores)) / (np.max(bm25_scores) - np.min(bm25_scores))
-                
-                # Combine scores
-                combined_results = []
-                for hit, bm25_score in zip(semantic_results, bm25_scores):
-                    combined_score = (
-                        semantic_weight * hit.score +
-                        (1 - semantic_weight) * bm25_score
-                    )
-                    combined_results.append((hit.payload, combined_score))
-                
-                # Sort by combined score
-                combined_results.sort(key=lambda x: x[1], reverse=True)
-                
-                # Return top results
-                return [result[0] for result in combined_results[:limit]]
-            
-            # Fallback to semantic search only
-            return [hit.payload for hit in semantic_results[:limit]]
-            
         except Exception as e:
             logger.error(f"Failed to perform hybrid search: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    async def fanout_search(
+        self,
+        query: str,
+        quotas: Dict[str, int],
+        limit: int = 5,
+        semantic_weight: float = 0.7,
+        fusion: str = "rrf",
+        candidates: int = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Hybrid search over several collections at once, merged under per-collection quotas
+
+        The query is embedded once and every collection in `quotas` is searched
+        concurrently. The candidates of all collections are fused in one pass:
+        semantic hits are ranked together by cosine score and keyword hits by
+        BM25 score, so fused scores compare across collections (per-collection
+        fusion gives every collection's best hit the same score). Results are
+        then taken best-first with at most quotas[collection] from each
+        collection; remaining slots are filled best-first regardless of quota.
+        Results carry a "collection" key.
+        """
+        try:
+            query_vector = await self.embed_query(query)
+        except Exception as e:
+            logger.error(f"Failed to embed query: {e}")
+            return []
+
+        async def search(collection_name):
+            try:
+                return await self._candidates(query, query_vector, collection_name, limit, candidates, filters)
+            except Exception as e:
+                logger.error(f"Failed to search collection {collection_name}: {e}")
+                return collection_name, [], []
+
+        names = list(quotas)
+        per_collection = await asyncio.gather(*(search(name) for name in names))
+        physical = {name: resolved for name, (resolved, _, _) in zip(names, per_collection)}
+        semantic_hits = sorted(
+            (((name, doc_id), score) for name, (_, hits, _) in zip(names, per_collection) for doc_id, score in hits),
+            key=lambda hit: hit[1],
+            reverse=True
+        )
+        keyword_hits = sorted(
+            (((name, doc_id), score) for name, (_, _, hits) in zip(names, per_collection) for doc_id, score in hits),
+            key=lambda hit: hit[1],
+            reverse=True
+        )
+        fused = FUSION_METHODS[fusion](semantic_hits, keyword_hits, semantic_weight)
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+        merged, overflow = [], []
+        taken = dict.fromkeys(names, 0)
+        for (name, doc_id), score in ranked:
+            if taken[name] < quotas[name] and len(merged) < limit:
+                taken[name] += 1
+                merged.append((name, doc_id, score))
+            else:
+                overflow.append((name, doc_id, score))
+        merged.extend(overflow[:limit - len(merged)])
+
+        results = []
+        for name in names:
+            hits = [(doc_id, score) for hit_name, doc_id, score in merged if hit_name == name]
+            if hits:
+                fetched = await self._run(self._fetch_results, hits, physical[name])
+                results.extend({**result, "collection": name} for result in fetched)
+        return sorted(results, key=lambda result: result["score"], reverse=True)
+
+    async def _candidates(
+        self,
+        query: str,
+        query_vector: np.ndarray,
+        collection_name: str,
+        limit: int,
+        candidates: Optional[int],
+        filters: Optional[Dict[str, Any]]
+    ) -> Tuple[str, List[Tuple[int, float]], List[Tuple[int, float]]]:
+        """(physical collection, semantic hits, keyword hits) of one collection for an embedded query"""
+        # Every stage reads the version that was live when the search started
+        collection_name = self.resolve(collection_name)
+        candidates = candidates or max(limit * 4, 20)
+        query_filter = build_filter(filters)
+
+        allowed = None
+        if query_filter is not None:
+            allowed = await self._run(self.filter_mask, collection_name, query_filter)
+            if not allowed.any():
+                return collection_name, [], []
+
+        semantic_hits, keyword_hits = await asyncio.gather(
+            self._run(self.semantic_search, query_vector, collection_name, candidates, query_filter),
+            self._run(self.keyword_search, query, collection_name, candidates, allowed)
+        )
+        return collection_name, semantic_hits, keyword_hits
+
+    async def _search_collection(
+        self,
+        query: str,
+        query_vector: np.ndarray,
+        collection_name: str,
+        limit: int,
+        semantic_weight: float,
+        fusion: str,
+        candidates: Optional[int],
+        filters: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Fused hits of one collection for an already embedded query"""
+        collection_name, semantic_hits, keyword_hits = await self._candidates(
+            query, query_vector, collection_name, limit, candidates, filters
+        )
+        fused = FUSION_METHODS[fusion](semantic_hits, keyword_hits, semantic_weight)
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+        return await self._run(self._fetch_results, ranked[:limit], collection_name)
@@ -0,0 +1,170 @@
+from typing import List, Dict, Any, Iterable, Optional
+from array import array
+from pathlib import Path
+import numpy as np
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+MISSING = -1
+
+def filter_column(values: List[Any], schema: Optional[str]) -> np.ndarray:
+    """Filter column for one payload field: float64 with NaN for numbers, str with '' for keywords"""
+    if schema in ("integer", "float"):
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+    if schema == "keyword":
+        return np.array(["" if value is None else str(value) for value in values], dtype=str)
+    return np.array(values, dtype=object)
+
+class RowStore:
+    """Columnar side store of document text and metadata, keyed by point id
+
+    Texts are one UTF-8 buffer with row offsets. Each metadata field is a
+    column of int32 codes into that field's table of distinct values
+    (MISSING where a row lacks the field), so repeated values such as the
+    source path or neighborhood are stored once. Rows are only read for the
+    final hits of a search; the code columns double as the filter index
+    (filter_array). Deletes drop the id; the space is reclaimed when the
+    collection is rebuilt.
+    """
+
+    def __init__(self):
+        self._ids = array('q')
+        self._rows: Dict[int, int] = {}
+        self._text = bytearray()
+        self._offsets = array('q', [0])
+        self._values: Dict[str, List[Any]] = {}
+        self._codes: Dict[str, Any] = {}
+        self._lookup: Dict[str, Dict[Any, int]] = {}
+        self.read_only = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _code(self, field: str, value: Any) -> int:
+        # Keyed by type as well, so 1 and 1.0 keep their own types
+        key = (type(value).__name__, value)
+        lookup = self._lookup.setdefault(field, {})
+        code = lookup.get(key)
+        if code is None:
+            code = lookup[key] = len(self._values.setdefault(field, []))
+            self._values[field].append(value)
+        return code
+
+    def add(self, ids: Iterable[int], documents: List[Dict[str, Any]]):
+        """Append documents ({"text", "metadata"}) under the given point ids"""
+        if self.read_only:
+            raise ValueError("Row store is read-only")
+        for doc_id, doc in zip(ids, documents):
+            row = len(self._ids)
+            self._ids.append(int(doc_id))
+            self._rows[int(doc_id)] = row
+            self._text += doc["text"].encode("utf-8")
+            self._offsets.append(len(self._text))
+            metadata = doc.get("metadata", {})
+            for field in metadata.keys() - self._codes.keys():
+                self._codes[field] = array('i', [MISSING] * row)
+            for field, codes in self._codes.items():
+                codes.append(self._code(field, metadata[field]) if field in metadata else MISSING)
+
+    def delete(self, ids: Iterable[int]):
+        for doc_id in ids:
+            self._rows.pop(int(doc_id), None)
+
+    def get(self, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """{id: {"text", **metadata}} for the ids present in the store"""
+        result = {}
+        for doc_id in ids:
+            row = self._rows.get(int(doc_id))
+            if row is None:
+                continue
+            record = {"text": bytes(self._text[self._offsets[row]:self._offsets[row + 1]]).decode("utf-8")}
+            for field, codes in self._codes.items():
+                code = int(codes[row])
+                if code != MISSING:
+                    record[field] = self._values[field][code]
+            result[int(doc_id)] = record
+        return result
+
+    def column(self, field: str) -> List[Any]:
+        """A field's value for every live row, in row order (None where missing)"""
+        codes = self._codes.get(field)
+        values = self._values.get(field, [])
+        rows = sorted(self._rows.values())
+        if codes is None:
+            return [None] * len(rows)
+        return [values[codes[row]] if codes[row] != MISSING else None for row in rows]
+
+    def filter_array(self, field: str, schema: Optional[str]) -> np.ndarray:
+        """A field's filter_column over every row, deleted ones included, in row order
+
+        Only the field's distinct values are converted; rows pick theirs up
+        by code, so this costs one vectorized gather per call.
+        """
+        n_rows = len(self._ids)
+        codes = self._codes.get(field)
+        if codes is None:
+            return filter_column([None] * n_rows, schema)
+        # MISSING (-1) picks the trailing None
+        table = filter_column(list(self._values[field]) + [None], schema)
+        return table[np.array(codes, dtype=np.int64)]
+
+    def row_ids(self) -> np.ndarray:
+        """Point id of every row, deleted ones included, in row order"""
+        return np.array(self._ids, dtype=np.int64)
+
+    def live_rows(self) -> np.ndarray:
+        """Boolean mask over rows: False for deleted rows"""
+        live = np.zeros(len(self._ids), dtype=bool)
+        live[np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))] = True
+        return live
+
+    def save(self, directory: str):
+        """Persist live rows compactly as .npy columns, a text buffer and a JSON table of distinct values"""
+        directory = Path(directory)
+        (directory / "codes").mkdir(parents=True, exist_ok=True)
+        live = np.array(sorted(self._rows.values()), dtype=np.int64)
+        offsets = np.asarray(self._offsets, dtype=np.int64)
+        starts, ends = offsets[live], offsets[live + 1]
+
+        with open(directory / "text.bin", "wb") as f:
+            if len(live) == len(self._ids):
+                f.write(self._text)
+            else:
+                for start, end in zip(starts, ends):
+                    f.write(self._text[start:end])
+        np.save(directory / "offsets.npy", np.concatenate([[0], np.cumsum(ends - starts)]).astype(np.int64))
+        np.save(directory / "ids.npy", np.asarray(self._ids, dtype=np.int64)[live])
+        for field, codes in self._codes.items():
+            np.save(directory / "codes" / f"{field}.npy", np.asarray(codes, dtype=np.int32)[live])
+        with open(directory / "values.json", "w", encoding="utf-8") as f:
+            json.dump(self._values, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = False) -> "RowStore":
+        """Load a store written by save(); `mmap` maps it read-only instead of reading it in"""
+        directory = Path(directory)
+        store = cls()
+        with open(directory / "values.json", encoding="utf-8") as f:
+            store._values = json.load(f)
+        mmap_mode = "r" if mmap else None
+        ids = np.load(directory / "ids.npy", mmap_mode=mmap_mode)
+        offsets = np.load(directory / "offsets.npy", mmap_mode=mmap_mode)
+        codes = {field: np.load(directory / "codes" / f"{field}.npy", mmap_mode=mmap_mode) for field in store._values}
+
+        if mmap:
+            store._text = np.memmap(directory / "text.bin", dtype=np.uint8, mode="r") if offsets[-1] else b""
+            store._ids, store._offsets, store._codes = ids, offsets, codes
+            store.read_only = True
+        else:
+            store._text = bytearray((directory / "text.bin").read_bytes())
+            store._ids = array('q', ids.tolist())
+            store._offsets = array('q', offsets.tolist())
+            store._codes = {field: array('i', column.tolist()) for field, column in codes.items()}
+            store._lookup = {
+                field: {(type(value).__name__, value): code for code, value in enumerate(values)}
+                for field, values in store._values.items()
+            }
+        store._rows = {int(doc_id): row for row, doc_id in enumerate(ids)}
+        return store
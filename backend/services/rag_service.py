@@ -1,95 +1,454 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple, TYPE_CHECKING
+import asyncio
 import logging
-from .rag.document_processor import DocumentProcessor
-from .rag.embedding_service import EmbeddingService
-from .rag.retrieval_service import RetrievalService
-from .rag.generation_service import GenerationService
+import time
+from .rag.generation_service import GenerationService, ERROR_RESPONSE
+from .rag.inference_executor import InferenceExecutor, EventLoopLagMonitor
+from .rag.filter_extractor import FilterExtractor
+from .rag.query_cache import TTLCache, normalize_query, filters_key, context_fingerprint
+from config.rag_config import (
+    DATA_DIR, RAG_COLLECTION_PREFIX, RAG_SOURCES, INDEX_BATCH_SIZE,
+    INDEX_PROCESSES, INDEX_MAX_PENDING, INDEX_ARTIFACT_DIR, INDEX_KEEP_VERSIONS, CSV_READ_CHUNK_ROWS, RAG_FILTER_FIELDS, QDRANT_URL,
+    EMBEDDING_MODEL, EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_DTYPE, QUERY_EMBEDDING_CACHE_SIZE,
+    EMBEDDING_BACKEND, ONNX_MODEL_DIR, ONNX_QUANTIZED,
+    QUERY_BATCH_MAX_SIZE, QUERY_BATCH_MAX_WAIT_MS,
+    INFERENCE_WORKERS, INFERENCE_INTRA_OP_THREADS,
+    RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_TTL, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL
+)
 import os
 
+# Retrieval, embedding and indexing modules (qdrant_client, pandas, tiktoken)
+# take about a second to import: they are imported in _load_components and
+# friends, in the background, so importing this module stays cheap
+if TYPE_CHECKING:
+    from .rag.document_processor import DocumentProcessor
+    from .rag.embedding_service import EmbeddingService
+    from .rag.retrieval_service import RetrievalService
+    from .rag.query_batcher import QueryEmbeddingBatcher
+    from .rag.indexing_pipeline import IndexingPipeline
+
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
 class RAGService:
     def __init__(self):
+        # Construction is cheap; models and indexes load in initialize()
+        self.inference_executor = InferenceExecutor(
+            max_workers=INFERENCE_WORKERS,
+            intra_op_threads=INFERENCE_INTRA_OP_THREADS
+        )
+        self.loop_lag_monitor = EventLoopLagMonitor()
+        self.generation_service = GenerationService()
+        # Neighborhood names are filled in from the index once it is built
+        self.filter_extractor = FilterExtractor()
+        self.retrieval_cache = TTLCache(maxsize=RETRIEVAL_CACHE_SIZE, ttl=RETRIEVAL_CACHE_TTL)
+        self.answer_cache = TTLCache(maxsize=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL)
+
+        self.document_processor: Optional["DocumentProcessor"] = None
+        self.embedding_service: Optional["EmbeddingService"] = None
+        self.query_batcher: Optional["QueryEmbeddingBatcher"] = None
+        self.retrieval_service: Optional["RetrievalService"] = None
+
+        self.progress = {
+            "stage": "not_started",
+            "files_total": sum(len(spec["files"]) for spec in RAG_SOURCES.values()),
+            "files_processed": 0,
+            "documents_processed": 0,
+            "documents_embedded": 0,
+            "artifact": None,
+            "started_at": None,
+            "finished_at": None,
+            "error": None
+        }
+        self._init_task = None
+        self._reindex_lock = asyncio.Lock()
+
+    def _load_components(self):
+        """Load tokenizer, embedding model and index (blocking)"""
+        from .rag.document_processor import DocumentProcessor
+        from .rag.embedding_service import EmbeddingService
+        from .rag.retrieval_service import RetrievalService
+        from .rag.query_batcher import QueryEmbeddingBatcher
+
         logger.debug("Initializing RAG Service components...")
         self.document_processor = DocumentProcessor()
-        self.embedding_service = EmbeddingService()
-        self.retrieval_service = RetrievalService(self.embedding_service)
-        self.generation_service = GenerationService()
+        self.embedding_service = EmbeddingService(
+            model_name=EMBEDDING_MODEL,
+            cache_dir=EMBEDDING_CACHE_DIR,
+            cache_dtype=EMBEDDING_CACHE_DTYPE,
+            backend=EMBEDDING_BACKEND,
+            onnx_model_dir=ONNX_MODEL_DIR,
+            onnx_quantized=ONNX_QUANTIZED,
+            intra_op_threads=self.inference_executor.intra_op_threads,
+            query_cache_size=QUERY_EMBEDDING_CACHE_SIZE
+        )
+        self.query_batcher = QueryEmbeddingBatcher(
+            self.embedding_service,
+            max_batch_size=QUERY_BATCH_MAX_SIZE,
+            max_wait_ms=QUERY_BATCH_MAX_WAIT_MS,
+            executor=self.inference_executor
+        )
+        self.retrieval_service = RetrievalService(
+            self.embedding_service,
+            query_encoder=self.query_batcher,
+            executor=self.inference_executor,
+            filter_fields=RAG_FILTER_FIELDS,
+            url=QDRANT_URL,
+            keep_versions=INDEX_KEEP_VERSIONS
+        )
+        for source, spec in RAG_SOURCES.items():
+            vector_settings = {key: value for key, value in spec.items() if key not in ("files", "quota")}
+            self.retrieval_service.configure_collection(self.collection_name(source), **vector_settings)
         logger.debug("RAG Service components initialized")
-        
-    async def process_and_index_data(self):
-        """Process and index all data sources"""
+
+    def _load_artifact(self) -> List[str]:
+        """Attach the collections of the current index artifact, if any (blocking); returns their sources
+
+        Sources whose files changed since the artifact was built, or all of
+        them if it was built with another embedding model or chunking, are
+        left out and get indexed live instead.
+        """
+        from .rag.index_artifact import resolve_artifact, load_artifact, stale_files
+
+        artifact_dir = resolve_artifact(INDEX_ARTIFACT_DIR)
+        if artifact_dir is None:
+            return []
+        try:
+            manifest, collections = load_artifact(artifact_dir, RAG_FILTER_FIELDS)
+        except Exception as e:
+            logger.error(f"Failed to load index artifact {artifact_dir}: {e}")
+            return []
+        if manifest["embedding"]["model"] != self.embedding_service.backend.name:
+            logger.warning(
+                f"Index artifact {manifest['version']} was embedded with {manifest['embedding']['model']}, "
+                f"not {self.embedding_service.backend.name}; indexing on startup instead"
+            )
+            return []
+        chunking = {"chunk_size": self.document_processor.chunk_size, "chunk_overlap": self.document_processor.chunk_overlap}
+        if manifest.get("chunking") != chunking:
+            logger.warning(
+                f"Index artifact {manifest['version']} was chunked with {manifest.get('chunking')}, "
+                f"not {chunking}; indexing on startup instead"
+            )
+            return []
+
+        loaded = []
+        for source, spec in RAG_SOURCES.items():
+            collection = collections.get(self.collection_name(source))
+            if collection is None:
+                continue
+            changed = stale_files(manifest, [os.path.join(DATA_DIR, name) for name in spec["files"]])
+            built_from = manifest.get("sources", {}).get(source, {}).get("files", [])
+            # Files dropped from the source are still in the artifact
+            changed += [name for name in built_from if name not in spec["files"]]
+            if changed:
+                logger.info(
+                    f"Index artifact {manifest['version']} is stale for {source} "
+                    f"({', '.join(os.path.basename(path) for path in changed)} changed); indexing it on startup"
+                )
+                continue
+            self.retrieval_service.attach_artifact(self.collection_name(source), collection)
+            self.progress["files_processed"] += len(spec["files"])
+            self.progress["documents_processed"] += len(collection)
+            self.progress["documents_embedded"] += len(collection)
+            loaded.append(source)
+        self.progress["artifact"] = manifest["version"]
+        logger.info(f"Serving {loaded} from index artifact {manifest['version']}")
+        return loaded
+
+    def start_background_initialization(self) -> asyncio.Task:
+        """Start initialize() as a background task (idempotent)"""
+        if self._init_task is None:
+            self._init_task = asyncio.get_running_loop().create_task(self.initialize())
+        return self._init_task
+
+    async def initialize(self) -> bool:
+        """Load components, then map the index artifact and index whatever sources it lacks"""
+        self.progress.update(stage="loading_models", started_at=time.time())
+        try:
+            await self.inference_executor.run(self._load_components)
+            loaded = await self.inference_executor.run(self._load_artifact)
+        except Exception as e:
+            logger.error(f"Failed to initialize RAG service: {e}", exc_info=True)
+            self.progress.update(stage="failed", error=str(e), finished_at=time.time())
+            return False
+
+        self.progress["stage"] = "indexing"
+        success = await self.process_and_index_data([source for source in RAG_SOURCES if source not in loaded])
+        self.progress.update(stage="ready" if success else "failed", finished_at=time.time())
+        return success
+
+    @property
+    def is_ready(self) -> bool:
+        return self.progress["stage"] == "ready"
+
+    @property
+    def has_documents(self) -> bool:
+        """True once at least one batch is searchable, even if indexing is still running"""
+        return self.progress["documents_embedded"] > 0
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness and indexing progress"""
+        started_at = self.progress["started_at"]
+        end = self.progress["finished_at"] or time.time()
+        return {
+            **self.progress,
+            "ready": self.is_ready,
+            "elapsed_seconds": round(end - started_at, 2) if started_at else 0.0
+        }
+
+    @staticmethod
+    def collection_name(source: str) -> str:
+        return f"{RAG_COLLECTION_PREFIX}{source}"
+
+    def _pipeline(self) -> "IndexingPipeline":
+        from .rag.indexing_pipeline import IndexingPipeline
+
+        return IndexingPipeline(
+            self.retrieval_service,
+            self.inference_executor,
+            processes=INDEX_PROCESSES,
+            batch_size=INDEX_BATCH_SIZE,
+            max_pending=INDEX_MAX_PENDING,
+            chunk_size=self.document_processor.chunk_size,
+            chunk_overlap=self.document_processor.chunk_overlap,
+            csv_chunk_rows=CSV_READ_CHUNK_ROWS
+        )
+
+    async def _index_sources(self, sources: List[str], progress: Dict[str, Any]) -> int:
+        """Rebuild the collections of the given sources from their files, blue/green
+
+        Each source is indexed into a new version of its collection while
+        queries keep hitting the live one, which is swapped out only once the
+        new version is complete. A source with no live version yet is swapped
+        in right away, so a first build is searchable as it progresses.
+        """
+        retrieval = self.retrieval_service
+        versions = {}
+        for source in sources:
+            alias = self.collection_name(source)
+            versions[alias] = await self.inference_executor.run(retrieval.create_version, alias)
+            if alias not in retrieval.aliases:
+                await self.inference_executor.run(retrieval.swap_version, alias, versions[alias])
+
+        files = {
+            versions[self.collection_name(source)]: [os.path.join(DATA_DIR, name) for name in RAG_SOURCES[source]["files"]]
+            for source in sources
+        }
+        try:
+            indexed = await self._pipeline().run(files, progress=progress)
+        except BaseException:
+            for alias, physical in versions.items():
+                if retrieval.aliases.get(alias) != physical:
+                    await self.inference_executor.run(retrieval.drop_version, physical)
+            raise
+
+        for alias, physical in versions.items():
+            await self.inference_executor.run(retrieval.flush, physical)
+            # Also (re)points the Qdrant alias of a first build, whose collection
+            # did not exist yet when it went live
+            await self.inference_executor.run(retrieval.swap_version, alias, physical)
+        await self._refresh_neighborhoods()
+        return indexed
+
+    async def _refresh_neighborhoods(self):
+        """Teach the filter extractor the neighborhood names present in the index"""
+        neighborhoods = set()
+        for source in RAG_SOURCES:
+            try:
+                neighborhoods.update(await self.inference_executor.run(
+                    self.retrieval_service.distinct_values, self.collection_name(source), "neighborhood"
+                ))
+            except Exception as e:
+                logger.debug(f"No neighborhoods from {source}: {e}")
+        self.filter_extractor.set_neighborhoods(neighborhoods)
+
+    async def process_and_index_data(self, sources: Optional[List[str]] = None):
+        """Process and index the given data sources (default: all)
+
+        Sources are parsed in a process pool and their documents embedded in
+        batches as they arrive, so queries allowing a partial index can be
+        served once the first batch is in.
+        """
+        sources = list(RAG_SOURCES) if sources is None else sources
         try:
             logger.debug("Starting data processing and indexing...")
-            # Get the current directory (backend)
-            current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            data_dir = os.path.join(current_dir, 'data')
-            logger.debug(f"Data directory: {data_dir}")
-            
-            # Process CSV files
-            logger.debug("Processing CSV files...")
-            listings = self.document_processor.process_csv(os.path.join(data_dir, 'bayut_listings_enriched.csv'))
-            logger.debug(f"Processed {len(listings)} listings")
-            
-            market_data = self.document_processor.process_csv(os.path.join(data_dir, 'area_stats.csv'))
-            logger.debug(f"Processed {len(market_data)} market data entries")
-            
-            historical = self.document_processor.process_csv(os.path.join(data_dir, 'historical_data.csv'))
-            logger.debug(f"Processed {len(historical)} historical entries")
-            
-            # Process HTML files
-            logger.debug("Processing HTML files...")
-            page1 = self.document_processor.process_html(os.path.join(data_dir, 'page_1_bs4.html'))
-            logger.debug(f"Processed page 1 with {len(page1)} chunks")
-            
-            page2 = self.document_processor.process_html(os.path.join(data_dir, 'page_2_bs4.html'))
-            logger.debug(f"Processed page 2 with {len(page2)} chunks")
-            
-            # Combine all documents
-            all_documents = listings + market_data + historical + page1 + page2
-            logger.debug(f"Total documents to index: {len(all_documents)}")
-            
-            # Index documents
-            logger.debug("Indexing documents in Qdrant...")
-            self.retrieval_service.index_documents(all_documents, "real_estate_knowledge")
-            logger.debug("Document indexing completed")
-            
+            logger.debug(f"Data directory: {DATA_DIR}")
+            async with self._reindex_lock:
+                if sources:
+                    await self._index_sources(sources, self.progress)
+                else:
+                    await self._refresh_neighborhoods()
+            logger.debug(f"Document indexing completed: {self.progress['documents_embedded']} documents")
             return True
-            
+
         except Exception as e:
             logger.error(f"Failed to process and index data: {e}", exc_info=True)
+            self.progress["error"] = str(e)
             return False
-    
-    async def query(self, query: str, limit: int = 5) -> Dict[str, Any]:
-        """Query the RAG system"""
-        try:
-            logger.debug(f"Processing query: {query}")
-            # Get relevant documents
-            logger.debug("Retrieving relevant documents...")
-            context = await self.retrieval_service.hybrid_search(
+
+    async def reindex_source(self, source: str) -> Dict[str, Any]:
+        """Rebuild one source's collection without touching the others; queries keep being served meanwhile"""
+        if source not in RAG_SOURCES:
+            raise ValueError(f"Unknown RAG source: {source}")
+        progress = {"documents_processed": 0, "documents_embedded": 0, "files_processed": 0}
+        started = time.time()
+        async with self._reindex_lock:
+            await self._index_sources([source], progress)
+        logger.info(f"Reindexed {source}: {progress['documents_embedded']} documents")
+        return {"source": source, **progress, "elapsed_seconds": round(time.time() - started, 2)}
+
+    async def _retrieve(
+        self,
+        query: str,
+        limit: int,
+        filters: Optional[Dict[str, Any]],
+        extract_filters: bool,
+        sources: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """Filters, packed context and cache state for a query, up to generation"""
+        if extract_filters:
+            filters = {**self.filter_extractor.extract(query), **(filters or {})}
+
+        # Get relevant documents from every source collection at once
+        logger.debug("Retrieving relevant documents...")
+        quotas = {
+            self.collection_name(source): spec["quota"]
+            for source, spec in RAG_SOURCES.items()
+            if not sources or source in sources
+        }
+        # Any write to any source moves the version and empties both caches
+        version = self.retrieval_service.index_version([self.collection_name(source) for source in RAG_SOURCES])
+        self.retrieval_cache.sync(version)
+        self.answer_cache.sync(version)
+
+        retrieval_key = (normalize_query(query), filters_key(filters), tuple(sorted(quotas.items())), limit)
+        context = self.retrieval_cache.get(retrieval_key)
+        retrieval_cached = context is not None
+        if not retrieval_cached:
+            context = await self.retrieval_service.fanout_search(
                 query=query,
-                collection_name="real_estate_knowledge",
-                limit=limit
+                quotas=quotas,
+                limit=limit,
+                filters=filters
             )
-            logger.debug(f"Retrieved {len(context)} relevant documents")
-            
+            if context:
+                self.retrieval_cache.put(retrieval_key, context)
+        logger.debug(f"Retrieved {len(context)} relevant documents (cached: {retrieval_cached})")
+
+        # Fit the documents into the model's prompt budget
+        context, context_stats = await self.inference_executor.run(self.generation_service.pack_context, context)
+        return {
+            "context": context,
+            "filters": filters or {},
+            "context_stats": context_stats,
+            "retrieval_cached": retrieval_cached,
+            "answer_key": (normalize_query(query), context_fingerprint(context), self.generation_service.model_name)
+        }
+
+    async def query(
+        self,
+        query: str,
+        limit: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        extract_filters: bool = False,
+        sources: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Query the RAG system
+
+        `filters` restrict retrieval to matching payloads (see build_filter);
+        with extract_filters, filters derived from the query text are added,
+        explicit ones taking precedence. `sources` limits the fan-out to some
+        of the configured sources.
+        """
+        try:
+            logger.debug(f"Processing query: {query}")
+            retrieved = await self._retrieve(query, limit, filters, extract_filters, sources)
+            context = retrieved["context"]
+
             # Generate response
-            logger.debug("Generating response...")
-            response = await self.generation_service.generate_response(
-                query=query,
-                context=context
-            )
-            logger.debug("Response generated successfully")
-            
+            response = self.answer_cache.get(retrieved["answer_key"])
+            answer_cached = response is not None
+            if not answer_cached:
+                logger.debug("Generating response...")
+                response = await self.generation_service.generate_response(
+                    query=query,
+                    context=context
+                )
+                # An answer without context ("I can't find that") would outlive
+                # the documents that could answer it once they are indexed
+                if context and response != ERROR_RESPONSE:
+                    self.answer_cache.put(retrieved["answer_key"], response)
+                logger.debug("Response generated successfully")
+
             return {
                 "response": response,
-                "context": context
+                "context": context,
+                "filters": retrieved["filters"],
+                "context_stats": retrieved["context_stats"],
+                "cached": {"retrieval": retrieved["retrieval_cached"], "answer": answer_cached}
             }
-            
+
         except Exception as e:
             logger.error(f"Failed to process query: {e}", exc_info=True)
             return {
                 "response": "I apologize, but I encountered an error processing your query.",
                 "context": []
-            }
\ No newline at end of file
+            }
+
+    async def query_stream(
+        self,
+        query: str,
+        limit: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        extract_filters: bool = False,
+        sources: Optional[List[str]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Query the RAG system, yielding (event, data) pairs as results become available
+
+        Yields ("sources", {...}) with the retrieved context first, then
+        ("token", text) fragments of the answer, then ("done", {...}); on
+        failure the last event is ("error", {"detail": ...}).
+        """
+        try:
+            logger.debug(f"Processing streaming query: {query}")
+            retrieved = await self._retrieve(query, limit, filters, extract_filters, sources)
+            yield "sources", {
+                "context": retrieved["context"],
+                "filters": retrieved["filters"],
+                "context_stats": retrieved["context_stats"]
+            }
+
+            response = self.answer_cache.get(retrieved["answer_key"])
+            answer_cached = response is not None
+            if answer_cached:
+                yield "token", response
+            else:
+                fragments = []
+                async for fragment in self.generation_service.stream_response(query, retrieved["context"]):
+                    fragments.append(fragment)
+                    yield "token", fragment
+                # Only reached once Ollama sent its final chunk without an error;
+                # a failed or abandoned stream never caches a partial answer
+                if retrieved["context"]:
+                    self.answer_cache.put(retrieved["answer_key"], "".join(fragments))
+
+            yield "done", {"cached": {"retrieval": retrieved["retrieval_cached"], "answer": answer_cached}}
+
+        except Exception as e:
+            logger.error(f"Failed to process streaming query: {e}", exc_info=True)
+            yield "error", {"detail": "I apologize, but I encountered an error processing your query."}
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            "retrieval": self.retrieval_cache.stats(),
+            "answer": self.answer_cache.stats()
+        }
+
+    async def shutdown(self):
+        if self._init_task is not None and not self._init_task.done():
+            self._init_task.cancel()
+        if self.query_batcher is not None:
+            await self.query_batcher.close()
+        self.loop_lag_monitor.stop()
+        self.inference_executor.shutdown()
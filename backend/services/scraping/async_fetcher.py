@@ -0,0 +1,143 @@
+from typing import List, Dict, Optional, Union, Callable
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import asyncio
+import logging
+import random
+import time
+import httpx
+from config.scraper_config import (
+    SCRAPER_CONCURRENCY, SCRAPER_HOST_RATE, SCRAPER_HOST_BURST, SCRAPER_TIMEOUT,
+    SCRAPER_MAX_RETRIES, SCRAPER_BACKOFF_BASE, SCRAPER_MAX_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, in bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), if any"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class AsyncFetcher:
+    """Concurrent page fetches over one pooled httpx.AsyncClient
+
+    A window of `concurrency` requests is in flight at once, connections are
+    kept alive and reused across pages, and every request first takes a token
+    from its host's bucket. Transient failures are retried with backoff.
+    `headers` is either sent with every request or, if callable, called for
+    fresh headers (e.g. a rotated User-Agent) on each attempt. Use as an
+    async context manager:
+
+        async with AsyncFetcher(headers=headers) as fetcher:
+            responses = await fetcher.fetch_all(urls)
+    """
+
+    def __init__(
+        self,
+        headers: Optional[Union[Dict[str, str], Callable[[], Dict[str, str]]]] = None,
+        concurrency: int = SCRAPER_CONCURRENCY,
+        host_rate: float = SCRAPER_HOST_RATE,
+        host_burst: int = SCRAPER_HOST_BURST,
+        timeout: float = SCRAPER_TIMEOUT,
+        max_retries: int = SCRAPER_MAX_RETRIES,
+        backoff_base: float = SCRAPER_BACKOFF_BASE,
+        proxy: Optional[str] = None
+    ):
+        self.headers = headers or {}
+        self.concurrency = max(concurrency, 1)
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.proxy = proxy
+        self.client: Optional[httpx.AsyncClient] = None
+        self._window: Optional[asyncio.Semaphore] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        self.client = httpx.AsyncClient(
+            headers=None if callable(self.headers) else self.headers,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            proxy=self.proxy
+        )
+        self._window = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    def _bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return self._buckets[host]
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """GET a URL, retrying transient failures; raises httpx.HTTPError once retries run out"""
+        bucket = self._bucket(httpx.URL(url).host)
+        for attempt in range(self.max_retries + 1):
+            delay = None
+            async with self._window:
+                await bucket.acquire()
+                try:
+                    request_headers = self.headers() if callable(self.headers) else {}
+                    response = await self.client.get(url, headers={**request_headers, **(headers or {})})
+                    # 304 answers a conditional request; the caller holds the cached copy
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                    return response
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code not in RETRY_STATUSES:
+                        raise
+                    error, delay = e, _retry_after(e.response)
+                except httpx.TransportError as e:
+                    error = e
+
+            if attempt == self.max_retries:
+                raise error
+            if delay is None:
+                delay = self.backoff_base * 2 ** attempt * random.uniform(0.5, 1.5)
+            delay = min(delay, SCRAPER_MAX_BACKOFF)
+            logger.warning(f"Fetching {url} failed ({error!r}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            # Back off outside the window so other pages keep going
+            await asyncio.sleep(delay)
+
+    async def fetch_all(self, urls: List[str]) -> List[Union[httpx.Response, Exception]]:
+        """Fetch all URLs concurrently; results are in URL order, failures as the exception raised"""
+        return await asyncio.gather(*(self.fetch(url) for url in urls), return_exceptions=True)
@@ -0,0 +1,129 @@
+from typing import List, Dict, Any, Optional, Callable, AsyncIterator, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import asyncio
+import logging
+import os
+import httpx
+from .async_fetcher import AsyncFetcher
+from .response_cache import ResponseCache, body_digest
+from .page_archive import ArchiveRun
+from config.scraper_config import SCRAPER_PARSE_PROCESSES, SCRAPER_MAX_PENDING_PAGES
+
+logger = logging.getLogger(__name__)
+
+class CrawlPipeline:
+    """Fetches result pages and parses them in a process pool, overlapping the two
+
+    One task per URL fetches through the AsyncFetcher (its window and per-host
+    rate limit apply) and puts the page HTML on a bounded queue as soon as it
+    arrives; parser tasks take pages off the queue and run `parse_page` (a
+    module-level function, HTML -> list of listing dicts) in worker processes.
+    A full queue holds the fetch stage back, so at most max_pending pages wait
+    in memory. `on_page(index, url, response)`, if given, is called in the
+    event loop for every fetched page before it is queued.
+
+    With a ResponseCache, pages still fresh in the cache are not requested,
+    others are requested conditionally, and a page whose server answers 304
+    or whose body hash is unchanged yields its cached listings unparsed.
+    With an ArchiveRun, every page of the crawl is recorded in the archive;
+    pages served from the cache are recorded by the hash of their cached body.
+    """
+
+    def __init__(
+        self,
+        fetcher: AsyncFetcher,
+        parse_page: Callable[[str], List[Dict[str, Any]]],
+        processes: Optional[int] = SCRAPER_PARSE_PROCESSES,
+        max_pending: Optional[int] = SCRAPER_MAX_PENDING_PAGES,
+        on_page: Optional[Callable[[int, str, httpx.Response], None]] = None,
+        cache: Optional[ResponseCache] = None,
+        archive: Optional[ArchiveRun] = None
+    ):
+        self.fetcher = fetcher
+        self.parse_page = parse_page
+        self.processes = processes or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.processes
+        self.on_page = on_page
+        self.cache = cache
+        self.archive = archive
+        self.stats = {"fetched": 0, "not_modified": 0, "unchanged": 0, "cached": 0, "parsed": 0}
+
+    async def run(self, urls: List[str]) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Yield (URL index, listings) for every URL as its page is parsed, in completion order
+
+        A page that could not be fetched or parsed yields an empty list.
+        """
+        if not urls:
+            return
+        self.stats = dict.fromkeys(self.stats, 0)
+        processes = min(self.processes, len(urls))
+        pool: List[ProcessPoolExecutor] = []
+        pages = asyncio.Queue(maxsize=self.max_pending)
+        results = asyncio.Queue()
+        tasks = [asyncio.create_task(self._fetch(index, url, pages, results)) for index, url in enumerate(urls)]
+        tasks += [asyncio.create_task(self._parse(pool, processes, pages, results)) for _ in range(processes)]
+        try:
+            for _ in urls:
+                yield await results.get()
+            logger.info(f"Crawled {len(urls)} pages: {self.stats}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            for executor in pool:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _fetch(self, index: int, url: str, pages: asyncio.Queue, results: asyncio.Queue):
+        try:
+            entry = self.cache.get(url) if self.cache is not None else None
+            if self.cache is not None and self.cache.is_fresh(entry):
+                self.stats["cached"] += 1
+                if self.archive is not None:
+                    self.archive.reference(index, url, entry["body_hash"])
+                await results.put((index, entry["listings"]))
+                return
+
+            response = await self.fetcher.fetch(url, headers=ResponseCache.conditional_headers(entry))
+            self.stats["fetched"] += 1
+            digest = body_digest(response.content) if response.status_code != 304 else None
+            if entry is not None and (response.status_code == 304 or digest == entry["body_hash"]):
+                self.stats["not_modified" if response.status_code == 304 else "unchanged"] += 1
+                self.cache.revalidated(entry, response)
+                if self.archive is not None:
+                    self.archive.reference(index, url, entry["body_hash"])
+                await results.put((index, entry["listings"]))
+                return
+            if response.status_code == 304:
+                raise httpx.HTTPStatusError("304 Not Modified without a cached copy", request=response.request, response=response)
+
+            if self.archive is not None:
+                self.archive.add(index, url, response, digest)
+            if self.on_page is not None:
+                self.on_page(index, url, response)
+        except httpx.HTTPError as e:
+            logger.error(f"Network error fetching {url}: {str(e)}")
+            await results.put((index, []))
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {str(e)}")
+            await results.put((index, []))
+        else:
+            await pages.put((index, url, response, digest))
+
+    async def _parse(self, pool: List[ProcessPoolExecutor], processes: int, pages: asyncio.Queue, results: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            index, url, response, digest = await pages.get()
+            if not pool:
+                # Started on the first page to parse, so a fully cached crawl spawns nothing.
+                # spawn: the API process holds inference threads, which fork does not copy safely
+                pool.append(ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")))
+            try:
+                listings = await loop.run_in_executor(pool[0], self.parse_page, response.text)
+                self.stats["parsed"] += 1
+                logger.info(f"Parsed {len(listings)} listings from {url}")
+                if self.cache is not None:
+                    self.cache.put(url, response, digest, listings)
+            except Exception as e:
+                logger.error(f"Error parsing {url}: {str(e)}")
+                listings = []
+            await results.put((index, listings))
@@ -0,0 +1,164 @@
+from typing import List, Dict, Optional, Tuple, Callable
+import importlib.util
+import logging
+import re
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from config.scraper_config import SCRAPER_HTML_PARSER, SCRAPER_TARGETED_PARSE
+
+logger = logging.getLogger(__name__)
+
+# The selector forms the scrapers use: tag, tag.class, [attr*='value'], tag[attr*='value']
+SIMPLE_SELECTOR = re.compile(r"""^(?P<tag>[\w-]*)(?:\.(?P<cls>[\w-]+))?(?:\[(?P<attr>[\w-]+)\*=['"](?P<value>[^'"]+)['"]\])?$""")
+
+_backend: Optional[str] = None
+
+def parser_backend() -> str:
+    """The configured BeautifulSoup tree builder, or html.parser if it is not installed"""
+    global _backend
+    if _backend is None:
+        _backend = SCRAPER_HTML_PARSER
+        if _backend != "html.parser" and importlib.util.find_spec(_backend.split("-")[0]) is None:
+            logger.warning(f"HTML parser {_backend} is not installed, falling back to html.parser")
+            _backend = "html.parser"
+    return _backend
+
+def _simple_selector(selector: str) -> Optional[Tuple[str, str, str, str]]:
+    """(tag, class, attribute, substring) of a simple CSS selector, None if it is not one"""
+    match = SIMPLE_SELECTOR.match(selector.strip())
+    if not match or not any(match.groupdict().values()):
+        return None
+    return match.group("tag", "cls", "attr", "value")
+
+def _selector_xpath(selector: str) -> Optional[str]:
+    parts = _simple_selector(selector)
+    if parts is None:
+        return None
+    tag, cls, attr, value = parts
+    conditions = []
+    if cls:
+        conditions.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')")
+    if attr:
+        conditions.append(f"contains(@{attr}, '{value}')")
+    return f"//{tag or '*'}" + "".join(f"[{condition}]" for condition in conditions)
+
+def _selector_rule(selector: str) -> Optional[Callable[[str, Dict], bool]]:
+    """Predicate on (tag name, raw attributes) equivalent to a simple CSS selector, None if not simple"""
+    parts = _simple_selector(selector)
+    if parts is None:
+        return None
+    tag, cls, attr, value = parts
+
+    def rule(name: str, attrs: Dict) -> bool:
+        if tag and name != tag:
+            return False
+        if cls:
+            classes = attrs.get("class") or []
+            if cls not in (classes.split() if isinstance(classes, str) else classes):
+                return False
+        if attr:
+            actual = attrs.get(attr)
+            if actual is None:
+                return False
+            if value not in (actual if isinstance(actual, str) else " ".join(actual)):
+                return False
+        return True
+    return rule
+
+class CardStrainer(SoupStrainer):
+    """Builds only elements matching any of the given rules, with their subtrees
+
+    Everything outside those subtrees is skipped while parsing, so no tree is
+    built for page chrome, scripts and inline data. Implements the parse-time
+    hooks of both beautifulsoup4 4.12 (search_tag) and 4.13+
+    (allow_tag_creation / allow_string_creation).
+    """
+
+    def __init__(self, rules: List[Callable[[str, Dict], bool]]):
+        super().__init__()
+        self.rules = rules
+
+    def keeps(self, name, attrs) -> bool:
+        attrs = attrs or {}
+        return any(rule(name, attrs) for rule in self.rules)
+
+    @property
+    def includes_everything(self) -> bool:
+        return False
+
+    @property
+    def excludes_everything(self) -> bool:
+        return False
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self.keeps(name, attrs)
+
+    def allow_string_creation(self, string) -> bool:
+        # Only asked about text outside every kept element
+        return False
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        if isinstance(markup_name, Tag):
+            return markup_name if self.keeps(markup_name.name, markup_name.attrs) else None
+        return self.keeps(markup_name, markup_attrs)
+
+def card_strainer(selectors: List[str]) -> Optional[CardStrainer]:
+    """A strainer keeping everything any of the selectors can match, None if one is not a simple selector"""
+    rules = [_selector_rule(selector) for selector in selectors]
+    if not rules or None in rules:
+        return None
+    return CardStrainer(rules)
+
+def _lxml_card_fragment(html: str, selectors: List[str]) -> Optional[Tuple[Optional[str], str]]:
+    """(first matching selector, HTML of its outermost matches) located with lxml, None if not possible
+
+    lxml builds its tree in C, so finding the cards costs a fraction of
+    building a BeautifulSoup tree for the page.
+    """
+    xpaths = [_selector_xpath(selector) for selector in selectors]
+    if None in xpaths:
+        return None
+    import lxml.html
+    try:
+        root = lxml.html.fromstring(html)
+    except (ValueError, lxml.etree.ParserError) as e:
+        logger.debug(f"lxml could not parse page, using BeautifulSoup: {str(e)}")
+        return None
+    for selector, xpath in zip(selectors, xpaths):
+        cards = root.xpath(xpath)
+        if cards:
+            # Nested matches are serialized with their outermost match
+            matched = set(cards)
+            outermost = [card for card in cards if not any(parent in matched for parent in card.iterancestors())]
+            return selector, "".join(lxml.html.tostring(card, encoding="unicode", with_tail=False) for card in outermost)
+    return None, ""
+
+def select_cards(
+    html: str,
+    selectors: List[str],
+    parser: Optional[str] = None,
+    targeted: bool = SCRAPER_TARGETED_PARSE
+) -> Tuple[Optional[str], List[Tag]]:
+    """Parse a page and return (selector, cards) for the first selector that matches anything
+
+    With `targeted`, BeautifulSoup only builds the card subtrees: with lxml
+    they are located with XPath and only the first matching selector's cards
+    are handed to BeautifulSoup; with other parsers a CardStrainer skips
+    everything outside the subtrees the selectors can match. Either way the
+    cards, and their order, are those a full parse would select.
+    """
+    parser = parser or parser_backend()
+    if targeted and parser == "lxml":
+        found = _lxml_card_fragment(html, selectors)
+        if found is not None:
+            selector, fragment = found
+            if selector is None:
+                return None, []
+            return selector, BeautifulSoup(fragment, "lxml").select(selector)
+
+    strainer = card_strainer(selectors) if targeted else None
+    soup = BeautifulSoup(html, parser, parse_only=strainer)
+    for selector in selectors:
+        cards = soup.select(selector)
+        if cards:
+            return selector, cards
+    return None, []
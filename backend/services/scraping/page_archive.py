@@ -0,0 +1,252 @@
+from typing import List, Dict, Any, Optional, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+import argparse
+import importlib
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+import httpx
+import zstandard
+from .response_cache import body_digest
+from config.scraper_config import SCRAPER_ARCHIVE_DIR, SCRAPER_ARCHIVE_KEEP_RUNS, SCRAPER_ARCHIVE_LEVEL
+
+logger = logging.getLogger(__name__)
+
+def _parser_name(parse_page: Optional[Callable]) -> Optional[str]:
+    """Import path of a parse function, if it can be imported again for replay
+
+    A function defined in a script run with `python -m` is named by the
+    script's module; one in a script run by path cannot be imported again.
+    """
+    if parse_page is None:
+        return None
+    module = parse_page.__module__
+    if module == "__main__":
+        spec = getattr(sys.modules["__main__"], "__spec__", None)
+        if spec is None:
+            return None
+        module = spec.name
+    return f"{module}:{parse_page.__qualname__}"
+
+def load_parser(name: str) -> Callable[[str], List[Dict[str, Any]]]:
+    """The parse function named module:function"""
+    module, _, function = name.partition(":")
+    if not module or not function:
+        raise ValueError(f"Parser must be given as module:function, not {name!r}")
+    return getattr(importlib.import_module(module), function)
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+class ArchiveRun:
+    """Pages of one crawl being written to a PageArchive
+
+    add() queues a fetched page for a background thread that compresses and
+    stores it, so the crawl never waits on compression or disk; reference()
+    records a page whose body is already archived (e.g. a 304). close() waits
+    for the writer and then writes the run manifest.
+    """
+
+    def __init__(self, archive: "PageArchive", source: str, parser: Optional[str]):
+        self.archive = archive
+        self.source = source
+        self.parser = parser
+        self.started_at = datetime.now(timezone.utc)
+        self.run_id = f"{self.started_at.strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:6]}"
+        self.pages: Dict[int, Dict[str, Any]] = {}
+        self._queue: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_pages, name=f"page-archive-{self.run_id}", daemon=True)
+        self._writer.start()
+
+    def add(self, index: int, url: str, response: httpx.Response, digest: Optional[str] = None) -> str:
+        """Archive a fetched page; returns its content hash"""
+        body = response.content
+        digest = digest or body_digest(body)
+        self.reference(index, url, digest, len(body), response.encoding)
+        self._queue.put((digest, body))
+        return digest
+
+    def reference(self, index: int, url: str, digest: str, size: Optional[int] = None, encoding: Optional[str] = None):
+        """Record a page whose content is already in the archive"""
+        self.pages[index] = {
+            "page": index + 1,
+            "url": url,
+            "digest": digest,
+            "bytes": size,
+            "encoding": encoding,
+            "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+
+    def _write_pages(self):
+        compressor = zstandard.ZstdCompressor(level=self.archive.level)
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            digest, body = item
+            try:
+                path = self.archive.object_path(digest)
+                if not path.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    _write_atomic(path, compressor.compress(body))
+            except Exception as e:
+                logger.error(f"Error archiving page {digest}: {str(e)}")
+
+    def close(self) -> Path:
+        """Finish writing pages and the manifest, then apply retention; returns the manifest path"""
+        self._queue.put(None)
+        self._writer.join()
+        manifest = {
+            "run_id": self.run_id,
+            "source": self.source,
+            "parser": self.parser,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "pages": [self.pages[index] for index in sorted(self.pages)],
+        }
+        path = self.archive.manifest_path(self.source, self.run_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path, json.dumps(manifest, indent=2).encode("utf-8"))
+        logger.info(f"Archived {len(self.pages)} pages of {self.source} run {self.run_id}")
+        if self.archive.keep_runs:
+            self.archive.prune()
+        return path
+
+class PageArchive:
+    """Content-addressed, zstd-compressed store of raw crawled pages
+
+    Layout under `root`:
+        objects/<2 hex>/<digest>.html.zst   page bodies, keyed by body hash
+        runs/<source>/<run id>.json         manifest: page number, URL, digest per page
+
+    A page that did not change between runs is stored once and referred to
+    by every run's manifest. Any archived run can be parsed again with
+    replay().
+    """
+
+    def __init__(self, root: str = SCRAPER_ARCHIVE_DIR, keep_runs: int = SCRAPER_ARCHIVE_KEEP_RUNS, level: int = SCRAPER_ARCHIVE_LEVEL):
+        self.root = Path(root)
+        self.keep_runs = keep_runs
+        self.level = level
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.html.zst"
+
+    def manifest_path(self, source: str, run_id: str) -> Path:
+        return self.root / "runs" / source / f"{run_id}.json"
+
+    def start_run(self, source: str, parse_page: Optional[Callable] = None, parser: Optional[str] = None) -> ArchiveRun:
+        """Start archiving a crawl; `parser` (module:function) names the parse function for replay
+
+        Without `parser` the name is derived from parse_page, which fails for
+        a function defined in a script run by path.
+        """
+        parser = parser or _parser_name(parse_page)
+        if parser is None and parse_page is not None:
+            logger.warning(f"Parser {parse_page.__qualname__} of {source} cannot be imported again; replay will need --parser")
+        return ArchiveRun(self, source, parser)
+
+    def runs(self, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Manifests of archived runs, newest first"""
+        directory = self.root / "runs"
+        sources = [source] if source else sorted(p.name for p in directory.iterdir() if p.is_dir()) if directory.exists() else []
+        manifests = []
+        for name in sources:
+            for path in (directory / name).glob("*.json"):
+                with open(path, encoding="utf-8") as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda manifest: manifest["run_id"], reverse=True)
+
+    def manifest(self, source: str, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Manifest of a run, or of the source's latest run if run_id is None"""
+        if run_id is None:
+            runs = self.runs(source)
+            if not runs:
+                raise FileNotFoundError(f"No archived runs for {source}")
+            return runs[0]
+        with open(self.manifest_path(source, run_id), encoding="utf-8") as f:
+            return json.load(f)
+
+    def read_page(self, digest: str, encoding: Optional[str] = None) -> str:
+        with open(self.object_path(digest), "rb") as f:
+            return zstandard.ZstdDecompressor().decompress(f.read()).decode(encoding or "utf-8", errors="replace")
+
+    def replay(
+        self,
+        source: str,
+        run_id: Optional[str] = None,
+        parse_page: Optional[Callable[[str], List[Dict[str, Any]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Parse an archived run again and return its listings in page order
+
+        Uses the parser recorded in the manifest unless parse_page is given,
+        so a run can be re-parsed with a newer or different parser.
+        """
+        manifest = self.manifest(source, run_id)
+        if parse_page is None:
+            if not manifest.get("parser"):
+                raise ValueError(f"Run {manifest['run_id']} has no recorded parser; pass parse_page (--parser)")
+            parse_page = load_parser(manifest["parser"])
+
+        listings = []
+        for page in manifest["pages"]:
+            try:
+                listings.extend(parse_page(self.read_page(page["digest"], page.get("encoding"))))
+            except FileNotFoundError:
+                logger.error(f"Page {page['page']} of run {manifest['run_id']} ({page['digest']}) is missing from the archive")
+        logger.info(f"Replayed {source} run {manifest['run_id']}: {len(listings)} listings from {len(manifest['pages'])} pages")
+        return listings
+
+    def prune(self):
+        """Keep the newest keep_runs runs per source and delete pages no kept run refers to"""
+        runs_dir = self.root / "runs"
+        if not runs_dir.exists():
+            return
+        referenced = set()
+        for source_dir in runs_dir.iterdir():
+            if not source_dir.is_dir():
+                continue
+            manifests = sorted(source_dir.glob("*.json"), reverse=True)
+            for path in manifests[self.keep_runs:] if self.keep_runs else []:
+                path.unlink()
+                logger.info(f"Removed archived run {source_dir.name}/{path.stem}")
+            for path in manifests[:self.keep_runs] if self.keep_runs else manifests:
+                with open(path, encoding="utf-8") as f:
+                    referenced.update(page["digest"] for page in json.load(f)["pages"])
+
+        # Pages written in the last hour may belong to a run that has no manifest yet
+        cutoff = time.time() - 3600
+        for path in (self.root / "objects").glob("*/*.html.zst"):
+            if path.name[:-len(".html.zst")] not in referenced and path.stat().st_mtime < cutoff:
+                path.unlink()
+
+if __name__ == "__main__":
+    # Run from backend/: python -m services.scraping.page_archive --source bayut [--run RUN_ID] [--parser module:function] [--list]
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="List or replay archived scraper runs")
+    parser.add_argument("--root", default=SCRAPER_ARCHIVE_DIR)
+    parser.add_argument("--source", help="bayut / propertyfinder")
+    parser.add_argument("--run", help="run id (default: latest)")
+    parser.add_argument("--list", action="store_true", help="list runs instead of replaying")
+    parser.add_argument("--parser", help="parse function as module:function (default: the one recorded for the run)")
+    parser.add_argument("--output", help="write replayed listings to this JSON file")
+    args = parser.parse_args()
+
+    archive = PageArchive(args.root)
+    if args.list or not args.source:
+        for manifest in archive.runs(args.source):
+            print(f"{manifest['source']:<16} {manifest['run_id']}  {len(manifest['pages'])} pages  {manifest['finished_at']}")
+    else:
+        listings = archive.replay(args.source, args.run, load_parser(args.parser) if args.parser else None)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(listings, f, indent=2, default=str)
+        print(f"{len(listings)} listings")
@@ -0,0 +1,87 @@
+from typing import List, Dict, Any, Optional
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import time
+import httpx
+
+logger = logging.getLogger(__name__)
+
+def body_digest(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+class ResponseCache:
+    """On-disk cache of page validators and parsed listings, one JSON file per URL
+
+    Each entry holds the ETag and Last-Modified the server sent, a hash of the
+    body and the listings parsed from it. Entries younger than `ttl` seconds
+    are fresh and served without a request; older ones supply the headers for
+    a conditional request. Entries are keyed by URL and `namespace` (the
+    parser), so clear the directory when parsing logic changes.
+    """
+
+    def __init__(self, cache_dir: str, ttl: float = 0, namespace: str = ""):
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.namespace = namespace
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.blake2b(f"{self.namespace}\0{url}".encode("utf-8"), digest_size=16).hexdigest()
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        path = self._path(url)
+        if not path.exists():
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry if entry.get("url") == url else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable response cache entry {path}: {str(e)}")
+            return None
+
+    def is_fresh(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return entry is not None and time.time() - entry["validated_at"] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url: str, response: httpx.Response, digest: str, listings: List[Dict[str, Any]]):
+        """Store the validators of a 200 response together with the listings parsed from it"""
+        self._write({
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body_hash": digest,
+            "validated_at": time.time(),
+            "listings": listings,
+        })
+
+    def revalidated(self, entry: Dict[str, Any], response: httpx.Response):
+        """Record that the cached listings are still current (304, or a 200 with the same body)"""
+        self._write({
+            **entry,
+            "etag": response.headers.get("ETag", entry.get("etag")),
+            "last_modified": response.headers.get("Last-Modified", entry.get("last_modified")),
+            "validated_at": time.time(),
+        })
+
+    def _write(self, entry: Dict[str, Any]):
+        path = self._path(entry["url"])
+        tmp = path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False, default=str)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.error(f"Error writing response cache entry for {entry['url']}: {str(e)}")
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import httpx
+import pytest
+from services.scraping import async_fetcher
+from services.scraping.async_fetcher import AsyncFetcher, TokenBucket, _retry_after
+
+AsyncClient = httpx.AsyncClient
+
+def serve(monkeypatch, handler):
+    """Patch httpx.AsyncClient in async_fetcher to answer requests with handler"""
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(async_fetcher.httpx, "AsyncClient", lambda **kwargs: AsyncClient(transport=transport, **kwargs))
+
+def fetch_all(urls, **kwargs):
+    async def run():
+        async with AsyncFetcher(host_rate=1000, host_burst=1000, backoff_base=0.001, **kwargs) as fetcher:
+            return await fetcher.fetch_all(urls)
+    return asyncio.run(run())
+
+URLS = [f"https://www.bayut.com/to-rent/?page={page}" for page in range(1, 9)]
+
+def test_fetch_all_keeps_url_order_within_the_window(monkeypatch):
+    in_flight = peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later pages answer first
+        await asyncio.sleep(0.02 * (9 - int(request.url.params["page"])))
+        in_flight -= 1
+        return httpx.Response(200, text=request.url.params["page"])
+
+    serve(monkeypatch, handler)
+    responses = fetch_all(URLS, concurrency=3)
+    assert [response.text for response in responses] == [str(page) for page in range(1, 9)]
+    assert peak == 3
+
+def test_transient_errors_are_retried(monkeypatch):
+    attempts = {}
+
+    def handler(request):
+        url = str(request.url)
+        attempts[url] = attempts.get(url, 0) + 1
+        if url.endswith("page=1") and attempts[url] < 3:
+            return httpx.Response(503)
+        if url.endswith("page=2") and attempts[url] < 2:
+            raise httpx.ConnectError("reset", request=request)
+        if url.endswith("page=3"):
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if url.endswith("page=4"):
+            return httpx.Response(404)
+        return httpx.Response(200, text="ok")
+
+    serve(monkeypatch, handler)
+    ok, reconnected, throttled, missing = fetch_all(URLS[:4], max_retries=2)
+    assert ok.status_code == reconnected.status_code == 200
+    assert isinstance(throttled, httpx.HTTPStatusError) and throttled.response.status_code == 429
+    assert isinstance(missing, httpx.HTTPStatusError) and missing.response.status_code == 404
+    assert [attempts[url] for url in URLS[:4]] == [3, 2, 3, 1]
+
+def test_headers_and_not_modified(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append((request.headers.get("User-Agent"), request.headers.get("If-None-Match")))
+        return httpx.Response(304)
+
+    serve(monkeypatch, handler)
+    agents = iter(["agent-1", "agent-2"])
+
+    async def run():
+        async with AsyncFetcher(headers=lambda: {"User-Agent": next(agents)}, host_rate=1000) as fetcher:
+            first = await fetcher.fetch(URLS[0], headers={"If-None-Match": '"v1"'})
+            second = await fetcher.fetch(URLS[1])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.status_code == second.status_code == 304
+    assert seen == [("agent-1", '"v1"'), ("agent-2", None)]
+
+def test_retry_after():
+    def header(value):
+        return _retry_after(httpx.Response(429, headers={"Retry-After": value} if value else {}))
+
+    assert header("12") == 12.0
+    assert header("-3") == 0.0
+    assert header(None) is None
+    assert header("soon") is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < header(later) <= 30
+    assert header(format_datetime(datetime(2000, 1, 1, tzinfo=timezone.utc), usegmt=True)) == 0.0
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=20, burst=2)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # The burst is free, the other 4 tokens take 1/20 s each
+    assert 0.18 <= asyncio.run(run()) < 2
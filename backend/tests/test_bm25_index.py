@@ -0,0 +1,149 @@
+import math
+import random
+from collections import Counter
+import numpy as np
+import pytest
+from services.rag.bm25_index import BM25Index
+
+VOCAB = ["villa", "apartment", "marina", "downtown", "jvc", "pool", "studio", "sea", "view", "garden", "gym", "parking"]
+
+def reference_scores(stats_docs, live_ids, tokens, k1=1.5, b=0.75, allowed=None):
+    """Okapi BM25 computed directly from the documents
+
+    `stats_docs` are the documents the collection statistics (N, df, avgdl)
+    are taken from; the index keeps tombstoned documents in them until it is
+    compacted. Only `live_ids` are scored.
+    """
+    n_docs = len(stats_docs)
+    avgdl = sum(len(doc) for doc in stats_docs.values()) / n_docs
+    df = Counter(term for doc in stats_docs.values() for term in set(doc))
+    scores = {}
+    for doc_id in live_ids:
+        if allowed is not None and (doc_id >= len(allowed) or not allowed[doc_id]):
+            continue
+        doc = stats_docs[doc_id]
+        tf = Counter(doc)
+        score = 0.0
+        for term, query_tf in Counter(tokens).items():
+            if not tf[term]:
+                continue
+            idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            score += query_tf * idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(doc) / avgdl))
+        if score:
+            scores[doc_id] = score
+    return scores
+
+def assert_matches(index, stats_docs, live_ids, queries, allowed=None):
+    for tokens in queries:
+        expected = reference_scores(stats_docs, live_ids, tokens, allowed=allowed)
+        hits = index.top_k(tokens, len(stats_docs) + 1, allowed=allowed)
+        assert {doc_id for doc_id, _ in hits} == set(expected)
+        for doc_id, score in hits:
+            assert score == pytest.approx(expected[doc_id], rel=1e-5)
+        ranked = [score for _, score in hits]
+        assert ranked == sorted(ranked, reverse=True)
+
+def random_docs(rng, ids):
+    return {doc_id: [rng.choice(VOCAB) for _ in range(rng.randint(1, 12))] for doc_id in ids}
+
+@pytest.fixture
+def rng():
+    return random.Random(7)
+
+@pytest.fixture
+def queries(rng):
+    return [[term] for term in VOCAB] + [[rng.choice(VOCAB) for _ in range(rng.randint(2, 4))] for _ in range(20)] + [["unknown"]]
+
+def test_add_delete_compact_save_load(tmp_path, rng, queries):
+    # Compaction only when asked, so every stage is checked on the segment it targets
+    index = BM25Index(compact_ratio=1e9)
+    docs = random_docs(rng, range(40))
+    index.add(list(docs), list(docs.values()))
+    assert len(index) == 40 and index.next_id == 40
+    assert_matches(index, docs, set(docs), queries)
+
+    # Postings of the first batch compacted, second batch pending
+    index.compact()
+    more = random_docs(rng, range(40, 60))
+    index.add(list(more), list(more.values()))
+    docs.update(more)
+    assert_matches(index, docs, set(docs), queries)
+
+    # Tombstones drop hits but keep their statistics until compaction
+    deleted = set(rng.sample(sorted(docs), 15))
+    index.delete(deleted | {999})
+    live = set(docs) - deleted
+    assert len(index) == len(live)
+    assert_matches(index, docs, live, queries)
+
+    index.compact()
+    live_docs = {doc_id: docs[doc_id] for doc_id in live}
+    assert_matches(index, live_docs, live, queries)
+
+    # Re-adding an existing id replaces the document
+    replaced = {doc_id: ["villa", "villa", "jvc"] for doc_id in sorted(live)[:3]}
+    index.add(list(replaced), list(replaced.values()))
+    index.compact()
+    live_docs.update(replaced)
+    assert_matches(index, live_docs, live, queries)
+
+    index.save(tmp_path / "bm25")
+    for mmap in (False, True):
+        loaded = BM25Index.load(tmp_path / "bm25", mmap=mmap)
+        assert len(loaded) == len(live) and loaded.next_id == index.next_id
+        assert_matches(loaded, live_docs, live, queries)
+
+    # A loaded index keeps accepting writes
+    loaded = BM25Index.load(tmp_path / "bm25", mmap=True)
+    extra = random_docs(rng, range(100, 110))
+    loaded.add(list(extra), list(extra.values()))
+    loaded.delete([100])
+    loaded.compact()
+    live_docs.update(extra)
+    del live_docs[100]
+    assert_matches(loaded, live_docs, set(live_docs), queries)
+
+def test_automatic_compaction_matches_reference(rng, queries):
+    index = BM25Index(compact_ratio=0.25)
+    docs = {}
+    for batch in range(5):
+        added = random_docs(rng, range(batch * 20, batch * 20 + 20))
+        index.add(list(added), list(added.values()))
+        docs.update(added)
+    deleted = set(rng.sample(sorted(docs), 40))
+    index.delete(deleted)
+    index.compact()
+    live_docs = {doc_id: doc for doc_id, doc in docs.items() if doc_id not in deleted}
+    assert_matches(index, live_docs, set(live_docs), queries)
+
+def test_allowed_mask_restricts_hits(rng, queries):
+    index = BM25Index()
+    docs = random_docs(rng, range(30))
+    index.add(list(docs), list(docs.values()))
+    allowed = np.zeros(20, dtype=bool)
+    allowed[::3] = True
+    # Ids past the end of the mask are not allowed
+    assert_matches(index, docs, set(docs), queries, allowed=allowed)
+    assert index.top_k(["villa"], 5, allowed=np.zeros(0, dtype=bool)) == []
+
+def test_top_k_limits_and_empty_index():
+    index = BM25Index()
+    assert index.top_k(["villa"], 5) == []
+    index.add([0, 1, 2], [["villa"], ["villa", "pool"], ["studio"]])
+    assert len(index.top_k(["villa"], 1)) == 1
+    assert index.top_k(["villa"], 0) == []
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_next_id_survives_compaction_and_reload(tmp_path, mmap):
+    index = BM25Index()
+    index.add([0, 1, 2], [["villa"], ["villa", "pool"], ["studio"]])
+    index.delete([2])
+    index.compact()
+    # The highest id is gone, but it must not be handed out again
+    assert index.next_id == 3
+    index.save(tmp_path / "bm25")
+    loaded = BM25Index.load(tmp_path / "bm25", mmap=mmap)
+    assert loaded.next_id == 3
+    new_id = loaded.next_id
+    loaded.add([new_id], [["garden"]])
+    assert new_id > 2 and loaded.next_id == 4
@@ -0,0 +1,49 @@
+from services.rag.context_packer import ContextPacker
+from test_document_processor import WordTokenizer
+
+HEADER = 5
+
+def doc(text, score):
+    return {"text": text, "score": score, "metadata": {"source": f"doc{score}"}}
+
+def count(text):
+    return len(WordTokenizer().encode_ordinary(text))
+
+def test_everything_fits():
+    context = [doc("Rents in JVC rose.", 0.2), doc("Marina villas are rare.", 0.9)]
+    packed, stats = ContextPacker(WordTokenizer(), budget_tokens=1000, header_tokens=HEADER).pack(context)
+    # Best score first, untouched
+    assert packed == [context[1], context[0]]
+    assert stats["packed_tokens"] == stats["input_tokens"] == sum(count(d["text"]) + HEADER for d in context)
+    assert (stats["documents_packed"], stats["tokens_saved"], stats["truncated"], stats["dropped"]) == (2, 0, 0, 0)
+
+def test_near_duplicates_are_dropped():
+    text = "The average rent for a two bedroom apartment in Dubai Marina is 140000 AED per year"
+    context = [doc(text, 0.9), doc(text + " today", 0.8), doc("Studios in JVC start at 45000 AED", 0.7)]
+    packed, stats = ContextPacker(WordTokenizer(), budget_tokens=1000, dedup_threshold=0.8).pack(context)
+    assert [d["score"] for d in packed] == [0.9, 0.7]
+    assert stats["duplicates_removed"] == 1
+    packed, _ = ContextPacker(WordTokenizer(), budget_tokens=1000, dedup_threshold=1.0).pack(context)
+    assert len(packed) == 3
+
+def test_budget_truncates_at_sentences():
+    first = "Prices rose in JVC this year. Supply is tight."
+    second = "Marina rents are flat. Villas are up. Studios are down. Townhouses held steady."
+    third = "Ranches villas rent for 300000 AED."
+    # Kept sentences are counted one by one, each with a trailing space
+    budget = count(first) + HEADER + HEADER + count("Marina rents are flat. ") + count("Villas are up. ")
+    packed, stats = ContextPacker(WordTokenizer(), budget_tokens=budget, header_tokens=HEADER).pack(
+        [doc(first, 0.9), doc(second, 0.8), doc(third, 0.7)]
+    )
+    assert [d["text"] for d in packed] == [first, "Marina rents are flat. Villas are up."]
+    assert packed[1]["truncated"] and "truncated" not in packed[0]
+    assert (stats["truncated"], stats["dropped"], stats["documents_packed"]) == (1, 1, 2)
+    assert stats["packed_tokens"] <= budget
+    assert stats["tokens_saved"] == stats["input_tokens"] - stats["packed_tokens"] > 0
+
+def test_first_sentence_too_long_is_dropped():
+    packed, stats = ContextPacker(WordTokenizer(), budget_tokens=HEADER + 3, header_tokens=HEADER).pack(
+        [doc("A sentence much longer than three tokens.", 1.0)]
+    )
+    assert packed == []
+    assert (stats["dropped"], stats["packed_tokens"]) == (1, 0)
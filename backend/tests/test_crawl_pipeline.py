@@ -0,0 +1,65 @@
+import asyncio
+import httpx
+from services.scraping.crawl_pipeline import CrawlPipeline
+
+def parse_lines(html):
+    """Listings of a toy page; parsed in worker processes, so module-level"""
+    if "broken" in html:
+        raise ValueError("unparseable page")
+    return [{"title": line} for line in html.splitlines() if line]
+
+class FakeFetcher:
+    """Serves pages from a dict, holding back URLs gated on an event; missing pages raise"""
+
+    def __init__(self, pages, gates=None):
+        self.pages = pages
+        self.gates = gates or {}
+        self.requests = []
+
+    async def fetch(self, url, headers=None):
+        self.requests.append((url, headers))
+        if url in self.gates:
+            await self.gates[url].wait()
+        request = httpx.Request("GET", url)
+        if url not in self.pages:
+            raise httpx.ConnectError("unreachable", request=request)
+        status_code, body = self.pages[url] if isinstance(self.pages[url], tuple) else (200, self.pages[url])
+        return httpx.Response(status_code, text=body, headers={"ETag": f'"{hash(body)}"'}, request=request)
+
+def crawl(pipeline, urls):
+    async def run():
+        return [item async for item in pipeline.run(urls)]
+    return asyncio.run(run())
+
+def test_pages_are_parsed_in_workers():
+    urls = [f"https://example.com/{page}" for page in range(6)]
+    pages = {url: f"listing {page}a\nlisting {page}b" for page, url in enumerate(urls)}
+    pages[urls[2]] = "broken page"
+    del pages[urls[3]]
+    fetched = []
+    # The first page arrives once every other page is done
+    first_page = asyncio.Event()
+    fetcher = FakeFetcher(pages, gates={urls[0]: first_page})
+    pipeline = CrawlPipeline(fetcher, parse_lines, processes=2, max_pending=1, on_page=lambda index, url, response: fetched.append(index))
+
+    async def run():
+        results = []
+        async for item in pipeline.run(urls):
+            results.append(item)
+            if len(results) == len(urls) - 1:
+                first_page.set()
+        return results
+
+    results = asyncio.run(run())
+    assert sorted(index for index, _ in results) == list(range(6))
+    assert results[-1][0] == 0
+    by_index = dict(results)
+    for page in (0, 1, 4, 5):
+        assert by_index[page] == [{"title": f"listing {page}a"}, {"title": f"listing {page}b"}]
+    assert by_index[2] == by_index[3] == []
+    assert sorted(fetched) == [0, 1, 2, 4, 5]
+    assert pipeline.stats == {"fetched": 5, "not_modified": 0, "unchanged": 0, "cached": 0, "parsed": 4}
+
+def test_empty_crawl():
+    pipeline = CrawlPipeline(FakeFetcher({}), parse_lines, processes=1)
+    assert crawl(pipeline, []) == []
@@ -0,0 +1,162 @@
+import re
+import pandas as pd
+import pytest
+from services.rag import document_processor
+from services.rag.document_processor import DocumentProcessor
+
+class WordTokenizer:
+    """Word pieces with their leading space, like a BPE vocabulary of whole words"""
+
+    def __init__(self):
+        self.vocab = {}
+        self.pieces = []
+
+    def encode_ordinary(self, text):
+        tokens = []
+        for piece in re.findall(r"\s?\w+|\s?[^\w\s]|\s", text):
+            piece = piece.encode("utf-8")
+            if piece not in self.vocab:
+                self.vocab[piece] = len(self.pieces)
+                self.pieces.append(piece)
+            tokens.append(self.vocab[piece])
+        return tokens
+
+    def encode_ordinary_batch(self, texts):
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode_tokens_bytes(self, tokens):
+        return [self.pieces[token] for token in tokens]
+
+class ByteTokenizer:
+    """One token per UTF-8 byte, so multi-byte characters span several tokens"""
+
+    def encode_ordinary(self, text):
+        return list(text.encode("utf-8"))
+
+    def encode_ordinary_batch(self, texts):
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode_tokens_bytes(self, tokens):
+        return [bytes([token]) for token in tokens]
+
+@pytest.fixture(params=[WordTokenizer, ByteTokenizer])
+def make_processor(request, monkeypatch):
+    monkeypatch.setattr(document_processor.tiktoken, "get_encoding", lambda name: request.param())
+    return lambda **kwargs: DocumentProcessor(**kwargs)
+
+def reference_spans(processor, text):
+    """chunk_spans computed token by token"""
+    tokenizer = processor.tokenizer
+    pieces = tokenizer.decode_tokens_bytes(tokenizer.encode_ordinary(text))
+    if not pieces:
+        return []
+    n = len(pieces)
+    if n <= processor.chunk_size:
+        return [(0, len(text))]
+    byte_offsets = [0]
+    for piece in pieces:
+        byte_offsets.append(byte_offsets[-1] + len(piece))
+    raw = text.encode("utf-8")
+
+    def char_offset(byte_offset):
+        return len(raw[:byte_offset].decode("utf-8", errors="ignore"))
+
+    spans, start = [], 0
+    while start < n:
+        end = min(start + processor.chunk_size, n)
+        if end < n:
+            for boundary in range(end, start + processor.chunk_size // 2, -1):
+                if pieces[boundary - 1].endswith(b"."):
+                    end = boundary
+                    break
+        spans.append((char_offset(byte_offsets[start]), char_offset(byte_offsets[end])))
+        if end == n:
+            break
+        start = max(end - processor.chunk_overlap, start + 1)
+    return spans
+
+def sentences(count, words=7, word="house"):
+    return " ".join(" ".join(f"{word}{i}x{j}" for j in range(words)) + "." for i in range(count))
+
+@pytest.mark.parametrize("text", [
+    sentences(40),
+    sentences(40, words=30),
+    " ".join(f"word{i}" for i in range(300)),  # no sentence boundaries
+    sentences(25, word="Straße"),  # multi-byte characters
+    "Villa in Dubai Marina. " * 60 + "Résidence à Jumeirah. " * 40,
+])
+def test_chunk_spans_match_reference(make_processor, text):
+    processor = make_processor(chunk_size=40, chunk_overlap=8)
+    assert processor.chunk_spans(text) == reference_spans(processor, text)
+
+def test_chunk_spans_cover_text_with_overlap(make_processor):
+    processor = make_processor(chunk_size=40, chunk_overlap=8)
+    text = sentences(60)
+    spans = processor.chunk_spans(text)
+    assert spans[0][0] == 0 and spans[-1][1] == len(text)
+    for (start, end), (next_start, next_end) in zip(spans, spans[1:]):
+        assert next_start < end <= next_end
+    for start, end in spans:
+        assert len(processor.tokenizer.encode_ordinary(text[start:end])) <= processor.chunk_size
+    if isinstance(processor.tokenizer, WordTokenizer):
+        # Sentences fit the window, so one ends in its second half and ends the chunk
+        assert all(text[start:end].endswith(".") for start, end in spans[:-1])
+
+def test_short_and_empty_text(make_processor):
+    processor = make_processor(chunk_size=40, chunk_overlap=8)
+    assert processor.chunk_spans("") == []
+    assert processor.chunk_spans("One short sentence.") == [(0, len("One short sentence."))]
+    assert processor.process_text("  A   short\n text!  ") == ["A short text!"]
+
+def test_process_text_chunks(make_processor):
+    processor = make_processor(chunk_size=40, chunk_overlap=8)
+    text = sentences(30)
+    chunks = processor.process_text(text)
+    assert len(chunks) > 1
+    assert chunks == [text[start:end].strip() for start, end in processor.chunk_spans(text)]
+
+CSV = """neighborhood,property_type,bedrooms,current_rent,description
+JVC,apartment,2,95000,"Bright unit, pool & gym!"
+Dubai Marina,villa,,320000.5,Sea view
+,studio,0,,
+Arabian Ranches,townhouse,3,180000,"Garden;  quiet   street"
+"""
+
+def cell(value):
+    if pd.isna(value):
+        return None
+    return int(value) if isinstance(value, float) and value.is_integer() else value
+
+def reference_csv(processor, path):
+    """iter_csv rendered row by row from the whole file"""
+    documents = []
+    frame = pd.read_csv(path)
+    for row_index, row in frame.iterrows():
+        text = processor._clean_text(" ".join("" if cell(value) is None else str(cell(value)) for value in row))
+        metadata = {column: cell(row[column]) for column in ("neighborhood", "property_type", "bedrooms", "current_rent")}
+        documents.append({"text": text, "metadata": {"source": str(path), "row_index": row_index, "chunk_index": 0, **metadata}})
+    return documents
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 1000])
+def test_iter_csv_matches_row_by_row(make_processor, tmp_path, chunk_rows):
+    path = tmp_path / "listings.csv"
+    path.write_text(CSV)
+    # Every row fits in one chunk
+    processor = make_processor(chunk_size=1000, chunk_overlap=8)
+    documents = list(processor.iter_csv(str(path), chunk_rows=chunk_rows))
+    # Whichever chunk a row is read in, 2 is "2", never "2.0"
+    assert documents == reference_csv(processor, path)
+    assert [type(doc["metadata"]["bedrooms"]) for doc in documents] == [int, type(None), int, int]
+
+def test_iter_csv_template_and_long_rows(make_processor, tmp_path):
+    path = tmp_path / "listings.csv"
+    path.write_text(CSV + f"JVC,villa,5,400000,{sentences(20)}\n")
+    processor = make_processor(chunk_size=40, chunk_overlap=8)
+    documents = list(processor.iter_csv(str(path), text_template="{bedrooms} bed {property_type} in {neighborhood}", metadata_columns=["bedrooms", "missing"]))
+    assert [doc["text"] for doc in documents] == ["2 bed apartment in JVC", "bed villa in Dubai Marina", "0 bed studio in", "3 bed townhouse in Arabian Ranches", "5 bed villa in JVC"]
+    assert [doc["metadata"]["bedrooms"] for doc in documents] == [2, None, 0, 3, 5]
+    assert "missing" not in documents[0]["metadata"]
+
+    long_rows = [doc for doc in processor.iter_csv(str(path)) if doc["metadata"]["row_index"] == 4]
+    assert len(long_rows) > 1
+    assert [doc["metadata"]["chunk_index"] for doc in long_rows] == list(range(len(long_rows)))
@@ -0,0 +1,73 @@
+import shutil
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+from onnx import helper, numpy_helper, TensorProto
+from tokenizers import Tokenizer, models, pre_tokenizers
+from services.rag.embedding_backends import OnnxBackend, create_backend
+from services.rag.embedding_service import EmbeddingService
+
+WORDS = ["studio", "apartment", "villa", "in", "jvc", "dubai", "marina", "with", "pool", "gym"]
+VOCAB = {"[PAD]": 0, "[UNK]": 1, **{word: i + 2 for i, word in enumerate(WORDS)}}
+DIM = 8
+TABLE = np.random.default_rng(0).normal(size=(len(VOCAB), DIM)).astype(np.float32)
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A toy exported model: token embeddings are rows of TABLE"""
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["table", "input_ids"], ["last_hidden_state"])],
+        "toy",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+            helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"]),
+        ],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", DIM])],
+        initializer=[numpy_helper.from_array(TABLE, "table")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, tmp_path / "model.onnx")
+    shutil.copy(tmp_path / "model.onnx", tmp_path / "model_quantized.onnx")
+
+    tokenizer = Tokenizer(models.WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.save(str(tmp_path / "tokenizer.json"))
+    (tmp_path / "source_model.txt").write_text("toy-model\n")
+    return tmp_path
+
+def reference(text):
+    """Mean of the text's token embeddings, L2-normalized"""
+    ids = [VOCAB.get(word, VOCAB["[UNK]"]) for word in text.lower().split()]
+    pooled = TABLE[ids].mean(axis=0)
+    return pooled / np.linalg.norm(pooled)
+
+TEXTS = ["studio in jvc", "villa with pool in dubai marina", "gym", "apartment with unknown words"]
+
+@pytest.mark.parametrize("batch_size", [1, 3, 32])
+def test_onnx_pools_only_real_tokens(model_dir, batch_size):
+    backend = OnnxBackend(str(model_dir), quantized=False)
+    embeddings = backend.encode(TEXTS, batch_size=batch_size)
+    assert embeddings.dtype == np.float32
+    # Padding to the longest text in a batch does not change a text's vector
+    np.testing.assert_allclose(embeddings, [reference(text) for text in TEXTS], rtol=1e-5, atol=1e-6)
+    assert backend.encode([]).shape == (0, DIM)
+
+def test_onnx_names_and_errors(model_dir, tmp_path_factory):
+    assert OnnxBackend(str(model_dir), quantized=False).name == "toy-model@onnx"
+    quantized = create_backend("onnx", "ignored", onnx_model_dir=str(model_dir), intra_op_threads=1)
+    assert (quantized.name, quantized.dim) == ("toy-model@onnx-int8", DIM)
+    with pytest.raises(FileNotFoundError):
+        OnnxBackend(str(tmp_path_factory.mktemp("empty")))
+    with pytest.raises(ValueError):
+        create_backend("tpu", "all-MiniLM-L6-v2")
+
+def test_embedding_service_on_onnx(model_dir, tmp_path_factory):
+    cache_dir = tmp_path_factory.mktemp("cache")
+    service = EmbeddingService(backend="onnx", onnx_model_dir=str(model_dir), cache_dir=str(cache_dir), cache_dtype="float32")
+    np.testing.assert_allclose(service.get_embeddings(TEXTS), [reference(text) for text in TEXTS], rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(service.get_query_embedding(TEXTS[1]), reference(TEXTS[1]), rtol=1e-5, atol=1e-6)
+    # Cached under the backend name, so torch vectors are never served for ONNX
+    assert service.store.model_name == "toy-model@onnx-int8"
@@ -0,0 +1,102 @@
+import hashlib
+import multiprocessing
+import numpy as np
+import pytest
+from services.rag import embedding_service
+from services.rag.embedding_store import EmbeddingStore
+
+DIM = 8
+
+def vector(text):
+    # Same vector for a text in every process (str hashes are salted per process)
+    rng = np.random.default_rng(int.from_bytes(hashlib.blake2b(text.encode(), digest_size=4).digest(), "little"))
+    return rng.standard_normal(DIM).astype(np.float32)
+
+def vectors(texts):
+    return np.stack([vector(text) for text in texts])
+
+def assert_stored(store, texts):
+    embeddings, missing = store.lookup(texts)
+    assert missing == []
+    np.testing.assert_allclose(embeddings, vectors(texts), rtol=1e-6)
+
+def test_put_lookup_and_reopen(tmp_path):
+    store = EmbeddingStore(tmp_path, "model/a", DIM, dtype="float32", initial_capacity=2)
+    texts = [f"text {i}" for i in range(10)]
+    store.put(texts[:3], vectors(texts[:3]))
+    # Duplicates, in the batch and already stored, are written once; the matrix grows past capacity
+    store.put(texts[2:] + texts[:1], vectors(texts[2:] + texts[:1]))
+    assert len(store) == 10
+
+    embeddings, missing = store.lookup(["text 1", "unknown", "text 9"])
+    assert missing == [1]
+    np.testing.assert_allclose(embeddings[[0, 2]], vectors(["text 1", "text 9"]))
+    assert not embeddings[1].any()
+
+    reopened = EmbeddingStore(tmp_path, "model/a", DIM, dtype="float32")
+    assert len(reopened) == 10
+    assert_stored(reopened, texts)
+
+def test_changed_settings_reset_store(tmp_path):
+    EmbeddingStore(tmp_path, "model", DIM).put(["a"], vectors(["a"]))
+    assert len(EmbeddingStore(tmp_path, "model", DIM, dtype="float32")) == 0
+
+def test_interleaved_writers_stay_aligned(tmp_path):
+    first = EmbeddingStore(tmp_path, "model", DIM, dtype="float32", initial_capacity=1)
+    second = EmbeddingStore(tmp_path, "model", DIM, dtype="float32", initial_capacity=1)
+    first.put(["a", "b"], vectors(["a", "b"]))
+    # second opened before those appends; its rows must go after them
+    second.put(["c", "a", "d"], vectors(["c", "a", "d"]))
+    first.put(["e"], vectors(["e"]))
+    assert_stored(second, ["a", "c", "d"])
+    assert_stored(first, ["a", "b", "e"])
+    assert_stored(EmbeddingStore(tmp_path, "model", DIM, dtype="float32"), ["a", "b", "c", "d", "e"])
+
+def _write(directory, worker):
+    store = EmbeddingStore(directory, "model", DIM, dtype="float32", initial_capacity=1)
+    for batch in range(20):
+        texts = [f"{worker}-{batch}-{i}" for i in range(5)] + [f"shared-{batch}"]
+        store.put(texts, vectors(texts))
+
+def test_concurrent_processes(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write, args=(str(tmp_path), worker)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+    store = EmbeddingStore(tmp_path, "model", DIM, dtype="float32")
+    texts = [f"{worker}-{batch}-{i}" for worker in range(4) for batch in range(20) for i in range(5)]
+    texts += [f"shared-{batch}" for batch in range(20)]
+    assert_stored(store, texts)
+
+class FakeBackend:
+    name = "fake"
+    dim = DIM
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32):
+        self.encoded.extend(texts)
+        return vectors(texts)
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_service, "create_backend", lambda *args, **kwargs: FakeBackend())
+    return embedding_service.EmbeddingService(cache_dir=str(tmp_path), query_cache_size=2)
+
+def test_query_embeddings_skip_store(service):
+    np.testing.assert_allclose(service.get_query_embedding("villa in jvc"), vector("villa in jvc"))
+    assert len(service.store) == 0
+    service.get_embeddings(["document"])
+    assert len(service.store) == 1
+
+def test_query_embedding_lru(service):
+    service.get_query_embeddings(["a", "b", "a"])
+    assert service.backend.encoded == ["a", "b"]
+    service.get_query_embedding("a")
+    service.get_query_embedding("c")  # evicts b, the least recently used
+    service.get_query_embeddings(["a", "b"])
+    assert service.backend.encoded == ["a", "b", "c", "b"]
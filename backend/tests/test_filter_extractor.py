@@ -0,0 +1,45 @@
+import pytest
+from qdrant_client.http import models
+from services.rag.filter_extractor import FilterExtractor
+from services.rag.retrieval_service import build_filter
+
+@pytest.fixture
+def extractor():
+    return FilterExtractor(["JVC", "JVC District 10", "Dubai Marina", ""])
+
+@pytest.mark.parametrize("query, expected", [
+    ("2-bed apartment in Dubai Marina under 120k", {
+        "neighborhood": "Dubai Marina", "bedrooms": 2, "property_type": "apartment", "current_rent": {"lte": 120000.0},
+    }),
+    ("furnished studio in JVC District 10", {"neighborhood": "JVC District 10", "bedrooms": 0, "furnishing": "furnished"}),
+    ("unfurnished villas between AED 1.5m and 900k", {
+        "property_type": "villa", "furnishing": "unfurnished", "current_rent": {"gte": 900000.0, "lte": 1500000.0},
+    }),
+    ("3 bedroom townhouse over 200,000 and up to 250k", {
+        "bedrooms": 3, "property_type": "house", "current_rent": {"gte": 200000.0, "lte": 250000.0},
+    }),
+    ("what is the average rent in jvc?", {"neighborhood": "JVC"}),
+    ("how is the market doing", {}),
+])
+def test_extract(extractor, query, expected):
+    assert extractor.extract(query) == expected
+
+def test_neighborhoods_match_whole_words(extractor):
+    assert "neighborhood" not in extractor.extract("apartments in jvcx")
+    extractor.set_neighborhoods(["Marina"])
+    assert extractor.extract("dubai marina flats") == {"neighborhood": "Marina", "property_type": "apartment"}
+
+def test_price_field():
+    assert FilterExtractor(price_field="annual_rent").extract("under 50k") == {"annual_rent": {"lte": 50000.0}}
+
+def test_build_filter():
+    assert build_filter(None) is None and build_filter({}) is None
+    query_filter = build_filter({
+        "neighborhood": "JVC",
+        "property_type": ["villa", "house"],
+        "current_rent": {"gte": 100000.0, "lte": None},
+    })
+    neighborhood, property_type, rent = query_filter.must
+    assert neighborhood == models.FieldCondition(key="neighborhood", match=models.MatchValue(value="JVC"))
+    assert property_type == models.FieldCondition(key="property_type", match=models.MatchAny(any=["villa", "house"]))
+    assert rent == models.FieldCondition(key="current_rent", range=models.Range(gte=100000.0))
@@ -0,0 +1,44 @@
+import pytest
+from services.rag.retrieval_service import (
+    RRF_K,
+    FUSION_METHODS,
+    reciprocal_rank_fusion,
+    normalized_score_fusion,
+)
+
+SEMANTIC = [(1, 0.92), (2, 0.85), (3, 0.40)]
+KEYWORD = [(3, 12.0), (4, 7.5), (1, 1.0)]
+
+def test_rrf_scores_by_weighted_reciprocal_rank():
+    fused = reciprocal_rank_fusion(SEMANTIC, KEYWORD, semantic_weight=0.7)
+    assert set(fused) == {1, 2, 3, 4}
+    assert fused[1] == pytest.approx(0.7 / (RRF_K + 1) + 0.3 / (RRF_K + 3))
+    assert fused[2] == pytest.approx(0.7 / (RRF_K + 2))
+    assert fused[3] == pytest.approx(0.7 / (RRF_K + 3) + 0.3 / (RRF_K + 1))
+    assert fused[4] == pytest.approx(0.3 / (RRF_K + 2))
+
+def test_rrf_ignores_raw_scores():
+    rescaled = [(doc_id, score * 1000) for doc_id, score in KEYWORD]
+    assert reciprocal_rank_fusion(SEMANTIC, rescaled) == reciprocal_rank_fusion(SEMANTIC, KEYWORD)
+
+def test_normalized_fusion_weights_min_max_scores():
+    fused = normalized_score_fusion(SEMANTIC, KEYWORD, semantic_weight=0.5)
+    # Best of each list normalizes to 1, worst to 0
+    assert fused[1] == pytest.approx(0.5 * 1.0 + 0.5 * 0.0)
+    assert fused[3] == pytest.approx(0.5 * 0.0 + 0.5 * 1.0)
+    assert fused[2] == pytest.approx(0.5 * (0.85 - 0.40) / (0.92 - 0.40))
+    assert fused[4] == pytest.approx(0.5 * (7.5 - 1.0) / (12.0 - 1.0))
+
+def test_normalized_fusion_with_one_empty_list():
+    fused = normalized_score_fusion(SEMANTIC, [], semantic_weight=0.7)
+    assert fused == pytest.approx({1: 0.7, 2: 0.7 * (0.85 - 0.40) / (0.92 - 0.40), 3: 0.0})
+
+def test_normalized_fusion_with_tied_scores():
+    fused = normalized_score_fusion([(1, 0.5), (2, 0.5)], [], semantic_weight=1.0)
+    assert fused == {1: 1.0, 2: 1.0}
+
+@pytest.mark.parametrize("method", sorted(FUSION_METHODS))
+def test_fusion_covers_union_of_candidates(method):
+    fused = FUSION_METHODS[method](SEMANTIC, KEYWORD, 0.7)
+    assert set(fused) == {doc_id for doc_id, _ in SEMANTIC + KEYWORD}
+    assert FUSION_METHODS[method]([], [], 0.7) == {}
@@ -0,0 +1,35 @@
+import asyncio
+import json
+import httpx
+import pytest
+from services.rag import generation_service
+from services.rag.generation_service import GenerationService
+
+AsyncClient = httpx.AsyncClient
+
+def ollama(lines, status_code=200):
+    """Patch httpx.AsyncClient in generation_service to answer with the given NDJSON lines"""
+    body = "".join(json.dumps(line) + "\n" for line in lines).encode()
+    transport = httpx.MockTransport(lambda request: httpx.Response(status_code, content=body))
+    return lambda **kwargs: AsyncClient(transport=transport, **kwargs)
+
+def collect(service):
+    async def run():
+        return [fragment async for fragment in service.stream_response("q", [{"text": "context"}])]
+    return asyncio.run(run())
+
+def test_stream_yields_fragments_until_done(monkeypatch):
+    monkeypatch.setattr(generation_service.httpx, "AsyncClient", ollama([
+        {"response": "Villas "}, {"response": "in JVC."}, {"response": "", "done": True}, {"response": "ignored"},
+    ]))
+    assert collect(GenerationService("m")) == ["Villas ", "in JVC."]
+
+@pytest.mark.parametrize("lines, status_code", [
+    ([{"response": "Villas "}, {"response": "in"}], 200),  # connection closed before "done"
+    ([{"response": "Villas "}, {"error": "model crashed"}], 200),
+    ([{"error": "model not found"}], 404),
+])
+def test_incomplete_stream_raises(monkeypatch, lines, status_code):
+    monkeypatch.setattr(generation_service.httpx, "AsyncClient", ollama(lines, status_code))
+    with pytest.raises(Exception, match="Ollama"):
+        collect(GenerationService("m"))
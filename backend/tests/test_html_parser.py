@@ -0,0 +1,65 @@
+import glob
+import os
+import pytest
+from services.scraping import html_parser
+from services.scraping.html_parser import select_cards, _simple_selector
+from config.scraper_config import DATA_DIR
+
+# bayut_web_scraper.CARD_SELECTORS; importing the scraper configures its log file
+CARD_SELECTORS = ["article", "div.card", "div._357a9937", "div[data-testid*='property-card']"]
+
+MODES = [("html.parser", False), ("html.parser", True), ("lxml", False), ("lxml", True)]
+
+PAGE = """<html><head><script>var cards = "<article>not a card</article>";</script></head><body>
+<nav class="card-nav">Menu</nav>
+<div class="listing card featured" data-testid="property-card-1"><a href="/p/1">Villa in JVC</a><span>AED 250,000</span></div>
+<section><div class="card"><a href="/p/2">Studio</a>
+  <div class="card nested"><a href="/p/3">Inner card</a></div></div></section>
+<div data-testid="property-card-4"><a href="/p/4">Townhouse</a></div>
+<p>Footer &amp; links</p>
+</body></html>"""
+
+def cards(html, selectors, parser, targeted):
+    selector, found = select_cards(html, selectors, parser=parser, targeted=targeted)
+    return selector, [(card.name, card.get("class"), card.get_text(" ", strip=True), [a["href"] for a in card.select("a")]) for card in found]
+
+@pytest.mark.parametrize("selectors", [
+    ["article", "div.card"],
+    ["div[data-testid*='property-card']"],
+    ["div.missing", "div[data-testid*='card-4']", "div.card"],
+    ["section > div.card"],  # not a simple selector: the whole page is parsed
+    ["table", "ul.results"],
+])
+def test_targeted_parse_selects_the_same_cards(selectors):
+    expected = cards(PAGE, selectors, "html.parser", False)
+    for parser, targeted in MODES[1:]:
+        assert cards(PAGE, selectors, parser, targeted) == expected, (parser, targeted)
+
+def test_card_selection():
+    selector, found = cards(PAGE, ["article", "div.card"], "lxml", True)
+    assert selector == "div.card"
+    # Nested matches are found inside their outer card too, in document order
+    assert [links for _, _, _, links in found] == [["/p/1"], ["/p/2", "/p/3"], ["/p/3"]]
+    assert select_cards(PAGE, ["table"], parser="lxml", targeted=True) == (None, [])
+
+@pytest.mark.parametrize("page", sorted(glob.glob(os.path.join(DATA_DIR, "page_*_bs4.html"))))
+def test_saved_bayut_pages(page):
+    with open(page, encoding="utf-8") as f:
+        html = f.read()
+    expected = cards(html, CARD_SELECTORS, "html.parser", False)
+    for parser, targeted in MODES[1:]:
+        assert cards(html, CARD_SELECTORS, parser, targeted) == expected, (parser, targeted)
+
+def test_simple_selectors():
+    assert _simple_selector("div.card") == ("div", "card", None, None)
+    assert _simple_selector("[data-testid*='card']") == ("", None, "data-testid", "card")
+    assert _simple_selector("a[href*=\"/p/\"]") == ("a", None, "href", "/p/")
+    assert _simple_selector("section > div") is None
+    assert _simple_selector("div.a.b") is None
+    assert _simple_selector("") is None
+
+def test_missing_backend_falls_back(monkeypatch):
+    monkeypatch.setattr(html_parser, "_backend", None)
+    monkeypatch.setattr(html_parser, "SCRAPER_HTML_PARSER", "html5lib-missing")
+    monkeypatch.setattr(html_parser.importlib.util, "find_spec", lambda name: None)
+    assert html_parser.parser_backend() == "html.parser"
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import pytest
+from services import rag_service as rag_service_module
+from services.rag.index_artifact import write_artifact, load_artifact, resolve_artifact, prune_artifacts, stale_files, file_digest
+from services.rag.retrieval_service import RetrievalService
+from test_retrieval_service import FakeEmbeddingService, FILTER_FIELDS, LISTINGS, listing_docs
+
+QUERIES = [
+    ("villa JVC", None),
+    ("apartment", {"neighborhood": "Dubai Marina"}),
+    ("apartment", {"bedrooms": {"gte": 1, "lte": 2}}),
+    ("garden", {"rent": {"lt": 200000}}),
+]
+
+def ranked(results):
+    return sorted((-round(result["score"], 5), result["text"]) for result in results)
+
+def build(tmp_path, service, content_hash="0123456789abcdef", **manifest):
+    return write_artifact(service, [service.resolve("listings")], tmp_path / "indexes", {"content_hash": content_hash, **manifest})
+
+@pytest.fixture
+def live():
+    service = RetrievalService(FakeEmbeddingService(), filter_fields=FILTER_FIELDS)
+    service.index_documents(listing_docs(), "listings")
+    service.delete_documents([1], "listings")
+    return service
+
+def test_round_trip_serves_same_results(tmp_path, live):
+    artifact_dir = build(tmp_path, live)
+    assert resolve_artifact(tmp_path / "indexes") == artifact_dir
+    manifest, collections = load_artifact(artifact_dir)
+    assert manifest["collections"]["listings"]["documents"] == len(LISTINGS) - 1
+
+    served = RetrievalService(FakeEmbeddingService(), filter_fields=FILTER_FIELDS)
+    served.attach_artifact("listings", collections["listings"])
+    for query, filters in QUERIES:
+        expected = asyncio.run(live.hybrid_search(query, "listings", limit=10, fusion="normalized", filters=filters))
+        results = asyncio.run(served.hybrid_search(query, "listings", limit=10, fusion="normalized", filters=filters))
+        # The fake embeddings tie a lot: rank-based RRF would depend on how ties are broken
+        assert ranked(results) == ranked(expected)
+
+    with pytest.raises(ValueError):
+        served.add_documents(listing_docs(LISTINGS[:1]), "listings")
+
+def test_distinct_values_keep_types(tmp_path, live):
+    _, collections = load_artifact(build(tmp_path, live))
+    collection = collections["listings"]
+    assert collection.distinct_values("bedrooms") == [0, 2, 3, 4, 5]
+    assert all(type(value) is int for value in collection.distinct_values("bedrooms"))
+    assert collection.distinct_values("neighborhood") == ["Arabian Ranches", "Dubai Marina", "JVC"]
+    assert collection.distinct_values("neighborhood") == live.distinct_values("listings", "neighborhood")
+
+def test_prune_artifacts(tmp_path):
+    output_dir = tmp_path / "indexes"
+    for version in ("20240101T000000Z-a", "20240102T000000Z-b", "20240103T000000Z-c"):
+        (output_dir / version).mkdir(parents=True)
+    (output_dir / "CURRENT").write_text("20240101T000000Z-a")
+
+    prune_artifacts(output_dir, keep=0)
+    assert len(list(output_dir.iterdir())) == 4
+    prune_artifacts(output_dir, keep=1)
+    assert sorted(p.name for p in output_dir.iterdir()) == ["20240101T000000Z-a", "20240103T000000Z-c", "CURRENT"]
+
+def test_stale_files(tmp_path):
+    kept, changed, new = (tmp_path / name for name in ("kept.csv", "changed.csv", "new.csv"))
+    for path in (kept, changed, new):
+        path.write_text(f"{path.name}\n")
+    manifest = {"files": {"kept.csv": file_digest(kept), "changed.csv": "0" * 32}}
+    paths = [str(kept), str(changed), str(new), str(tmp_path / "missing.csv")]
+    assert stale_files(manifest, paths) == [str(changed), str(new)]
+
+class Processor:
+    chunk_size = 500
+    chunk_overlap = 50
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for name in ("listings.csv", "history.csv"):
+        (data_dir / name).write_text(f"{name}\n")
+    sources = {"listings": {"files": ["listings.csv"], "quota": 2}, "history": {"files": ["history.csv"], "quota": 1}}
+    monkeypatch.setattr(rag_service_module, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(rag_service_module, "RAG_SOURCES", sources)
+    monkeypatch.setattr(rag_service_module, "INDEX_ARTIFACT_DIR", str(tmp_path / "indexes"))
+
+    embedding_service = FakeEmbeddingService()
+    embedding_service.backend = type("Backend", (), {"name": "fake-model"})()
+    builder = RetrievalService(embedding_service, filter_fields=FILTER_FIELDS)
+    for source in sources:
+        builder.index_documents(listing_docs(), f"real_estate_{source}")
+    write_artifact(builder, ["real_estate_listings", "real_estate_history"], tmp_path / "indexes", {
+        "content_hash": "0123456789abcdef",
+        "embedding": {"model": "fake-model", "dim": 64},
+        "chunking": {"chunk_size": 500, "chunk_overlap": 50},
+        "sources": sources,
+        "files": {name: file_digest(data_dir / name) for name in ("listings.csv", "history.csv")},
+    })
+
+    service = rag_service_module.RAGService()
+    service.document_processor = Processor()
+    service.embedding_service = embedding_service
+    service.retrieval_service = RetrievalService(embedding_service, filter_fields=FILTER_FIELDS)
+    service.data_dir = data_dir
+    return service
+
+def test_load_artifact_attaches_fresh_sources(rag):
+    assert rag._load_artifact() == ["listings", "history"]
+    assert set(rag.retrieval_service.aliases) == {"real_estate_listings", "real_estate_history"}
+
+def test_load_artifact_skips_sources_with_changed_files(rag):
+    (rag.data_dir / "history.csv").write_text("new rows\n")
+    assert rag._load_artifact() == ["listings"]
+
+def test_load_artifact_skips_sources_with_dropped_files(rag, monkeypatch):
+    monkeypatch.setitem(rag_service_module.RAG_SOURCES, "history", {"files": [], "quota": 1})
+    assert rag._load_artifact() == ["listings"]
+
+def test_load_artifact_rejects_other_chunking(rag):
+    rag.document_processor.chunk_size = 200
+    assert rag._load_artifact() == []
@@ -0,0 +1,46 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from services.rag import indexing_pipeline
+from services.rag.indexing_pipeline import IndexingPipeline
+
+class FailingCsvExecutor:
+    """InferenceExecutor stand-in whose CSV reads fail"""
+
+    async def run(self, fn, *args, **kwargs):
+        raise OSError("unreadable csv")
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Parse tasks run in a thread and parse nothing
+    monkeypatch.setattr(indexing_pipeline, "_html_documents", lambda path: [])
+    pool = ThreadPoolExecutor(max_workers=1)
+    yield pool
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def test_cancelled_producer_does_not_block_on_full_queue(pool):
+    async def scenario():
+        pipeline = IndexingPipeline(None, FailingCsvExecutor(), processes=1)
+        tasks = asyncio.Queue(maxsize=1)
+        producer = asyncio.create_task(pipeline._submit_all(pool, {"listings": ["a.html", "b.html"]}, tasks))
+        await asyncio.sleep(0.01)
+        assert tasks.full()
+        producer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(producer, timeout=1)
+
+    asyncio.run(scenario())
+
+def test_failed_producer_still_ends_the_queue(pool):
+    async def scenario():
+        pipeline = IndexingPipeline(None, FailingCsvExecutor(), processes=1)
+        tasks = asyncio.Queue(maxsize=1)
+        producer = asyncio.create_task(pipeline._submit_all(pool, {"listings": ["a.html", "b.csv"]}, tasks))
+        items = []
+        while (item := await asyncio.wait_for(tasks.get(), timeout=1)) is not None:
+            items.append(item)
+        assert [item[1] for item in items if isinstance(item[1], str)] == ["a.html"]
+        with pytest.raises(OSError):
+            await producer
+
+    asyncio.run(scenario())
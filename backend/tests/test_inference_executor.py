@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+from services.rag.inference_executor import InferenceExecutor, EventLoopLagMonitor
+
+def test_runs_off_the_event_loop():
+    executor = InferenceExecutor(max_workers=2, intra_op_threads=3)
+
+    async def main():
+        loop_thread = threading.current_thread()
+        threads = await asyncio.gather(*(executor.run(threading.current_thread) for _ in range(4)))
+        assert all(thread is not loop_thread for thread in threads)
+        assert all(thread.name.startswith("rag-inference") for thread in threads)
+        assert await executor.run(max, [3, -5], key=abs) == -5
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert executor.intra_op_threads == 3
+    assert InferenceExecutor(max_workers=64).intra_op_threads >= 1
+
+def test_cancelling_drops_queued_work():
+    executor = InferenceExecutor(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    ran = []
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    async def main():
+        blocking = asyncio.ensure_future(executor.run(block))
+        await asyncio.to_thread(started.wait, 5)
+        queued = asyncio.ensure_future(executor.run(ran.append, 1))
+        await asyncio.sleep(0)
+        queued.cancel()
+        # The pool future is cancelled from a callback of the loop's next iteration
+        await asyncio.sleep(0.05)
+        release.set()
+        await blocking
+        await executor.run(lambda: None)
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert ran == []
+
+def test_lag_monitor_sees_blocking_callbacks():
+    monitor = EventLoopLagMonitor(interval=0.01)
+    assert monitor.snapshot()["samples"] == 0
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.1)  # holds the loop
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    asyncio.run(main())
+    stats = monitor.snapshot()
+    assert stats["samples"] > 0
+    assert stats["max_ms"] >= 80
+    assert stats["mean_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    monitor.reset()
+    assert monitor.snapshot()["samples"] == 0
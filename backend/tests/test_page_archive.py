@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+import types
+import httpx
+import pytest
+from services.scraping import page_archive
+from services.scraping.page_archive import PageArchive, load_parser
+
+PAGES = ["<li>Studio JVC</li><li>1BR Marina</li>", "<li>Villa Ranches</li>", "<li>Studio JVC</li><li>1BR Marina</li>"]
+
+def parse_lines(html):
+    return [{"title": item.split("</li>")[0]} for item in html.split("<li>")[1:]]
+
+def parse_upper(html):
+    return [{"title": listing["title"].upper()} for listing in parse_lines(html)]
+
+def archive_run(archive, parse_page=None, parser=None):
+    run = archive.start_run("bayut", parse_page, parser=parser)
+    for index, html in enumerate(PAGES):
+        run.add(index, f"https://example.com/page/{index + 1}", httpx.Response(200, content=html.encode("utf-8")))
+    run.close()
+    return run
+
+def test_archive_and_replay(tmp_path):
+    archive = PageArchive(tmp_path, keep_runs=0)
+    run = archive_run(archive, parse_lines)
+    manifest = archive.manifest("bayut")
+    assert manifest["run_id"] == run.run_id
+    assert manifest["parser"] == "test_page_archive:parse_lines"
+    assert [page["page"] for page in manifest["pages"]] == [1, 2, 3]
+    # Identical pages are stored once
+    assert len(list((tmp_path / "objects").glob("*/*.html.zst"))) == 2
+    expected = [listing for html in PAGES for listing in parse_lines(html)]
+    assert archive.replay("bayut") == expected
+    assert archive.replay("bayut", run.run_id, parse_upper) == parse_upper("".join(PAGES))
+
+def test_parser_of_script(tmp_path, monkeypatch):
+    def parse_page(html):
+        return parse_lines(html)
+    parse_page.__module__ = parse_page.__qualname__ = "__main__"
+    archive = PageArchive(tmp_path, keep_runs=0)
+
+    # Run by path: no importable name unless one is given
+    monkeypatch.setattr(sys.modules["__main__"], "__spec__", None, raising=False)
+    assert page_archive._parser_name(parse_page) is None
+    archive_run(archive, parse_page)
+    with pytest.raises(ValueError):
+        archive.replay("bayut")
+    run = archive_run(archive, parse_page, parser="test_page_archive:parse_lines")
+    assert archive.manifest("bayut", run.run_id)["parser"] == "test_page_archive:parse_lines"
+    assert archive.replay("bayut", run.run_id) == parse_lines("".join(PAGES))
+
+    # Run with -m: named by its module
+    monkeypatch.setattr(sys.modules["__main__"], "__spec__", types.SimpleNamespace(name="test_page_archive"))
+    parse_page.__qualname__ = "parse_upper"
+    assert page_archive._parser_name(parse_page) == "test_page_archive:parse_upper"
+
+def test_load_parser():
+    assert load_parser("test_page_archive:parse_upper") is parse_upper
+    with pytest.raises(ValueError):
+        load_parser("test_page_archive.parse_upper")
+
+def test_replay_cli_parser(tmp_path):
+    archive = PageArchive(tmp_path / "archive", keep_runs=0)
+    archive_run(archive)
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([backend_dir, os.path.join(backend_dir, "tests")]))
+    command = [
+        sys.executable, "-m", "services.scraping.page_archive", "--root", str(tmp_path / "archive"),
+        "--source", "bayut", "--output", str(tmp_path / "listings.json"),
+    ]
+    assert subprocess.run(command, cwd=tmp_path, env=env, capture_output=True).returncode != 0
+    subprocess.run(command + ["--parser", "test_page_archive:parse_upper"], cwd=tmp_path, env=env, check=True, capture_output=True)
+    with open(tmp_path / "listings.json", encoding="utf-8") as f:
+        assert json.load(f) == parse_upper("".join(PAGES))
@@ -0,0 +1,82 @@
+import asyncio
+import numpy as np
+import pytest
+from services.rag.query_batcher import QueryEmbeddingBatcher
+from test_retrieval_service import DIM, FakeEmbeddingService
+
+class RecordingEmbeddingService(FakeEmbeddingService):
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def get_query_embeddings(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model failed")
+        return super().get_query_embeddings(texts)
+
+QUERIES = [f"apartments in area {i}" for i in range(10)]
+
+def test_concurrent_queries_share_a_batch():
+    embedder = RecordingEmbeddingService()
+
+    async def main():
+        batcher = QueryEmbeddingBatcher(embedder, max_batch_size=32, max_wait_ms=50)
+        try:
+            return await asyncio.gather(*(batcher.embed(query) for query in QUERIES))
+        finally:
+            await batcher.close()
+
+    embeddings = asyncio.run(main())
+    assert embedder.batches == [QUERIES]
+    for query, embedding in zip(QUERIES, embeddings):
+        np.testing.assert_allclose(embedding, FakeEmbeddingService().get_query_embedding(query))
+
+def test_batches_are_capped():
+    embedder = RecordingEmbeddingService()
+
+    async def main():
+        batcher = QueryEmbeddingBatcher(embedder, max_batch_size=4, max_wait_ms=50)
+        try:
+            return await asyncio.gather(*(batcher.embed(query) for query in QUERIES))
+        finally:
+            await batcher.close()
+
+    asyncio.run(main())
+    assert [len(batch) for batch in embedder.batches] == [4, 4, 2]
+    assert [query for batch in embedder.batches for query in batch] == QUERIES
+
+def test_model_errors_reach_every_caller_and_the_batcher_recovers():
+    embedder = RecordingEmbeddingService(fail=True)
+
+    async def main():
+        batcher = QueryEmbeddingBatcher(embedder, max_wait_ms=20)
+        try:
+            results = await asyncio.gather(*(batcher.embed(query) for query in QUERIES[:3]), return_exceptions=True)
+            embedder.fail = False
+            return results, await batcher.embed(QUERIES[3])
+        finally:
+            await batcher.close()
+
+    results, embedding = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert embedding.shape == (DIM,)
+
+def test_cancelled_callers_are_not_encoded():
+    embedder = RecordingEmbeddingService()
+
+    async def main():
+        batcher = QueryEmbeddingBatcher(embedder, max_wait_ms=50)
+        try:
+            gone = asyncio.ensure_future(batcher.embed(QUERIES[0]))
+            kept = asyncio.ensure_future(batcher.embed(QUERIES[1]))
+            await asyncio.sleep(0.01)
+            gone.cancel()
+            await kept
+            with pytest.raises(asyncio.CancelledError):
+                await gone
+        finally:
+            await batcher.close()
+
+    asyncio.run(main())
+    assert embedder.batches == [QUERIES[1:2]]
@@ -0,0 +1,45 @@
+from services.rag import query_cache
+from services.rag.query_cache import TTLCache, normalize_query, filters_key, context_fingerprint
+
+def test_normalize_query():
+    assert normalize_query("  Villas in   JVC?! ") == normalize_query("villas in jvc") == "villas in jvc"
+
+def test_filters_key_ignores_order():
+    assert filters_key({"a": 1, "b": {"lte": 2}}) == filters_key({"b": {"lte": 2}, "a": 1})
+    assert filters_key(None) == filters_key({})
+
+def test_context_fingerprint():
+    docs = [{"text": "a"}, {"text": "b"}]
+    assert context_fingerprint(docs) == context_fingerprint([{"text": "a", "score": 1.0}, {"text": "b"}])
+    assert context_fingerprint(docs) != context_fingerprint(docs[::-1])
+    assert context_fingerprint([{"text": "ab"}]) != context_fingerprint(docs)
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts b, the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 1, "hit_rate": 0.75}
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(ttl=10)
+    cache.put("a", 1)
+    now[0] += 9
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+def test_sync_drops_entries_on_version_change():
+    cache = TTLCache()
+    cache.sync("v1")
+    cache.put("a", 1)
+    cache.sync("v1")
+    assert cache.get("a") == 1
+    cache.sync("v2")
+    assert cache.get("a") is None
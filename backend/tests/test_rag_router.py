@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import rag_router
+from test_rag_service import make_service
+
+@pytest.fixture
+def service(monkeypatch):
+    service = make_service([{"text": "Villa in JVC", "score": 0.9, "metadata": {}}])
+    monkeypatch.setattr(rag_router, "rag_service", service)
+    return service
+
+@pytest.fixture
+def client(service):
+    app = FastAPI()
+    app.include_router(rag_router.router)
+    # Not entered as a context manager, so the lifespan (background initialization) does not run
+    return TestClient(app)
+
+def test_ready_probe(client, service):
+    response = client.get("/rag/ready")
+    assert response.status_code == 503
+    assert response.json()["data"]["stage"] == "not_started"
+    service.progress["stage"] = "ready"
+    response = client.get("/rag/ready")
+    assert response.status_code == 200
+    assert response.json()["data"]["ready"] is True
+
+def test_queries_wait_for_the_index_unless_partial(client, service):
+    service.progress["stage"] = "indexing"
+    assert client.post("/rag/query", json={"query": "villas in jvc"}).status_code == 503
+    # Nothing searchable yet
+    assert client.post("/rag/query", json={"query": "villas in jvc", "allow_partial": True}).status_code == 503
+
+    service.progress["documents_embedded"] = 1
+    response = client.post("/rag/query", json={"query": "villas in jvc", "allow_partial": True})
+    assert response.status_code == 200
+    assert response.json()["partial"] is True
+    assert response.json()["data"]["response"] == "An answer."
+
+    service.progress["stage"] = "ready"
+    response = client.post("/rag/query", json={"query": "villas in jvc"})
+    assert response.status_code == 200 and response.json()["partial"] is False
+
+def test_router_import_defers_retrieval_modules():
+    """The API serves before RAG initializes, so importing the router must not pay for Qdrant or pandas"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (
+        "import sys, routers.rag_router; "
+        "print(','.join(m for m in ('qdrant_client', 'pandas', 'tiktoken') if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=backend_dir, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from services.rag_service import RAGService
+from config.rag_config import RAG_SOURCES
+from services.rag.generation_service import ERROR_RESPONSE
+
+class FakeRetrieval:
+    def __init__(self, context):
+        self.context = context
+
+    def index_version(self, collection_names):
+        return "v1"
+
+    async def fanout_search(self, query, quotas, limit, filters):
+        return list(self.context)
+
+class FakeGeneration:
+    model_name = "fake-llm"
+
+    def __init__(self, response="An answer."):
+        self.response = response
+        self.calls = 0
+
+    def pack_context(self, context):
+        return context, {"documents": len(context)}
+
+    async def generate_response(self, query, context):
+        self.calls += 1
+        return self.response
+
+def make_service(context, response="An answer."):
+    service = RAGService()
+    service.retrieval_service = FakeRetrieval(context)
+    service.generation_service = FakeGeneration(response)
+    return service
+
+def query_twice(service, query="villas in jvc"):
+    async def run():
+        return [await service.query(query), await service.query(query)]
+    return asyncio.run(run())
+
+def test_answer_is_cached():
+    service = make_service([{"text": "Villa in JVC", "score": 0.9}])
+    first, second = query_twice(service)
+    assert service.generation_service.calls == 1
+    assert first["cached"]["answer"] is False and second["cached"]["answer"] is True
+    assert second["response"] == "An answer."
+
+@pytest.mark.parametrize("context, response", [
+    ([], "I cannot find that in the context."),
+    ([{"text": "Villa in JVC", "score": 0.9}], ERROR_RESPONSE),
+])
+def test_answer_not_cached(context, response):
+    service = make_service(context, response)
+    first, second = query_twice(service)
+    assert service.generation_service.calls == 2
+    assert second["cached"]["answer"] is False
+
+class FakeStreamingGeneration(FakeGeneration):
+    def __init__(self, fragments, fail=False):
+        super().__init__()
+        self.fragments = fragments
+        self.fail = fail
+
+    async def stream_response(self, query, context):
+        self.calls += 1
+        for fragment in self.fragments:
+            yield fragment
+        if self.fail:
+            raise Exception("Ollama stream ended before the answer was complete")
+
+def stream(service, query="villas in jvc"):
+    async def run():
+        return [event async for event in service.query_stream(query)]
+    return asyncio.run(run())
+
+def test_streamed_answer_cached_after_completion():
+    service = make_service([{"text": "Villa in JVC", "score": 0.9}])
+    service.generation_service = FakeStreamingGeneration(["Villas ", "in JVC."])
+    first = stream(service)
+    assert [data for event, data in first if event == "token"] == ["Villas ", "in JVC."]
+    second = stream(service)
+    assert service.generation_service.calls == 1
+    assert ("token", "Villas in JVC.") in second
+    assert second[-1] == ("done", {"cached": {"retrieval": True, "answer": True}})
+
+def test_partial_streamed_answer_not_cached():
+    service = make_service([{"text": "Villa in JVC", "score": 0.9}])
+    service.generation_service = FakeStreamingGeneration(["Villas "], fail=True)
+    assert stream(service)[-1][0] == "error"
+    assert stream(service)[-1][0] == "error"
+    assert service.generation_service.calls == 2
+
+def test_abandoned_stream_not_cached():
+    service = make_service([{"text": "Villa in JVC", "score": 0.9}])
+    service.generation_service = FakeStreamingGeneration(["Villas ", "in JVC."])
+
+    async def run():
+        events = service.query_stream("villas in jvc")
+        async for event, _ in events:
+            if event == "token":
+                break  # client disconnected
+        await events.aclose()
+
+    asyncio.run(run())
+    assert len(service.answer_cache._entries) == 0
+
+def test_background_initialization(monkeypatch):
+    service = RAGService()
+    indexing = asyncio.Event()
+    finish = asyncio.Event()
+    indexed = []
+
+    async def process_and_index_data(sources):
+        indexed.append(sources)
+        service.progress["documents_embedded"] = 10
+        indexing.set()
+        await finish.wait()
+        return True
+
+    monkeypatch.setattr(service, "_load_components", lambda: None)
+    monkeypatch.setattr(service, "_load_artifact", lambda: ["listings"])
+    monkeypatch.setattr(service, "process_and_index_data", process_and_index_data)
+
+    async def run():
+        assert service.status()["stage"] == "not_started"
+        task = service.start_background_initialization()
+        assert service.start_background_initialization() is task
+        await indexing.wait()
+        # Searchable before indexing finishes
+        assert (service.status()["stage"], service.is_ready, service.has_documents) == ("indexing", False, True)
+        finish.set()
+        return await task
+
+    assert asyncio.run(run()) is True
+    status = service.status()
+    assert status["ready"] and status["stage"] == "ready"
+    assert status["elapsed_seconds"] >= 0
+    # Sources served from the index artifact are not indexed again
+    assert indexed == [[source for source in RAG_SOURCES if source != "listings"]]
+
+def test_failed_initialization(monkeypatch):
+    service = RAGService()
+
+    def load_components():
+        raise RuntimeError("model download failed")
+
+    monkeypatch.setattr(service, "_load_components", load_components)
+    assert asyncio.run(service.initialize()) is False
+    status = service.status()
+    assert (status["stage"], status["ready"], status["error"]) == ("failed", False, "model download failed")
@@ -0,0 +1,63 @@
+import httpx
+from services.scraping.crawl_pipeline import CrawlPipeline
+from services.scraping.response_cache import ResponseCache, body_digest
+from test_crawl_pipeline import FakeFetcher, crawl, parse_lines
+
+URL = "https://example.com/1"
+
+def response(body, **headers):
+    return httpx.Response(200, text=body, headers=headers)
+
+def test_entries_and_conditional_headers(tmp_path):
+    cache = ResponseCache(tmp_path, ttl=60, namespace="bayut")
+    assert cache.get(URL) is None
+    assert ResponseCache.conditional_headers(None) == {}
+
+    page = response("a\nb", ETag='"v1"', **{"Last-Modified": "Mon, 19 Oct 2026 10:00:00 GMT"})
+    cache.put(URL, page, body_digest(page.content), parse_lines("a\nb"))
+    entry = cache.get(URL)
+    assert entry["listings"] == [{"title": "a"}, {"title": "b"}]
+    assert cache.is_fresh(entry)
+    assert ResponseCache.conditional_headers(entry) == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 19 Oct 2026 10:00:00 GMT"}
+
+    # Namespaced: another parser's cache does not see the entry
+    assert ResponseCache(tmp_path, namespace="propertyfinder").get(URL) is None
+    assert not ResponseCache(tmp_path, ttl=0, namespace="bayut").is_fresh(entry)
+
+    cache.revalidated(entry, httpx.Response(304, headers={"ETag": '"v2"'}))
+    assert cache.get(URL)["etag"] == '"v2"'
+    assert cache.get(URL)["last_modified"] == entry["last_modified"]
+
+    cache._path(URL).write_text("{not json")
+    assert cache.get(URL) is None
+
+def test_pipeline_uses_the_cache(tmp_path):
+    urls = [f"https://example.com/{page}" for page in range(4)]
+    fetcher = FakeFetcher({url: f"listing {page}" for page, url in enumerate(urls)})
+    cache = ResponseCache(tmp_path, ttl=0)
+    first = dict(crawl(CrawlPipeline(fetcher, parse_lines, processes=1, cache=cache), urls))
+    assert all(cache.get(url)["listings"] == first[index] for index, url in enumerate(urls))
+    assert all(headers == {} for _, headers in fetcher.requests)
+
+    fetcher.requests.clear()
+    etags = {url: cache.get(url)["etag"] for url in urls}
+    fetcher.pages[urls[0]] = (304, "")
+    fetcher.pages[urls[1]] = "listing 1 changed"
+    pipeline = CrawlPipeline(fetcher, parse_lines, processes=1, cache=cache)
+    second = dict(crawl(pipeline, urls))
+    assert second == {**first, 1: [{"title": "listing 1 changed"}]}
+    assert pipeline.stats == {"fetched": 4, "not_modified": 1, "unchanged": 2, "cached": 0, "parsed": 1}
+    # Requests are conditional on what the cache holds
+    assert sorted((url, headers["If-None-Match"]) for url, headers in fetcher.requests) == sorted(etags.items())
+
+    fetcher.requests.clear()
+    cache.ttl = 60
+    pipeline = CrawlPipeline(fetcher, parse_lines, processes=1, cache=cache)
+    assert dict(crawl(pipeline, urls)) == second
+    assert fetcher.requests == []
+    assert pipeline.stats["cached"] == 4
+
+def test_not_modified_without_a_cached_copy(tmp_path):
+    fetcher = FakeFetcher({URL: (304, "")})
+    pipeline = CrawlPipeline(fetcher, parse_lines, processes=1, cache=ResponseCache(tmp_path))
+    assert crawl(pipeline, [URL]) == [(0, [])]
@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import threading
+import numpy as np
+import pytest
+from qdrant_client.http import models
+from services.rag.retrieval_service import RetrievalService, build_filter, collection_config, search_params
+
+DIM = 64
+
+class FakeEmbeddingService:
+    """Normalized bag of hashed words, so texts sharing words are close"""
+
+    def get_embeddings(self, texts):
+        vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, hashlib.md5(word.encode()).digest()[0] % DIM] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+    def get_query_embeddings(self, texts):
+        return self.get_embeddings(texts)
+
+    def get_query_embedding(self, text):
+        return self.get_embeddings([text])[0]
+
+FILTER_FIELDS = {"neighborhood": "keyword", "bedrooms": "integer", "rent": "float"}
+
+LISTINGS = [
+    ("villa with pool in JVC district 17", "JVC", 4, 250000.0),
+    ("apartment near the marina walk", "Dubai Marina", 1, 95000.0),
+    ("studio apartment in JVC with gym", "JVC", 0, 45000.0),
+    ("townhouse in Arabian Ranches with garden", "Arabian Ranches", 3, 180000.0),
+    ("sea view apartment in Dubai Marina", "Dubai Marina", 2, 140000.0),
+    ("villa in Arabian Ranches near the golf course", "Arabian Ranches", 5, 320000.0),
+]
+
+def listing_docs(listings=LISTINGS):
+    documents = []
+    for text, area, bedrooms, rent in listings:
+        metadata = {"neighborhood": area, "bedrooms": bedrooms, "rent": rent, "source": "listings"}
+        documents.append({"text": text, "metadata": {key: value for key, value in metadata.items() if value is not None}})
+    return documents
+
+def search(service, query, collection="listings", **kwargs):
+    return asyncio.run(service.hybrid_search(query, collection, **kwargs))
+
+@pytest.fixture
+def service():
+    service = RetrievalService(FakeEmbeddingService(), filter_fields=FILTER_FIELDS)
+    service.index_documents(listing_docs(), "listings")
+    return service
+
+def test_hybrid_search_ranks_matching_documents_first(service):
+    results = search(service, "villa JVC", limit=3)
+    assert results[0]["text"] == LISTINGS[0][0]
+    assert results[0]["neighborhood"] == "JVC" and results[0]["bedrooms"] == 4
+    scores = [result["score"] for result in results]
+    assert scores == sorted(scores, reverse=True)
+
+def test_delete_and_add_documents(service):
+    service.delete_documents([0], "listings")
+    assert LISTINGS[0][0] not in [result["text"] for result in search(service, "villa JVC")]
+    ids = service.add_documents(listing_docs([("villa with pool in JVC", "JVC", 3, 200000.0)]), "listings")
+    assert ids == [6]
+    assert search(service, "villa pool JVC", limit=1)[0]["text"] == "villa with pool in JVC"
+
+def test_blue_green_versions(service):
+    version = service.index_version(["listings"])
+    physical = service.create_version("listings")
+    service.add_documents(listing_docs(LISTINGS[:2]), physical)
+    # Still served by the old collection until the swap
+    assert len(search(service, "apartment", limit=10)) == len(LISTINGS)
+    service.swap_version("listings", physical)
+    assert service.index_version(["listings"]) != version
+    results = search(service, "apartment", limit=10)
+    assert [result["text"] for result in results] == [LISTINGS[1][0], LISTINGS[0][0]]
+
+def test_swap_replaces_an_in_place_collection(tmp_path):
+    service = RetrievalService(FakeEmbeddingService(), index_dir=str(tmp_path), filter_fields=FILTER_FIELDS)
+    service.index_documents(listing_docs(), "listings")
+    versions = {service.index_version(["listings"])}
+    assert (tmp_path / "bm25" / "listings").exists() and (tmp_path / "rows" / "listings").exists()
+    physical = service.create_version("listings")
+    service.add_documents(listing_docs(LISTINGS[:2]), physical)
+    versions.add(service.index_version(["listings"]))
+    service.swap_version("listings", physical)
+    # Cached results of the old collection stay invalid
+    assert service.index_version(["listings"]) not in versions
+    # The deleted collection's keyword index and rows go with it
+    assert "listings" not in service.keyword_indexes and "listings" not in service.row_stores
+    assert not (tmp_path / "bm25" / "listings").exists() and not (tmp_path / "rows" / "listings").exists()
+    assert len(search(service, "apartment", limit=10)) == 2
+
+def test_flush_and_reload(tmp_path):
+    service = RetrievalService(FakeEmbeddingService(), index_dir=str(tmp_path), filter_fields=FILTER_FIELDS)
+    service.index_documents(listing_docs(), "listings")
+    expected = search(service, "villa JVC")
+    service.qdrant.close()
+    reloaded = RetrievalService(FakeEmbeddingService(), index_dir=str(tmp_path), filter_fields=FILTER_FIELDS)
+    assert search(reloaded, "villa JVC") == expected
+
+def test_searches_run_during_writes(service):
+    errors = []
+    stop = threading.Event()
+
+    def searcher():
+        while not stop.is_set():
+            try:
+                tokens_hits = service.keyword_search("apartment", "listings", 10)
+                vector_hits = service.semantic_search(
+                    service.embedding_service.get_query_embedding("apartment"), "listings", 10
+                )
+                assert service._fetch_results(tokens_hits + vector_hits, "listings")
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=searcher) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for batch in range(20):
+        ids = service.add_documents(listing_docs(LISTINGS[1:2]), "listings", flush=False)
+        service.delete_documents(ids, "listings", flush=False)
+    stop.set()
+    for thread in threads:
+        thread.join(10)
+    assert errors == []
+
+def qdrant_matches(service, query_filter):
+    points, _ = service.qdrant.scroll("listings", scroll_filter=query_filter, limit=1000, with_payload=False)
+    return {point.id for point in points}
+
+@pytest.mark.parametrize("filters", [
+    {"neighborhood": "JVC"},
+    {"neighborhood": ["JVC", "Dubai Marina"]},
+    {"bedrooms": 2},
+    {"bedrooms": {"gte": 2, "lte": 4}},
+    {"rent": {"lt": 150000}},
+    {"neighborhood": "Arabian Ranches", "rent": {"gt": 200000.0}},
+    {"neighborhood": "Nowhere"},
+])
+def test_filter_mask_matches_qdrant(service, filters):
+    service.delete_documents([3], "listings")
+    service.add_documents(listing_docs([("studio in JVC", "JVC", 0, 40000.0), ("no area given", None, None, None)]), "listings")
+    query_filter = build_filter(filters)
+    mask = service.filter_mask("listings", query_filter)
+    assert set(np.flatnonzero(mask)) == qdrant_matches(service, query_filter)
+
+def test_filtered_hybrid_search(service):
+    results = search(service, "apartment", limit=10, filters={"neighborhood": "Dubai Marina", "bedrooms": {"gte": 2}})
+    assert [result["text"] for result in results] == [LISTINGS[4][0]]
+    assert search(service, "apartment", filters={"neighborhood": "Nowhere"}) == []
+
+HISTORY = ["JVC rents rose 5 percent in 2023", "Dubai Marina transactions in 2022", "Arabian Ranches sales history"]
+AREA_STATS = ["JVC average rent 70000", "Dubai Marina average rent 120000"]
+
+@pytest.fixture
+def fanout_service(service):
+    for name, texts in (("history", HISTORY), ("area_stats", AREA_STATS)):
+        service.index_documents([{"text": text, "metadata": {"source": name}} for text in texts], name)
+    return service
+
+def fanout(service, query, quotas, **kwargs):
+    return asyncio.run(service.fanout_search(query, quotas, **kwargs))
+
+@pytest.mark.parametrize("fusion", ["rrf", "normalized"])
+def test_fanout_ranks_across_collections(fanout_service, fusion):
+    results = fanout(fanout_service, "villa JVC District 17", {"listings": 2, "history": 1, "area_stats": 1}, limit=4, fusion=fusion)
+    # Each collection's best hit no longer scores the same; the matching listing wins
+    assert results[0]["text"] == LISTINGS[0][0] and results[0]["collection"] == "listings"
+    assert results[0]["score"] > max(result["score"] for result in results if result["collection"] != "listings")
+    assert sorted(result["collection"] for result in results) == ["area_stats", "history", "listings", "listings"]
+    scores = [result["score"] for result in results]
+    assert scores == sorted(scores, reverse=True)
+
+def test_fanout_fills_unused_quota(fanout_service):
+    results = fanout(fanout_service, "apartment in Dubai Marina", {"listings": 1, "history": 0, "area_stats": 1}, limit=4)
+    assert len(results) == 4
+    assert sum(result["collection"] == "area_stats" for result in results) >= 1
+    assert results[0]["collection"] == "listings"
+
+def test_fanout_matches_single_collection_search(service):
+    expected = search(service, "villa JVC", limit=3)
+    results = fanout(service, "villa JVC", {"listings": 3}, limit=3)
+    assert [{key: value for key, value in result.items() if key != "collection"} for result in results] == expected
+
+def test_collection_config_and_search_params():
+    assert collection_config(8, {}) == {
+        "vectors_config": models.VectorParams(size=8, distance=models.Distance.COSINE),
+        "hnsw_config": None,
+        "quantization_config": None,
+    }
+    assert search_params({}) is None
+
+    params = {"hnsw_m": 16, "hnsw_ef_construct": 128, "search_ef": 64, "on_disk": True, "hnsw_on_disk": True,
+              "quantization": "int8", "quantile": 0.95, "always_ram": False, "oversampling": 3.0, "rescore": False}
+    config = collection_config(8, params)
+    assert config["vectors_config"].on_disk is True
+    assert (config["hnsw_config"].m, config["hnsw_config"].ef_construct, config["hnsw_config"].on_disk) == (16, 128, True)
+    scalar = config["quantization_config"].scalar
+    assert (scalar.type, scalar.quantile, scalar.always_ram) == (models.ScalarType.INT8, 0.95, False)
+    assert search_params(params) == models.SearchParams(
+        hnsw_ef=64, quantization=models.QuantizationSearchParams(rescore=False, oversampling=3.0)
+    )
+    with pytest.raises(ValueError):
+        collection_config(8, {"quantization": "binary"})
+
+def test_quantized_on_disk_collection_searches_locally(service):
+    # Local mode accepts the settings and searches exhaustively, as without them
+    configured = RetrievalService(FakeEmbeddingService(), filter_fields=FILTER_FIELDS)
+    configured.configure_collection("listings", hnsw_m=8, search_ef=32, on_disk=True, quantization="int8", oversampling=2.0)
+    configured.index_documents(listing_docs(), "listings")
+    for query in ["villa JVC", "apartment marina", "garden townhouse"]:
+        assert search(configured, query, limit=4) == search(service, query, limit=4)
+
+def test_deleted_ids_are_not_reused(service):
+    last = len(LISTINGS) - 1
+    service.delete_documents([last], "listings")
+    # Compaction drops the deleted document, the highest id, from the keyword index
+    service.keyword_indexes["listings"].compact()
+    assert service.add_documents(listing_docs(LISTINGS[:1]), "listings") == [last + 1]
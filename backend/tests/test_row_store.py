@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from services.rag.row_store import RowStore, filter_column
+
+DOCS = [
+    {"text": "Studio in JVC", "metadata": {"neighborhood": "JVC", "bedrooms": 0, "rent": 45000.0}},
+    {"text": "2BR Dubai Marina, sea view", "metadata": {"neighborhood": "Dubai Marina", "bedrooms": 2, "rent": 1.0}},
+    {"text": "Villa — Arabian Ranches", "metadata": {"neighborhood": "Arabian Ranches", "bedrooms": 1}},
+    {"text": "1BR JVC", "metadata": {"neighborhood": "JVC", "rent": 1}},
+]
+
+@pytest.fixture
+def store():
+    store = RowStore()
+    store.add([10, 20, 30, 40], DOCS)
+    return store
+
+def expected(ids):
+    return {doc_id: {"text": doc["text"], **doc["metadata"]} for doc_id, doc in zip([10, 20, 30, 40], DOCS) if doc_id in ids}
+
+def test_add_get_delete(store):
+    assert len(store) == 4
+    assert store.get([40, 10, 99]) == expected({10, 40})
+    store.delete([20, 99])
+    assert len(store) == 3
+    assert store.get([10, 20, 30, 40]) == expected({10, 30, 40})
+    assert store.column("neighborhood") == ["JVC", "Arabian Ranches", "JVC"]
+    assert store.column("bedrooms") == [0, 1, None]
+    assert store.column("unknown") == [None, None, None]
+
+def test_values_keep_their_types(store):
+    rents = store.column("rent")
+    assert rents == [45000.0, 1.0, None, 1]
+    assert [type(value) for value in rents] == [float, float, type(None), int]
+
+def test_filter_array(store):
+    store.delete([20])
+    # Deleted rows are included; live_rows masks them
+    np.testing.assert_array_equal(store.row_ids(), [10, 20, 30, 40])
+    np.testing.assert_array_equal(store.live_rows(), [True, False, True, True])
+    np.testing.assert_array_equal(store.filter_array("bedrooms", "integer"), [0.0, 2.0, 1.0, np.nan])
+    np.testing.assert_array_equal(store.filter_array("neighborhood", "keyword"), ["JVC", "Dubai Marina", "Arabian Ranches", "JVC"])
+    np.testing.assert_array_equal(store.filter_array("unknown", "float"), [np.nan] * 4)
+    for field, schema in [("bedrooms", "integer"), ("rent", "float"), ("neighborhood", "keyword")]:
+        columns = [doc["metadata"].get(field) for doc in DOCS]
+        np.testing.assert_array_equal(store.filter_array(field, schema), filter_column(columns, schema))
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_save_load(tmp_path, store, mmap):
+    store.delete([20])
+    store.save(tmp_path / "rows")
+    loaded = RowStore.load(tmp_path / "rows", mmap=mmap)
+    assert len(loaded) == 3
+    assert loaded.read_only == mmap
+    assert loaded.get([10, 20, 30, 40]) == expected({10, 30, 40})
+    assert [type(value) for value in loaded.column("rent")] == [float, type(None), int]
+    # Saving drops deleted rows
+    np.testing.assert_array_equal(loaded.row_ids(), [10, 30, 40])
+    np.testing.assert_array_equal(loaded.filter_array("bedrooms", "integer"), [0.0, 1.0, np.nan])
+
+    if mmap:
+        with pytest.raises(ValueError):
+            loaded.add([50], DOCS[:1])
+    else:
+        loaded.add([50], [{"text": "New", "metadata": {"neighborhood": "JVC", "rent": 1}}])
+        assert loaded.get([50]) == {50: {"text": "New", "neighborhood": "JVC", "rent": 1}}
+        assert type(loaded.get([50])[50]["rent"]) is int
+
+def test_load_empty(tmp_path):
+    RowStore().save(tmp_path / "rows")
+    for mmap in (False, True):
+        loaded = RowStore.load(tmp_path / "rows", mmap=mmap)
+        assert len(loaded) == 0
+        assert loaded.get([1]) == {}
@@ -0,0 +1,47 @@
+import threading
+import time
+from services.rag.rw_lock import ReadWriteLock
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=5)
+
+    def reader():
+        with lock.read():
+            inside.wait()  # all three readers hold the lock at once
+
+    threads = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not inside.broken
+
+def test_writer_excludes_readers_and_is_preferred():
+    lock = ReadWriteLock()
+    events = []
+    reading = threading.Event()
+
+    def writer():
+        with lock.write():
+            events.append("write")
+            time.sleep(0.05)
+            events.append("write done")
+
+    def late_reader():
+        with lock.read():
+            events.append("late read")
+
+    with lock.read():
+        reading.set()
+        write_thread = threading.Thread(target=writer)
+        write_thread.start()
+        time.sleep(0.05)
+        # A waiting writer holds back new readers
+        read_thread = threading.Thread(target=late_reader)
+        read_thread.start()
+        time.sleep(0.05)
+        assert events == []
+    write_thread.join(5)
+    read_thread.join(5)
+    assert events == ["write", "write done", "late read"]